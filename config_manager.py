@@ -88,6 +88,13 @@ class ConfigManager:
                         description="FPS limit"),
             ConfigSchema("quality", "high", valid_values=["low", "medium", "high", "ultra"],
                         category=ConfigCategory.VIDEO, description="Graphics quality"),
+            ConfigSchema("background_cache_disk", True, category=ConfigCategory.VIDEO,
+                        description="Keep baked maze backgrounds as PNG files in cache/backgrounds"),
+            ConfigSchema("dirty_rect_rendering", True, category=ConfigCategory.VIDEO,
+                        description="Redraw only the changed regions of the game view each frame"),
+            ConfigSchema("effects_quality", "cached", valid_values=["full", "cached", "off"],
+                        category=ConfigCategory.VIDEO,
+                        description="Game view background effects: full (per frame), cached (pre-rendered, sampled at a fixed rate) or off"),
             
             # Gameplay Settings
             ConfigSchema("difficulty", "normal", valid_values=["easy", "normal", "hard", "expert"],
@@ -114,6 +121,10 @@ class ConfigManager:
                         description="Enable UI animations"),
             ConfigSchema("particle_effects", True, category=ConfigCategory.UI,
                         description="Enable particle effects"),
+            ConfigSchema("power_pellet_flash", False, category=ConfigCategory.UI,
+                        description="Flash the power pellets"),
+            ConfigSchema("profiler_enabled", False, category=ConfigCategory.UI,
+                        description="Record frame/AI timings, show the overlay and log percentiles"),
             
             # Game Mode Settings
             ConfigSchema("few_pellets_mode", False, category=ConfigCategory.GAMEPLAY,
@@ -126,6 +137,16 @@ class ConfigManager:
                         category=ConfigCategory.GAMEPLAY, description="Heuristic function for BFS algorithm (deprecated)"),
             ConfigSchema("algorithm_heuristic", "NONE", valid_values=["NONE", "MANHATTAN", "EUCLIDEAN", "MAZEDISTANCE"],
                         category=ConfigCategory.GAMEPLAY, description="Heuristic function for all algorithms"),
+            ConfigSchema("ai_search_budget_ms", 15, 1, 200, category=ConfigCategory.GAMEPLAY,
+                        description="Time budget (ms) per Minimax/Alpha-Beta/MCTS decision"),
+            ConfigSchema("ai_mcts_iterations", 3000, 1, 100000, category=ConfigCategory.GAMEPLAY,
+                        description="Maximum MCTS iterations per decision"),
+            ConfigSchema("ai_plan_cache", True, category=ConfigCategory.GAMEPLAY,
+                        description="Reuse offline master paths cached on disk"),
+            ConfigSchema("ai_fixed_search_depth", 4, 1, 8, category=ConfigCategory.GAMEPLAY,
+                        description="Minimax/Alpha-Beta depth per decision in headless simulation"),
+            ConfigSchema("ai_fixed_mcts_iterations", 200, 1, 100000, category=ConfigCategory.GAMEPLAY,
+                        description="MCTS iterations per decision in headless simulation"),
         ]
         
         for schema in schemas:
@@ -5,14 +5,54 @@
 
 from collections import deque
 from queue import PriorityQueue
+import heapq
+import itertools
 from constants import *
+from objects.compiled_graph import CompiledGraph
+from engine.heuristic import Heuristic
+import threading
 import time
 import math
 
+FEW_PELLETS_LIMIT = 8  # Số pellet tối đa giải chính xác bằng *_few_pellets (đo trên maze1/maze2)
+
+# =============================================================================
+# HỦY TÌM KIẾM (PLANNER CHẠY NỀN)
+# =============================================================================
+# Planner nền của ComputeOnceSystem gắn một threading.Event vào thread của nó;
+# các vòng lặp mở rộng của engine kiểm tra Event và thoát ngay khi request bị
+# thay thế. Thread không gắn Event (game loop, headless) không bị ảnh hưởng.
+_planner_state = threading.local()
+
+
+class PlanCancelled(Exception):
+    """Request của planner nền đã bị thay thế (reset / request mới)"""
+
+
+def set_cancel_event(event):
+    """
+    Gắn Event hủy cho thread hiện tại (None để bỏ)
+    """
+    _planner_state.cancel = event
+
+
+def cancel_event():
+    """
+    Returns:
+        Event hủy của thread hiện tại, hoặc None
+    """
+    return getattr(_planner_state, 'cancel', None)
+
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise PlanCancelled()
+
 # =============================================================================
 # BFS
 # =============================================================================
 def bfs(startNode, pellet_group, heuristic_func=None):
+    cancel = cancel_event()
     print("BFS")
 
     if not pellet_group or not pellet_group.pelletList:
@@ -29,10 +69,11 @@ def bfs(startNode, pellet_group, heuristic_func=None):
     current_node = startNode
     remaining_pellets = set(pellet_nodes)
     full_path = []
-    if len(remaining_pellets) <= 7:
+    if len(remaining_pellets) <= FEW_PELLETS_LIMIT:
         path_to_pellet = bfs_few_pellets(current_node, remaining_pellets)
         return path_to_pellet
     while remaining_pellets:
+        check_cancelled(cancel)
         if heuristic_func is not None:
             nearest_pellet = min(remaining_pellets, key=lambda p: heuristic_func(current_node, p))
             path_to_pellet = bfs_find_nearest_pellet(current_node, {nearest_pellet})
@@ -53,52 +94,62 @@ def bfs(startNode, pellet_group, heuristic_func=None):
     return full_path if full_path else None
 
 def bfs_find_nearest_pellet(start_node, pellet_nodes):
+    cancel = cancel_event()
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    targets = graph.ids(pellet_nodes)
+    start = start_node.index
+
     queue = deque()
-    queue.append((start_node, [start_node]))
-    visited = set()
-    visited.add(start_node)
+    queue.append(start)
+    visited = bytearray(graph.size)
+    visited[start] = 1
+    parents = [-1] * graph.size
 
     while queue:
-        current, path = queue.popleft()
-        if current in pellet_nodes:
-            return path
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction) and neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
+        check_cancelled(cancel)
+        current = queue.popleft()
+        if current in targets:
+            return graph.toNodes(trace_parents(parents, current))
+        for neighbor in successors[current]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                queue.append(neighbor)
     return None
 
 def bfs_few_pellets(start_node, pellet_nodes):
-    max_pellets = 7
-    from collections import deque
+    cancel = cancel_event()
+    max_pellets = FEW_PELLETS_LIMIT
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    start = start_node.index
+
     queue = deque()
-    initial_collected = set([start_node]) if start_node in pellet_nodes else set()
-    queue.append((start_node, [start_node], initial_collected))
+    initial_collected = bits.get(start, 0)
+    queue.append((start, PathLink(start), initial_collected))
     visited = set()
-    visited.add((start_node, frozenset(initial_collected)))
+    visited.add(state_key(initial_collected, start))
     while queue:
+        check_cancelled(cancel)
         current, path, collected = queue.popleft()
-        if len(collected) >= max_pellets:
-            return path
-        if len(collected) == len(pellet_nodes):
-            return path
-
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                new_collected = set(collected)
-                if neighbor in pellet_nodes:
-                    new_collected.add(neighbor)
-                state = (neighbor, frozenset(new_collected))
-                if state not in visited:
-                    visited.add(state)
-                    queue.append((neighbor, path + [neighbor], new_collected))
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        for neighbor in successors[current]:
+            new_collected = collected | bits.get(neighbor, 0)
+            state = state_key(new_collected, neighbor)
+            if state not in visited:
+                visited.add(state)
+                queue.append((neighbor, PathLink(neighbor, path), new_collected))
     return None
 # =============================================================================
 # DFS 
 # =============================================================================
 def dfs(startNode, pellet_group, heuristic_func=None):
+    cancel = cancel_event()
     print("DFS")
     if not pellet_group or not pellet_group.pelletList:
         return None
@@ -109,8 +160,6 @@ def dfs(startNode, pellet_group, heuristic_func=None):
     if not pellet_nodes:
         return None
 
-    directions = tuple(get_all_directions())
-
     if heuristic_func is not None:
         print(f"🎯 DFS using heuristic: {heuristic_func.__name__}")
 
@@ -118,13 +167,14 @@ def dfs(startNode, pellet_group, heuristic_func=None):
     remaining_pellets = set(pellet_nodes)
     full_path = []
     path_to_pellet = None
-    use_special_case = len(remaining_pellets) <= 7
+    use_special_case = len(remaining_pellets) <= FEW_PELLETS_LIMIT
     if use_special_case:
-        path_to_pellet = dfs_few_pellets(current_node, remaining_pellets, directions)
+        path_to_pellet = dfs_few_pellets(current_node, remaining_pellets)
         if path_to_pellet:
             return path_to_pellet
     if not use_special_case or path_to_pellet is None:
         while remaining_pellets:
+            check_cancelled(cancel)
             if heuristic_func is not None:
                 nearest_pellet = min(remaining_pellets, key=lambda p: heuristic_func(current_node, p))
                 path_to_pellet = dfs_find_nearest_pellet(current_node, {nearest_pellet})
@@ -141,51 +191,63 @@ def dfs(startNode, pellet_group, heuristic_func=None):
     return full_path if full_path else None
 
 def dfs_find_nearest_pellet(start_node, pellet_nodes):
+    cancel = cancel_event()
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    targets = graph.ids(pellet_nodes)
+    start = start_node.index
+
     stack = []
-    stack.append((start_node, [start_node]))
-    visited = set()
-    visited.add(start_node)
+    stack.append(start)
+    visited = bytearray(graph.size)
+    visited[start] = 1
+    parents = [-1] * graph.size
 
     while stack:
-        current, path = stack.pop()
-        if current in pellet_nodes:
-            return path
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction) and neighbor not in visited:
-                visited.add(neighbor)
-                stack.append((neighbor, path + [neighbor]))
+        check_cancelled(cancel)
+        current = stack.pop()
+        if current in targets:
+            return graph.toNodes(trace_parents(parents, current))
+        for neighbor in successors[current]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                stack.append(neighbor)
     return None
 
 def dfs_few_pellets(start_node, pellet_nodes):
-    max_pellets = 7
+    cancel = cancel_event()
+    max_pellets = FEW_PELLETS_LIMIT
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    start = start_node.index
+
     stack = []
-    stack.append((start_node, [start_node], set([start_node]) if start_node in pellet_nodes else set()))
+    initial_collected = bits.get(start, 0)
+    stack.append((start, PathLink(start), initial_collected))
     visited = set()
-    visited.add((start_node, frozenset(set([start_node]) if start_node in pellet_nodes else set())))
+    visited.add(state_key(initial_collected, start))
     while stack:
+        check_cancelled(cancel)
         current, path, collected = stack.pop()
-        if len(collected) >= max_pellets:
-            return path
-        if len(collected) == len(pellet_nodes):
-            return path
-
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                new_collected = set(collected)
-                if neighbor in pellet_nodes:
-                    new_collected.add(neighbor)
-                state = (neighbor, frozenset(new_collected))
-                if state not in visited:
-                    visited.add(state)
-                    stack.append((neighbor, path + [neighbor], new_collected))
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        for neighbor in successors[current]:
+            new_collected = collected | bits.get(neighbor, 0)
+            state = state_key(new_collected, neighbor)
+            if state not in visited:
+                visited.add(state)
+                stack.append((neighbor, PathLink(neighbor, path), new_collected))
     return None
 
 # ============================================================================= 
 # A*
 # =============================================================================
 def astar(startNode, pellet_group, ghost_group=None, heuristic_func=None, ghost_avoid_dist=2):
+    cancel = cancel_event()
     print("🎯 A* algorithm")
     if not pellet_group or not pellet_group.pelletList:
         return None
@@ -202,7 +264,8 @@ def astar(startNode, pellet_group, ghost_group=None, heuristic_func=None, ghost_
         path.append(current_node)
 
     while remaining_pellets:
-        if len(remaining_pellets) <= 7:
+        check_cancelled(cancel)
+        if len(remaining_pellets) <= FEW_PELLETS_LIMIT:
             sub_path = astar_few_pellets(current_node, remaining_pellets)
             if sub_path is None:
                 break
@@ -231,85 +294,94 @@ def astar(startNode, pellet_group, ghost_group=None, heuristic_func=None, ghost_
     return path if path else None
 
 def astar_single(start, goal, heuristic_func=None):
-    from queue import PriorityQueue
-
+    cancel = cancel_event()
     if start == goal:
         return [start]
 
+    graph = get_compiled_graph(start)
+    if not graph.owns(goal):
+        return None
+    successors = graph.successorLists(PACMAN)
+    heuristic = get_id_heuristic(graph, heuristic_func)
+    start_id = start.index
+    goal_id = goal.index
+
     open_set = PriorityQueue()
-    open_set.put((0, start))
-    came_from = {start: None}
-    g_score = {start: 0}
+    open_set.put((0, start_id))
+    came_from = {start_id: None}
+    g_score = {start_id: 0}
 
     while not open_set.empty():
+        check_cancelled(cancel)
         _, current = open_set.get()
-        if current == goal:
+        if current == goal_id:
             path = []
             while current is not None:
-                path.insert(0, current)
+                path.append(current)
                 current = came_from[current]
-            return path
-
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                tentative_g = g_score[current] + 1
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    g_score[neighbor] = tentative_g
-                    if heuristic_func is not None:
-                        h = heuristic_func(neighbor, goal)
-                    else:
-                        h = heuristic_manhattan(neighbor, goal)
-                    f = tentative_g + h
-                    open_set.put((f, neighbor))
-                    came_from[neighbor] = current
+            path.reverse()
+            return graph.toNodes(path)
+
+        for neighbor in successors[current]:
+            tentative_g = g_score[current] + 1
+            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                f = tentative_g + heuristic(neighbor, goal_id)
+                open_set.put((f, neighbor))
+                came_from[neighbor] = current
     return None
 
 def astar_few_pellets(start_node, pellet_nodes):
-    from queue import PriorityQueue
+    cancel = cancel_event()
+    max_pellets = FEW_PELLETS_LIMIT
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    manhattan = graph.manhattan
+    start = start_node.index
+
+    remaining_pellets = get_remaining_pellets(bits)
 
-    max_pellets = 7
     def heuristic(current, collected):
-        uncollected = pellet_nodes - collected
+        uncollected = remaining_pellets(collected)
         if not uncollected:
             return 0
-        return min(heuristic_manhattan(current, p) for p in uncollected)
+        return min(manhattan(current, p) for p in uncollected)
 
-    initial_collected = set()
-    if start_node in pellet_nodes:
-        initial_collected.add(start_node)
+    initial_collected = bits.get(start, 0)
 
-    pq = PriorityQueue()
+    # Entry cùng (f, g, node) xếp theo thứ tự thêm vào; PathLink không bao giờ bị so sánh
+    pq = []
+    order = itertools.count()
     g = 0
-    h = heuristic(start_node, initial_collected)
-    pq.put((g + h, g, start_node, [start_node], frozenset(initial_collected)))
+    h = heuristic(start, initial_collected)
+    heapq.heappush(pq, (g + h, g, start, next(order), PathLink(start), initial_collected))
     visited = set()
-    visited.add((start_node, frozenset(initial_collected)))
-
-    while not pq.empty():
-        f, g, current, path, collected = pq.get()
-        collected_set = set(collected)
-        if len(collected_set) >= max_pellets or len(collected_set) == len(pellet_nodes):
-            return path
-
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                new_collected = set(collected_set)
-                if neighbor in pellet_nodes:
-                    new_collected.add(neighbor)
-                state = (neighbor, frozenset(new_collected))
-                if state not in visited:
-                    visited.add(state)
-                    new_g = g + 1
-                    new_h = heuristic(neighbor, new_collected)
-                    pq.put((new_g + new_h, new_g, neighbor, path + [neighbor], frozenset(new_collected)))
+    visited.add(state_key(initial_collected, start))
+
+    while pq:
+        check_cancelled(cancel)
+        f, g, current, _, path, collected = heapq.heappop(pq)
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        for neighbor in successors[current]:
+            new_collected = collected | bits.get(neighbor, 0)
+            state = state_key(new_collected, neighbor)
+            if state not in visited:
+                visited.add(state)
+                new_g = g + 1
+                new_h = heuristic(neighbor, new_collected)
+                heapq.heappush(pq, (new_g + new_h, new_g, neighbor, next(order),
+                                    PathLink(neighbor, path), new_collected))
     return None
 
 # =============================================================================
 # UCS
 # =============================================================================
 def ucs(startNode, pellet_group, heuristic_func=None):
+    cancel = cancel_event()
     print("UCS")
     if not pellet_group or not pellet_group.pelletList:
         return None
@@ -326,11 +398,12 @@ def ucs(startNode, pellet_group, heuristic_func=None):
     remaining_pellets = set(pellet_nodes)
     full_path = []
     
-    if len(remaining_pellets) <= 7:
+    if len(remaining_pellets) <= FEW_PELLETS_LIMIT:
         path_to_pellet = ucs_few_pellets(current_node, remaining_pellets)
         return path_to_pellet
 
     while remaining_pellets:
+        check_cancelled(cancel)
         if heuristic_func is not None:
             nearest_pellet = min(remaining_pellets, key=lambda p: heuristic_func(current_node, p))
             path_to_pellet, _ = ucs_find_nearest_pellet(current_node, {nearest_pellet})
@@ -350,66 +423,78 @@ def ucs(startNode, pellet_group, heuristic_func=None):
     return full_path if full_path else None
 
 def ucs_find_nearest_pellet(start_node, pellet_nodes):
-    from queue import PriorityQueue
+    cancel = cancel_event()
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorDirections(PACMAN)
+    targets = graph.ids(pellet_nodes)
+    start = start_node.index
+
+    # Entry cùng (cost, node) xếp theo thứ tự thêm vào; PathLink không bao giờ bị so sánh
     pq = PriorityQueue()
-    pq.put((0, start_node, [start_node]))
+    order = itertools.count()
+    pq.put((0, start, next(order), PathLink(start)))
     visited = {}
 
     while not pq.empty():
-        cost, current, path = pq.get()
-        if current in pellet_nodes:
-            return path, cost
+        check_cancelled(cancel)
+        cost, current, _, path = pq.get()
+        if current in targets:
+            return graph.toNodes(path.ids()), cost
         if current in visited and visited[current] <= cost:
             continue
         visited[current] = cost
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                move_cost = 3 if direction == PORTAL else 1
-                total_cost = cost + move_cost
-                if neighbor not in visited or total_cost < visited.get(neighbor, float('inf')):
-                    pq.put((total_cost, neighbor, path + [neighbor]))
+        for neighbor, direction in successors[current]:
+            move_cost = 3 if direction == PORTAL else 1
+            total_cost = cost + move_cost
+            if neighbor not in visited or total_cost < visited[neighbor]:
+                pq.put((total_cost, neighbor, next(order), PathLink(neighbor, path)))
     return None, float('inf')
 
 def ucs_few_pellets(start_node, pellet_nodes):
-    from queue import PriorityQueue
-    max_pellets = 7
-    
-    pq = PriorityQueue()
-    initial_collected = set([start_node]) if start_node in pellet_nodes else set()
-    pq.put((0, start_node, [start_node], initial_collected))
+    cancel = cancel_event()
+    max_pellets = FEW_PELLETS_LIMIT
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorDirections(PACMAN)
+    bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    start = start_node.index
+
+    # Entry cùng (cost, node) xếp theo thứ tự thêm vào; PathLink không bao giờ bị so sánh
+    pq = []
+    order = itertools.count()
+    initial_collected = bits.get(start, 0)
+    heapq.heappush(pq, (0, start, next(order), PathLink(start), initial_collected))
     visited = {}
-    
-    while not pq.empty():
-        cost, current, path, collected = pq.get()
-        
-        if len(collected) >= max_pellets or len(collected) == len(pellet_nodes):
-            return path
-        
-        state = (current, frozenset(collected))
+
+    while pq:
+        check_cancelled(cancel)
+        cost, current, _, path, collected = heapq.heappop(pq)
+
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        state = state_key(collected, current)
         if state in visited and visited[state] <= cost:
             continue
         visited[state] = cost
-        
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                move_cost = 3 if direction == PORTAL else 1
-                total_cost = cost + move_cost
-                
-                new_collected = set(collected)
-                if neighbor in pellet_nodes:
-                    new_collected.add(neighbor)
-                
-                new_state = (neighbor, frozenset(new_collected))
-                if new_state not in visited or total_cost < visited.get(new_state, float('inf')):
-                    pq.put((total_cost, neighbor, path + [neighbor], new_collected))
-    
+
+        for neighbor, direction in successors[current]:
+            move_cost = 3 if direction == PORTAL else 1
+            total_cost = cost + move_cost
+
+            new_collected = collected | bits.get(neighbor, 0)
+
+            new_state = state_key(new_collected, neighbor)
+            if new_state not in visited or total_cost < visited[new_state]:
+                heapq.heappush(pq, (total_cost, neighbor, next(order),
+                                    PathLink(neighbor, path), new_collected))
+
     return None
 # =============================================================================
 # IDS
 # =============================================================================
 def ids(startNode, pellet_group, heuristic_func=None, max_depth=50):
+    cancel = cancel_event()
     print("IDS")
     if not pellet_group or not pellet_group.pelletList:
         return None
@@ -427,11 +512,12 @@ def ids(startNode, pellet_group, heuristic_func=None, max_depth=50):
     remaining_pellets = set(pellet_nodes)
     full_path = []
     
-    if len(remaining_pellets) <= 7:
+    if len(remaining_pellets) <= FEW_PELLETS_LIMIT:
         path_to_pellet = ids_few_pellets(current_node, remaining_pellets, max_depth)
         return path_to_pellet
 
     while remaining_pellets:
+        check_cancelled(cancel)
         if heuristic_func is not None:
             nearest_pellet = min(remaining_pellets, key=lambda p: heuristic_func(current_node, p))
             path_to_pellet = ids_find_nearest_pellet(current_node, {nearest_pellet}, max_depth)
@@ -458,63 +544,76 @@ def ids_find_nearest_pellet(start_node, pellet_nodes, max_depth=50):
     return None
 
 def dls_find_nearest_pellet(start_node, pellet_nodes, limit):
+    cancel = cancel_event()
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    targets = graph.ids(pellet_nodes)
+    start = start_node.index
+
     stack = []
-    stack.append((start_node, [start_node], 0))
-    visited_at_depth = {}  
+    stack.append((start, PathLink(start), 0))
+    visited_at_depth = {}
 
     while stack:
+        check_cancelled(cancel)
         current, path, depth = stack.pop()
-        if current in pellet_nodes:
-            return path
-        
+        if current in targets:
+            return graph.toNodes(path.ids())
+
         if current in visited_at_depth and visited_at_depth[current] <= depth:
             continue
         visited_at_depth[current] = depth
-        
+
         if depth < limit:
-            for direction in get_all_directions():
-                neighbor = current.neighbors.get(direction)
-                if is_valid_node(neighbor, current, direction):
-                    stack.append((neighbor, path + [neighbor], depth + 1))
+            for neighbor in successors[current]:
+                stack.append((neighbor, PathLink(neighbor, path), depth + 1))
     return None
 
 def ids_few_pellets(start_node, pellet_nodes, max_depth=50):
-    max_pellets = 7
+    max_pellets = FEW_PELLETS_LIMIT
+    # Graph và bit pellet không đổi giữa các lần đào sâu - dựng một lần
+    graph = get_compiled_graph(start_node)
+    bits = get_pellet_bits(graph, pellet_nodes)
     
     for depth_limit in range(1, max_depth * len(pellet_nodes) + 1):
-        result = dls_few_pellets(start_node, pellet_nodes, depth_limit, max_pellets)
+        result = dls_few_pellets(start_node, pellet_nodes, depth_limit, max_pellets, graph, bits)
         if result is not None:
             return result
     return None
 
-def dls_few_pellets(start_node, pellet_nodes, depth_limit, max_pellets):
+def dls_few_pellets(start_node, pellet_nodes, depth_limit, max_pellets, graph=None, bits=None):
+    cancel = cancel_event()
+    if graph is None:
+        graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    if bits is None:
+        bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    start = start_node.index
+
     stack = []
-    initial_collected = set([start_node]) if start_node in pellet_nodes else set()
-    stack.append((start_node, [start_node], initial_collected, 0))
-    visited_at_depth = {}  
-    
+    initial_collected = bits.get(start, 0)
+    stack.append((start, PathLink(start), initial_collected, 0))
+    visited_at_depth = {}
+
     while stack:
+        check_cancelled(cancel)
         current, path, collected, depth = stack.pop()
-        
-        if len(collected) >= max_pellets or len(collected) == len(pellet_nodes):
-            return path
-        
-        state = (current, frozenset(collected))
-        
+
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        state = state_key(collected, current)
+
         if state in visited_at_depth and visited_at_depth[state] <= depth:
             continue
         visited_at_depth[state] = depth
-        
+
         if depth < depth_limit:
-            for direction in get_all_directions():
-                neighbor = current.neighbors.get(direction)
-                if is_valid_node(neighbor, current, direction):
-                    new_collected = set(collected)
-                    if neighbor in pellet_nodes:
-                        new_collected.add(neighbor)
-                    
-                    stack.append((neighbor, path + [neighbor], new_collected, depth + 1))
-    
+            for neighbor in successors[current]:
+                new_collected = collected | bits.get(neighbor, 0)
+                stack.append((neighbor, PathLink(neighbor, path), new_collected, depth + 1))
+
     return None
 
 # =============================================================================
@@ -522,6 +621,7 @@ def dls_few_pellets(start_node, pellet_nodes, depth_limit, max_pellets):
 # =============================================================================
 
 def greedy(start_node, pellet_group, heuristic_func=None):
+    cancel = cancel_event()
     print("Greedy")
 
     if not pellet_group or not pellet_group.pelletList:
@@ -539,12 +639,13 @@ def greedy(start_node, pellet_group, heuristic_func=None):
     full_path = [current_node]
     
     
-    if len(remaining_pellets) <= 7:
+    if len(remaining_pellets) <= FEW_PELLETS_LIMIT:
         path_to_pellet = greedy_few_pellets(current_node, remaining_pellets, heuristic_func)
         return path_to_pellet if path_to_pellet else full_path
 
     
     while remaining_pellets:
+        check_cancelled(cancel)
         nearest_pellet = min(remaining_pellets, key=lambda n: heuristic_func(current_node, n))
         path_to_pellet = greedy_find_path(current_node, nearest_pellet, heuristic_func)
         if not path_to_pellet:
@@ -560,90 +661,111 @@ def greedy(start_node, pellet_group, heuristic_func=None):
     return full_path if len(full_path) > 1 else None
 
 def greedy_find_path(start_node, goal_node, heuristic=None):
-    from collections import deque
-
-    if heuristic is None:
-        heuristic = heuristic_manhattan
+    cancel = cancel_event()
+    graph = get_compiled_graph(start_node)
+    if not graph.owns(goal_node):
+        return None
+    successors = graph.successorLists(PACMAN)
+    heuristic = get_id_heuristic(graph, heuristic)
+    start = start_node.index
+    goal = goal_node.index
 
     open_set = []
-    open_set.append((heuristic(start_node, goal_node), start_node, [start_node]))
-    visited = set()
-    visited.add(start_node)
+    open_set.append((heuristic(start, goal), start))
+    visited = bytearray(graph.size)
+    visited[start] = 1
+    parents = [-1] * graph.size
 
     while open_set:
+        check_cancelled(cancel)
         open_set.sort(key=lambda x: x[0])
-        _, current, path = open_set.pop(0)
-        if current == goal_node:
-            return path
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction) and neighbor not in visited:
-                visited.add(neighbor)
-                new_path = path + [neighbor]
-                h = heuristic(neighbor, goal_node)
-                open_set.append((h, neighbor, new_path))
+        _, current = open_set.pop(0)
+        if current == goal:
+            return graph.toNodes(trace_parents(parents, current))
+        for neighbor in successors[current]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                h = heuristic(neighbor, goal)
+                open_set.append((h, neighbor))
     return None
 
 def greedy_few_pellets(start_node, pellet_nodes, heuristic_func=None):
+    cancel = cancel_event()
     if heuristic_func is None:
         heuristic_func = heuristic_manhattan
-    
-    max_pellets = 7
-    
+
+    max_pellets = FEW_PELLETS_LIMIT
+    graph = get_compiled_graph(start_node)
+    successors = graph.successorLists(PACMAN)
+    bits = get_pellet_bits(graph, pellet_nodes)
+    goal_count = min(max_pellets, len(pellet_nodes))
+    xs = graph.xs
+    ys = graph.ys
+    start = start_node.index
+
+    remaining_pellets = get_remaining_pellets(bits)
+
     def calculate_centroid(pellets):
         if not pellets:
             return None
-        avg_x = sum(p.position.x for p in pellets) / len(pellets)
-        avg_y = sum(p.position.y for p in pellets) / len(pellets)
+        avg_x = sum(xs[p] for p in pellets) / len(pellets)
+        avg_y = sum(ys[p] for p in pellets) / len(pellets)
         return (avg_x, avg_y)
-    
+
     def state_heuristic(node, collected, remaining):
         if not remaining:
             return 0
         centroid = calculate_centroid(remaining)
         if centroid:
-            dist = abs(node.position.x - centroid[0]) + abs(node.position.y - centroid[1])
-            return dist + len(remaining) * 10  
+            dist = abs(xs[node] - centroid[0]) + abs(ys[node] - centroid[1])
+            return dist + len(remaining) * 10
         return len(remaining) * 10
-    
+
+    # Heap (h, thứ tự thêm vào) cho kết quả giống sort ổn định + pop(0)
     open_set = []
-    initial_collected = set([start_node]) if start_node in pellet_nodes else set()
-    initial_remaining = pellet_nodes - initial_collected
-    h = state_heuristic(start_node, initial_collected, initial_remaining)
-    open_set.append((h, start_node, [start_node], initial_collected))
+    order = itertools.count()
+    initial_collected = bits.get(start, 0)
+    initial_remaining = remaining_pellets(initial_collected)
+    h = state_heuristic(start, initial_collected, initial_remaining)
+    heapq.heappush(open_set, (h, next(order), start, PathLink(start), initial_collected))
     visited = {}
-    
+
     while open_set:
-        open_set.sort(key=lambda x: x[0])
-        _, current, path, collected = open_set.pop(0)
-        
-        if len(collected) >= max_pellets or len(collected) == len(pellet_nodes):
-            return path
-        
-        state = (current, frozenset(collected))
+        check_cancelled(cancel)
+        _, _, current, path, collected = heapq.heappop(open_set)
+
+        if collected.bit_count() >= goal_count:
+            return graph.toNodes(path.ids())
+
+        state = state_key(collected, current)
         if state in visited:
             continue
         visited[state] = True
-        
-        for direction in get_all_directions():
-            neighbor = current.neighbors.get(direction)
-            if is_valid_node(neighbor, current, direction):
-                new_collected = set(collected)
-                if neighbor in pellet_nodes:
-                    new_collected.add(neighbor)
-                
-                new_state = (neighbor, frozenset(new_collected))
-                if new_state not in visited:
-                    remaining = pellet_nodes - new_collected
-                    h = state_heuristic(neighbor, new_collected, remaining)
-                    open_set.append((h, neighbor, path + [neighbor], new_collected))
-    
+
+        for neighbor in successors[current]:
+            new_collected = collected | bits.get(neighbor, 0)
+
+            new_state = state_key(new_collected, neighbor)
+            if new_state not in visited:
+                remaining = remaining_pellets(new_collected)
+                h = state_heuristic(neighbor, new_collected, remaining)
+                heapq.heappush(open_set, (h, next(order), neighbor, PathLink(neighbor, path), new_collected))
+
     return None
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 def get_visible_pellet_nodes(pellet_group):
+    """
+    Returns:
+        Tập Node còn pellet - view chỉ đọc liveNodes của PelletGroup (không copy)
+        nếu có, ngược lại quét pelletList
+    """
+    live_nodes = getattr(pellet_group, 'liveNodes', None)
+    if live_nodes is not None:
+        return live_nodes
     return {pellet.node for pellet in pellet_group.pelletList 
             if pellet.node is not None and pellet.visible}
 
@@ -667,6 +789,93 @@ def is_valid_node(neighbor, current_node, direction):
 def get_all_directions():
     return [UP, DOWN, LEFT, RIGHT]
 
+PATH_KEY_BITS = 16  # Số bit cho node id trong state key (graph < 65536 node)
+
+class PathLink(object):
+    """
+    Mắt xích path trong frontier: node id + con trỏ tới mắt xích cha
+    - Mở rộng một bước chỉ tạo một PathLink thay vì copy cả list path
+    - Path đầy đủ chỉ được dựng lại một lần khi tới goal (ids())
+    """
+    __slots__ = ('index', 'parent')
+
+    def __init__(self, index, parent=None):
+        self.index = index
+        self.parent = parent
+
+    def ids(self):
+        """
+        Dựng lại list node id từ start đến mắt xích này
+        """
+        path = []
+        link = self
+        while link is not None:
+            path.append(link.index)
+            link = link.parent
+        path.reverse()
+        return path
+
+def trace_parents(parents, index):
+    """
+    Dựng lại list node id từ mảng parent (-1 tại start)
+    """
+    path = []
+    while index != -1:
+        path.append(index)
+        index = parents[index]
+    path.reverse()
+    return path
+
+def get_pellet_bits(graph, pellet_nodes):
+    """
+    Gán mỗi pellet node một bit trong mask: {node id: 1 << i}
+    Tập pellet đã ăn được lưu bằng một số nguyên thay vì set/frozenset
+    """
+    return {index: 1 << bit for bit, index in enumerate(sorted(graph.ids(pellet_nodes)))}
+
+def get_remaining_pellets(bits):
+    """
+    Hàm trả về list pellet id chưa ăn theo mask (cache theo mask)
+    """
+    pellet_bits = sorted(bits.items())
+    cache = {}
+
+    def remaining_pellets(collected):
+        remaining = cache.get(collected)
+        if remaining is None:
+            remaining = [p for p, bit in pellet_bits if not collected & bit]
+            cache[collected] = remaining
+        return remaining
+
+    return remaining_pellets
+
+def state_key(mask, index):
+    """
+    Key của state (node id, mask) trong bảng visited, đóng gói thành một số nguyên
+    """
+    return (mask << PATH_KEY_BITS) | index
+
+def get_compiled_graph(node):
+    """
+    CompiledGraph chứa node (biên dịch thành phần liên thông nếu node chưa có graph)
+    Successor của PACMAN trên graph giống hệt get_all_directions() + is_valid_node()
+    """
+    graph = getattr(node, 'graph', None)
+    if graph is None:
+        graph = CompiledGraph.fromNode(node)
+    return graph
+
+def get_id_heuristic(graph, heuristic_func):
+    """
+    Đổi heuristic trên Node thành heuristic trên node id
+    - Manhattan chạy thẳng trên mảng tọa độ của graph
+    - Heuristic khác được gọi qua Node tương ứng
+    """
+    if heuristic_func is None or heuristic_func is heuristic_manhattan or heuristic_func is Heuristic.manhattan:
+        return graph.manhattan
+    nodes = graph.nodes
+    return lambda a, b: heuristic_func(nodes[a], nodes[b])
+
 # =============================================================================
 # HEURISTIC FUNCTIONS
 # =============================================================================
@@ -0,0 +1,126 @@
+# =============================================================================
+# BACKGROUND_CACHE.PY - CACHE BACKGROUND MAZE ĐÃ DỰNG SẴN
+# =============================================================================
+# File này chứa BackgroundCache - giữ các background đã dựng (gradient, hiệu ứng
+# theo màu level và toàn bộ tile của maze) để startGame / restart / đổi level
+# không phải vẽ lại hàng trăm tile mỗi lần
+# - Key: tên maze, hàng màu trên spritesheet (level % 5, 5 = flash), kích thước
+#   màn hình
+# - Bộ nhớ: Surface dùng chung trong process (chỉ được blit, không vẽ lên)
+# - Đĩa (tùy chọn): file PNG trong cache/backgrounds, tên file kèm hash nội dung
+#   file maze + spritesheet nên tự bỏ khi asset thay đổi
+
+import hashlib
+import os
+import pygame
+
+BACKGROUND_CACHE_DIR = os.path.join("cache", "backgrounds")
+
+
+class BackgroundCache(object):
+    """
+    BackgroundCache - background theo (maze, hàng màu, kích thước màn hình)
+
+    - get(): lấy từ bộ nhớ, rồi từ đĩa (nếu persist), cuối cùng gọi build()
+      và lưu lại
+    - clear(): xóa cache trong bộ nhớ (và trên đĩa nếu disk=True)
+    """
+    def __init__(self, directory=BACKGROUND_CACHE_DIR, persist=True):
+        self.directory = directory
+        self.persist = persist
+        self.surfaces = {}  # (maze, row, size) -> Surface
+        self._digests = {}  # tuple file nguồn -> hash nội dung
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, maze_name, row, size, build, sources=()):
+        """
+        Args:
+            maze_name: Tên maze (maze1, maze2, ...)
+            row: Hàng màu của tile trên spritesheet
+            size: Kích thước màn hình (width, height)
+            build: Hàm build(row) -> Surface, gọi khi chưa có trong cache
+            sources: Các file asset dựng nên background (để đặt tên file PNG)
+        Returns:
+            Surface background (dùng chung - không vẽ lên)
+        """
+        key = (maze_name, row, tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        path = self._path(key, sources) if self.persist else None
+        if path is not None:
+            surface = self._load(path, size)
+        if surface is None:
+            self.misses += 1
+            surface = build(row)
+            if path is not None:
+                self._save(path, surface)
+        else:
+            self.hits += 1
+        self.surfaces[key] = surface
+        return surface
+
+    def clear(self, disk=False):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        if not disk:
+            return
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".png")]
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _path(self, key, sources):
+        maze_name, row, (width, height) = key
+        return os.path.join(self.directory,
+                            f"{maze_name}_{row}_{width}x{height}_{self._digest(tuple(sources))}.png")
+
+    def _digest(self, sources):
+        """
+        Hash nội dung các file nguồn (tính một lần cho mỗi tập file)
+        """
+        digest = self._digests.get(sources)
+        if digest is None:
+            sha = hashlib.sha1()
+            for source in sources:
+                try:
+                    with open(source, 'rb') as f:
+                        sha.update(f.read())
+                except OSError:
+                    sha.update(source.encode())
+            digest = self._digests[sources] = sha.hexdigest()[:12]
+        return digest
+
+    def _load(self, path, size):
+        try:
+            surface = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError):
+            return None
+        if surface.get_size() != tuple(size):
+            return None
+        try:
+            return surface.convert()
+        except pygame.error:
+            # Chưa có display - dùng surface như đã load
+            return surface
+
+    def _save(self, path, surface):
+        temp = f"{path}.{os.getpid()}.tmp.png"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            pygame.image.save(surface, temp)
+            os.replace(temp, path)
+        except (OSError, pygame.error) as e:
+            print(f"Warning: Failed to write background cache: {e}")
+
+
+background_cache = BackgroundCache()
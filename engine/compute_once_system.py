@@ -1,6 +1,25 @@
 import time
+import threading
+from collections import deque
 from constants import *
 from engine.heuristic import Heuristic
+from engine.plan_cache import PlanCache
+from engine.algorithms_practical import PlanCancelled, set_cancel_event
+
+
+class PelletSnapshot(object):
+    """
+    Bản chụp các pellet còn hiển thị tại thời điểm gửi yêu cầu lập kế hoạch
+    - Thread planner đọc snapshot, không đọc PelletGroup mà game loop đang sửa
+    """
+    def __init__(self, pelletGroup):
+        self.pelletList = list(pelletGroup.pelletList)
+        self.powerpellets = list(pelletGroup.powerpellets)
+        self.pelletNodes = frozenset(pelletGroup.liveNodes)
+        self.liveNodes = self.pelletNodes
+        self.liveCount = len(self.pelletList)
+        self.powerCount = len(self.powerpellets)
+
 
 class ComputeOnceSystem:
     def __init__(self, config=None):
@@ -12,9 +31,30 @@ class ComputeOnceSystem:
         self.pellet_count_when_computed = 0
         self.curent_level = 0 
         self.last_level = -1 
+        self.plan_pellets = frozenset()  # Node có pellet lúc lập master path (waypoint)
+        
+        # Planner chạy nền: master path được tính trong thread riêng, Pac-Man đi
+        # theo plan cũ hoặc _emergency_greedy trong lúc chờ, plan mới được thay
+        # vào ở lần gọi get_direction sau khi thread xong (async_planning=True)
+        self._generation = 0        # Tăng khi reset() - kết quả của thế hệ cũ bị bỏ
+        self._planning_key = None   # (generation, thuật toán, level) đang được tính
+        self._finished_plan = None  # (key, path, pellet nodes) do thread trả về
+        self._planning_cancel = None  # Event hủy của yêu cầu đang tính
+        self._plan_lock = threading.Lock()
+        
+        # Cache master path trên đĩa (tắt bằng config ai_plan_cache = False)
+        self.plan_cache = PlanCache()
+        
+    def get_direction(self, pacman, pelletGroup, pathfinder, pathfinder_name, fruit = None, async_planning=True) :
+        """
+        Args:
+            async_planning: True = tính master path ở thread nền; False = tính
+                đồng bộ (headless / deterministic) - do từng Game quyết định
+        """
+        if async_planning:
+            return self._get_direction_async(pacman, pelletGroup, pathfinder, pathfinder_name)
         
-    def get_direction(self, pacman, pelletGroup, pathfinder, pathfinder_name, fruit = None ) :
-        pellet_count_now = len([p for p in pelletGroup.pelletList if p.visible])
+        pellet_count_now = pelletGroup.liveCount
 
 
         pellet_change = abs(pellet_count_now - self.pellet_count_when_computed)
@@ -33,8 +73,188 @@ class ComputeOnceSystem:
 
         return self._follow_master_path(pacman, pelletGroup)
     
-    def _compute_master_path(self, pacman, pelletGroup, pathfinder, pathfinder_name):
-        start_time = time.time()
+    def _get_direction_async(self, pacman, pelletGroup, pathfinder, pathfinder_name):
+        """
+        get_direction với planner chạy nền
+        - Nhận plan vừa xong (nếu đúng thế hệ/thuật toán/level hiện tại)
+        - Gửi yêu cầu mới khi cần tính lại và chưa có yêu cầu tương ứng
+        - Trong lúc chờ: đi theo plan cũ nếu còn dùng được, ngược lại greedy
+        """
+        key = (self._generation, pathfinder_name, self.curent_level)
+        self._collect_plan(pacman, pelletGroup, key)
+        
+        pellet_count_now = pelletGroup.liveCount
+        plan_valid = (
+            self.is_computed and
+            self.algorithm_name == pathfinder_name and
+            self.curent_level == self.last_level
+        )
+        should_compute = not plan_valid or abs(pellet_count_now - self.pellet_count_when_computed) >= 200
+        if should_compute and self._planning_key != key:
+            self._start_planner(pacman, pelletGroup, pathfinder, key)
+        
+        if not plan_valid:
+            return self._emergency_greedy(pacman, pelletGroup)
+        return self._follow_master_path(pacman, pelletGroup)
+    
+    def _start_planner(self, pacman, pelletGroup, pathfinder, key):
+        cancel = threading.Event()
+        with self._plan_lock:
+            self._cancel_planner()
+            self._planning_key = key
+            self._planning_cancel = cancel
+            self._finished_plan = None
+        snapshot = PelletSnapshot(pelletGroup)
+        thread = threading.Thread(
+            target=self._planner_worker,
+            args=(key, cancel, pathfinder, key[1], pacman.node, snapshot),
+            daemon=True,
+        )
+        thread.start()
+    
+    def _cancel_planner(self):
+        """
+        Hủy yêu cầu đang tính (gọi khi giữ _plan_lock): engine thoát ở lần kiểm
+        tra kế tiếp trong vòng lặp mở rộng, không tranh GIL với game loop nữa
+        """
+        if self._planning_cancel is not None:
+            self._planning_cancel.set()
+            self._planning_cancel = None
+    
+    def _planner_worker(self, key, cancel, pathfinder, pathfinder_name, start_node, snapshot):
+        """
+        Chạy trong thread planner: chỉ đọc graph (không đổi trong level) và snapshot
+        """
+        set_cancel_event(cancel)
+        path = self._plan(pathfinder, pathfinder_name, start_node, snapshot)
+        with self._plan_lock:
+            # Yêu cầu đã bị thay thế (đổi thuật toán/level, reset) - bỏ kết quả
+            if key == self._planning_key:
+                self._finished_plan = (key, path, snapshot.pelletNodes)
+    
+    def _collect_plan(self, pacman, pelletGroup, key):
+        """
+        Thay plan mới vào (atomically, trên game thread) nếu thread planner đã xong
+        """
+        with self._plan_lock:
+            finished = self._finished_plan
+            if finished is None:
+                return
+            self._finished_plan = None
+            self._planning_key = None
+            self._planning_cancel = None
+        plan_key, path, pellet_nodes = finished
+        if plan_key != key or not path or len(path) <= 1:
+            return  # Thế hệ/level cũ hoặc thất bại - lần gọi sau sẽ tính lại
+        self._adopt_plan(path, plan_key[1], pellet_nodes)
+        if pacman.node is not path[0]:
+            # Pac-Man đã đi tiếp trong lúc planner chạy: nối vị trí hiện tại vào plan
+            # và bỏ các pellet đã ăn trong lúc chờ
+            self._repair_plan(pacman.node, pelletGroup)
+    
+    def _repair_plan(self, node, pelletGroup):
+        """
+        Sửa cục bộ phần còn lại của master path thay vì tính lại toàn bộ
+        - Waypoint: node có pellet (lúc lập plan) theo thứ tự plan đi qua lần đầu
+        - Bỏ waypoint có pellet đã bị ăn (ăn sớm, lệch thứ tự)
+        - Chỉ tìm lại (BFS) đoạn đầu từ node hiện tại tới waypoint còn hiệu lực
+          đầu tiên và các đoạn từng đi qua waypoint đã bỏ; đoạn khác giữ nguyên
+        Args:
+            node: Node hiện tại của Pac-Man
+            pelletGroup: PelletGroup hiện tại
+        Returns:
+            True nếu sửa được plan
+        """
+        from engine.algorithms_practical import get_compiled_graph, get_visible_pellet_nodes
+        
+        graph = get_compiled_graph(node)
+        if not graph.owns(node):
+            return False
+        alive = get_visible_pellet_nodes(pelletGroup)
+        remaining = self.master_path[self.current_index:]
+        
+        # Index (trong remaining) của các waypoint còn pellet; damaged[k] = đoạn
+        # dẫn tới waypoint k có đi qua waypoint đã bị ăn
+        kept = []
+        damaged = []
+        seen = set()
+        segment_damaged = True  # Đoạn đầu: Pac-Man đã rời plan
+        for index, plan_node in enumerate(remaining):
+            if plan_node not in self.plan_pellets or plan_node in seen:
+                continue
+            seen.add(plan_node)
+            if plan_node in alive:
+                kept.append(index)
+                damaged.append(segment_damaged)
+                segment_damaged = False
+            else:
+                segment_damaged = True
+        if not kept:
+            return False
+        
+        successors = graph.successorLists(PACMAN)
+        repaired = []
+        previous_node = node
+        previous_index = None
+        for index, segment_damaged in zip(kept, damaged):
+            target = remaining[index]
+            if segment_damaged:
+                segment = self._shortest_segment(graph, successors, previous_node, target)
+                if segment is None:
+                    return False
+            else:
+                segment = remaining[previous_index + 1:index + 1]
+            repaired.extend(segment)
+            previous_node = target
+            previous_index = index
+        
+        self.master_path = repaired
+        self.current_index = 0
+        return True
+    
+    def _shortest_segment(self, graph, successors, start, goal):
+        """
+        BFS trên node id từ start tới goal (không qua portal, giống các engine offline)
+        Returns:
+            List Node từ sau start tới goal, hoặc None nếu không tới được
+        """
+        if not graph.owns(goal):
+            return None
+        source = start.index
+        target = goal.index
+        if source == target:
+            return []
+        parents = {source: -1}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for neighbor in successors[current]:
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = current
+                if neighbor == target:
+                    path = []
+                    while neighbor != source:
+                        path.append(neighbor)
+                        neighbor = parents[neighbor]
+                    path.reverse()
+                    return graph.toNodes(path)
+                queue.append(neighbor)
+        return None
+    
+    def _plan(self, pathfinder, pathfinder_name, start_node, snapshot):
+        """
+        Gọi thuật toán offline tìm master path (đọc/ghi plan cache nếu bật)
+        Args:
+            snapshot: PelletSnapshot các pellet còn lại
+        Returns:
+            List Node hoặc None
+        """
+        cache, cache_key, graph = self._plan_cache_entry(pathfinder_name, start_node, snapshot)
+        if cache_key is not None:
+            path = cache.get(cache_key, graph)
+            if path is not None and path[0] is start_node:
+                return path
         
         try:
             # Get heuristic function from config
@@ -43,24 +263,53 @@ class ComputeOnceSystem:
                 heuristic_func = Heuristic.get_heuristic_function(self.config)
             
             # Call pathfinder with heuristic function
-            path = pathfinder(pacman.node, pelletGroup, heuristic_func)
-            
-            if path and len(path) > 1:
-                if path[0] == pacman.node:
-                    self.master_path = path[1:]  # Bỏ qua vị trí hiện tại
-                else:
-                    self.master_path = path
-                    
-                self.current_index = 0
-                self.is_computed = True
-                self.algorithm_name = pathfinder_name
-                self.pellet_count_when_computed = len([p for p in pelletGroup.pelletList if p.visible])
-                self.last_level = self.curent_level
-
-                return True
-            else:
-                return False
+            path = pathfinder(start_node, snapshot, heuristic_func)
+        except PlanCancelled:
+            return None  # Yêu cầu đã bị thay thế - không ghi cache
         except Exception as e:
+            return None
+        
+        if cache_key is not None and path and len(path) > 1 and path[0] is start_node:
+            cache.put(cache_key, path)
+        return path
+    
+    def _plan_cache_entry(self, pathfinder_name, start_node, snapshot):
+        """
+        Returns:
+            (cache, key, graph); key None khi cache tắt hoặc không tạo được key
+        """
+        cache = self.plan_cache
+        enabled = True
+        heuristic_name = "NONE"
+        if self.config is not None and hasattr(self.config, 'get'):
+            enabled = self.config.get('ai_plan_cache', True)
+            heuristic_name = str(self.config.get('algorithm_heuristic', 'NONE')).upper()
+        graph = getattr(start_node, 'graph', None)
+        if cache is None or not enabled or graph is None:
+            return cache, None, graph
+        key = cache.key(graph, pathfinder_name, heuristic_name, start_node, snapshot.pelletNodes)
+        return cache, key, graph
+    
+    def _adopt_plan(self, path, pathfinder_name, pellet_nodes):
+        self.master_path = path[1:]  # Bỏ qua vị trí hiện tại
+        self.current_index = 0
+        self.is_computed = True
+        self.algorithm_name = pathfinder_name
+        self.plan_pellets = pellet_nodes
+        self.pellet_count_when_computed = len(pellet_nodes)
+        self.last_level = self.curent_level
+    
+    def _compute_master_path(self, pacman, pelletGroup, pathfinder, pathfinder_name):
+        start_time = time.time()
+        
+        snapshot = PelletSnapshot(pelletGroup)
+        path = self._plan(pathfinder, pathfinder_name, pacman.node, snapshot)
+        if path and len(path) > 1:
+            if path[0] != pacman.node:
+                path = [pacman.node] + path
+            self._adopt_plan(path, pathfinder_name, snapshot.pelletNodes)
+            return True
+        else:
             return False
     
     def _follow_master_path(self, pacman, pelletGroup):
@@ -89,16 +338,12 @@ class ComputeOnceSystem:
                 # Đã hoàn thành master path
                 return self._emergency_greedy(pacman, pelletGroup)
         
-        # Xử lý khi path bị chặn
+        # Xử lý khi path bị chặn / Pac-Man đã rời path: sửa cục bộ phần còn lại
         if direction == STOP:
-            # Thử skip ahead một vài bước
-            for skip in range(1, min(5, len(self.master_path) - self.current_index)):
-                if self.current_index + skip < len(self.master_path):
-                    next_target = self.master_path[self.current_index + skip]
-                    skip_direction = self._get_direction_to_node(pacman.node, next_target)
-                    if skip_direction != STOP:
-                        self.current_index += skip
-                        return skip_direction
+            if self._repair_plan(pacman.node, pelletGroup) and self.master_path:
+                direction = self._get_direction_to_node(pacman.node, self.master_path[0])
+                if direction != STOP:
+                    return direction
             
             return self._emergency_greedy(pacman, pelletGroup)
         
@@ -137,7 +382,7 @@ class ComputeOnceSystem:
             return STOP
         
         # Find nearest pellet
-        pellet_nodes = [p.node for p in pelletGroup.pelletList if p.node and p.visible]
+        pellet_nodes = pelletGroup.liveNodes
         if not pellet_nodes:
             return STOP
         
@@ -200,6 +445,13 @@ class ComputeOnceSystem:
         self.curent_level = 0
         self.algorithm_name = ""
         self.pellet_count_when_computed = 0
+        self.plan_pellets = frozenset()
+        # Plan đang tính ở thread nền (nếu có) thuộc thế hệ cũ: hủy ngay
+        self._generation += 1
+        with self._plan_lock:
+            self._cancel_planner()
+            self._planning_key = None
+            self._finished_plan = None
         # System reset - sẽ tính lại path ở lần gọi tiếp theo
     
     def _calculate_distance(self, node1, node2):
@@ -0,0 +1,295 @@
+# =============================================================================
+# DIRTY_RENDERER.PY - RENDER GAME THEO VÙNG THAY ĐỔI (DIRTY RECTANGLES)
+# =============================================================================
+# File này chứa:
+# - DirtyRenderer: vẽ game lên một surface giữ qua các frame, mỗi frame chỉ
+#   khôi phục nền và vẽ lại các vùng thay đổi:
+#   + Vùng của Pacman, ghost, fruit, orb hiệu ứng (và text nếu có) ở frame
+#     trước và frame này
+#   + Ô của pellet vừa bị ăn (so bitset liveBits của PelletGroup) và ô power
+#     pellet khi đang nhấp nháy
+#   + Các scanline đổi màu so với frame trước
+#   Nền là layer dựng sẵn cho mỗi background: background + viền hiệu ứng tĩnh
+#   (dưới orb), và thêm overlay theo độ sáng hiện tại (vùng còn lại). Orb được
+#   phủ overlay và scanline giống thứ tự của Game.render.
+#   Vẽ lại toàn bộ khi: frame đầu, đổi surface, đổi background (flash khi qua
+#   level), đổi độ sáng overlay, đổi PelletGroup (level mới / restart) hoặc khi
+#   có hybrid_ai_display.
+#   render() trả về list Rect đã thay đổi - dùng cho pygame.display.update(rects)
+# - scale_dirty_rects(): scale chỉ các vùng thay đổi sang surface đã scale
+#   (game view trong GameLayout)
+
+import time
+import pygame
+from constants import *
+from engine.effects import effects_cache, SCANLINE_SPACING
+
+DIRTY_SCALE_BLOCK = 32  # Kích thước block (pixel gốc) khi scale từng vùng
+MAX_CACHED_LAYERS = 32  # Số layer nền giữ lại (background thường + flash, mỗi độ sáng overlay)
+
+
+class DirtyRenderer(object):
+    """
+    DirtyRenderer - render game theo dirty rect lên surface giữ lại giữa các frame
+
+    - render(): vẽ frame mới, trả về list Rect đã thay đổi
+    - invalidate(): buộc frame sau vẽ lại toàn bộ
+    - full_redraws / partial_redraws: đếm số frame mỗi loại (để đo)
+    """
+    def __init__(self):
+        self._layers = {}  # (id(background), chất lượng, độ sáng overlay) -> (background, layer nền)
+        self.full_redraws = 0
+        self.partial_redraws = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self._surface = None
+        self._base = None
+        self._pellets = None
+        self._pellet_bits = 0
+        self._scanlines = ()
+        self._rects = []
+
+    def render(self, game, surface, text=False):
+        """
+        Args:
+            game: Game cần vẽ
+            surface: Surface kích thước SCREENSIZE, giữ nguyên giữa các frame
+            text: Có vẽ TextGroup của game không
+        Returns:
+            List Rect (tọa độ của surface) đã được vẽ lại trong frame này
+        """
+        now = time.time()
+        enhanced = effects_cache.enhanced_state(now)
+        under = self._layer(game, None)
+        base = self._layer(game, enhanced[0]) if enhanced is not None else under
+        pellets = getattr(game, 'pellets', None)
+        bits = getattr(pellets, 'liveBits', 0)
+        if (surface is not self._surface or base is not self._base or pellets is not self._pellets
+                or bits & ~self._pellet_bits or getattr(game, 'hybrid_ai_display', None)):
+            return self._render_full(game, surface, under, base, enhanced, pellets, text, now)
+
+        bounds = surface.get_rect()
+        restore = self._rects + self._tile_rects(pellets, self._pellet_bits & ~bits)
+        if pellets is not None and pellets.flashPowerPellets:
+            restore += [powerpellet.rect for powerpellet in pellets.powerpellets]
+        for rect in restore:
+            surface.blit(base, rect, rect)
+        orbs = self._render_orbs(game, surface, under, enhanced, bounds, now)
+        drawn = list(orbs)
+
+        # Scanline nằm trên nền / orb: vẽ lại trong các vùng vừa khôi phục, và cả
+        # hàng khi màu scanline đổi
+        if enhanced is not None:
+            scanlines = enhanced[1]
+            for rect in restore + orbs:
+                effects_cache.draw_scanlines(surface, scanlines, rect)
+            changed = [row for row, color in enumerate(scanlines)
+                       if row >= len(self._scanlines) or self._scanlines[row] != color]
+            for row in changed:
+                rect = pygame.Rect(0, row * SCANLINE_SPACING, bounds.width, 1).clip(bounds)
+                if rect.height:
+                    surface.fill(scanlines[row], rect)
+                    drawn.append(rect)
+            self._scanlines = scanlines
+
+        # Pellet nằm dưới sprite và orb: vẽ lại pellet trong mọi vùng vừa bị
+        # ghi đè (pixel của pellet giống hệt nên vẽ trùng không sao)
+        if pellets is not None:
+            for rect in restore + drawn:
+                pellets.renderArea(surface, rect)
+
+        sprites = self._clip(self._render_sprites(game, surface, text), bounds)
+        self._rects = orbs + sprites
+        self._pellet_bits = bits
+        self.partial_redraws += 1
+        return restore + drawn + sprites
+
+    def _render_full(self, game, surface, under, base, enhanced, pellets, text, now):
+        surface.blit(under, (0, 0))
+        bounds = surface.get_rect()
+        rects = self._clip(game._render_effect_orbs(surface, now), bounds)
+        if enhanced is not None:
+            surface.blit(effects_cache.overlay(enhanced[0]), (0, 0))
+            effects_cache.draw_scanlines(surface, enhanced[1])
+        if pellets is not None:
+            pellets.render(surface)
+        rects += self._clip(self._render_sprites(game, surface, text), bounds)
+        if getattr(game, 'hybrid_ai_display', None):
+            game.hybrid_ai_display.draw(surface)
+
+        self._surface = surface
+        self._base = base
+        self._pellets = pellets
+        self._pellet_bits = getattr(pellets, 'liveBits', 0)
+        self._scanlines = enhanced[1] if enhanced is not None else ()
+        self._rects = rects
+        self.full_redraws += 1
+        return [bounds]
+
+    def _render_orbs(self, game, surface, under, enhanced, bounds, now):
+        """
+        Vẽ orb như Game.render: nền chưa có overlay -> orb -> overlay
+        - Lần vẽ đầu chỉ để lấy vùng của orb, vùng đó được khôi phục từ layer
+          dưới overlay rồi vẽ lại
+        Returns:
+            List Rect của các orb
+        """
+        rects = self._clip(game._render_effect_orbs(surface, now), bounds)
+        if enhanced is None or not rects:
+            return rects
+        for rect in rects:
+            surface.blit(under, rect, rect)
+        game._render_effect_orbs(surface, now)
+        overlay = effects_cache.overlay(enhanced[0])
+        for rect in rects:
+            surface.blit(overlay, rect, rect)
+        return rects
+
+    def _layer(self, game, pulse_alpha):
+        """
+        Layer nền của background hiện tại: background + viền hiệu ứng, thêm
+        overlay nếu có pulse_alpha (dựng một lần cho mỗi background, chất lượng
+        hiệu ứng và độ sáng overlay)
+        """
+        background = getattr(game, 'background', None)
+        key = (id(background), effects_cache.quality, pulse_alpha)
+        entry = self._layers.get(key)
+        if entry is not None and entry[0] is background:
+            return entry[1]
+        if pulse_alpha is not None:
+            layer = self._layer(game, None).copy()
+            layer.blit(effects_cache.overlay(pulse_alpha), (0, 0))
+        elif background is not None:
+            layer = background.copy()
+            game._render_effect_border(layer)
+        else:
+            layer = pygame.Surface(SCREENSIZE)
+            layer.fill(BLACK)
+            game._render_effect_border(layer)
+        if len(self._layers) >= MAX_CACHED_LAYERS:
+            self._layers.clear()
+        self._layers[key] = (background, layer)
+        return layer
+
+    def _render_sprites(self, game, surface, text):
+        """
+        Vẽ Pacman, ghost, fruit (và text) theo thứ tự của Game.render
+        Returns:
+            List Rect của các sprite đã vẽ
+        """
+        entities = []
+        if getattr(game, 'pacman', None) is not None:
+            entities.append(game.pacman)
+        if getattr(game, 'ghosts', None) is not None and game.ghost_mode:
+            entities.extend(game.ghosts)
+        if getattr(game, 'fruit', None) is not None:
+            entities.append(game.fruit)
+
+        rects = []
+        for entity in entities:
+            rect = _entity_rect(entity)
+            if rect is not None:
+                entity.render(surface)
+                rects.append(rect)
+        if text and getattr(game, 'textgroup', None) is not None:
+            for label in game.textgroup.alltext.values():
+                if label.visible:
+                    x, y = label.position.asTuple()
+                    label.render(surface)
+                    rects.append(pygame.Rect(int(x) - 1, int(y) - 1,
+                                             label.label.get_width() + 2, label.label.get_height() + 2))
+        return rects
+
+    @staticmethod
+    def _tile_rects(pellets, bits):
+        """
+        Rect của các ô có bit bật trong bitset liveBits (pellet vừa bị ăn)
+        """
+        rects = []
+        while bits:
+            low = bits & -bits
+            row, column = divmod(low.bit_length() - 1, pellets.columns)
+            rects.append(pygame.Rect(column * TILEWIDTH, row * TILEHEIGHT, TILEWIDTH, TILEHEIGHT))
+            bits ^= low
+        return rects
+
+    @staticmethod
+    def _clip(rects, bounds):
+        clipped = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect.width and rect.height:
+                clipped.append(rect)
+        return clipped
+
+
+def _entity_rect(entity):
+    """
+    Rect mà Entity.render sẽ vẽ (None nếu entity đang ẩn), nới 1 pixel vì vị
+    trí là số thực
+    """
+    if not entity.visible:
+        return None
+    if entity.image is not None:
+        x = entity.position.x - TILEWIDTH / 2
+        y = entity.position.y - TILEHEIGHT / 2
+        width, height = entity.image.get_size()
+        return pygame.Rect(int(x) - 1, int(y) - 1, width + 2, height + 2)
+    radius = entity.radius
+    x, y = entity.position.asInt()
+    return pygame.Rect(x - radius - 1, y - radius - 1, radius * 2 + 3, radius * 2 + 3)
+
+
+def scale_dirty_rects(source, target, rects, block=DIRTY_SCALE_BLOCK):
+    """
+    Cập nhật target (source đã smoothscale) chỉ ở các vùng thay đổi
+    - Vùng thay đổi được làm tròn ra lưới block, các block liền nhau trên một
+      hàng được scale chung; vị trí đích tính bằng số nguyên nên các block ghép
+      khít, không hở
+    - Khi có Rect phủ toàn bộ source thì smoothscale cả surface
+    Args:
+        source: Surface gốc (kích thước SCREENSIZE)
+        target: Surface đích (kích thước đã scale)
+        rects: List Rect thay đổi trên source
+    """
+    width, height = source.get_size()
+    target_width, target_height = target.get_size()
+    bounds = source.get_rect()
+    if any(rect.contains(bounds) for rect in rects):
+        pygame.transform.smoothscale(source, (target_width, target_height), target)
+        return
+
+    cells = set()
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        for row in range(rect.top // block, (rect.bottom - 1) // block + 1):
+            for column in range(rect.left // block, (rect.right - 1) // block + 1):
+                cells.add((row, column))
+
+    for row, first, last in _runs(cells):
+        left, right = first * block, min(width, (last + 1) * block)
+        top, bottom = row * block, min(height, (row + 1) * block)
+        x0, x1 = left * target_width // width, right * target_width // width
+        y0, y1 = top * target_height // height, bottom * target_height // height
+        if x1 <= x0 or y1 <= y0:
+            continue
+        area = source.subsurface(pygame.Rect(left, top, right - left, bottom - top))
+        target.blit(pygame.transform.smoothscale(area, (x1 - x0, y1 - y0)), (x0, y0))
+
+
+def _runs(cells):
+    """
+    Gom các block (row, column) thành đoạn liền nhau trên từng hàng
+    Returns:
+        List (row, cột đầu, cột cuối)
+    """
+    runs = []
+    for row, column in sorted(cells):
+        if runs and runs[-1][0] == row and runs[-1][2] == column - 1:
+            runs[-1][2] = column
+        else:
+            runs.append([row, column, column])
+    return runs
@@ -0,0 +1,268 @@
+# =============================================================================
+# DISTANCE_FIELDS.PY - DISTANCE FIELD MULTI-SOURCE BFS TRÊN MAZE
+# =============================================================================
+# File này chứa:
+# - DistanceField: khoảng cách maze từ mọi node tới source gần nhất (multi-source
+#   BFS), cập nhật tăng dần khi thêm / bớt source thay vì tính lại từ đầu
+# - DistanceFields: bộ field cho HybridAISystem - pellet còn lại, power pellet,
+#   ghost nguy hiểm gần nhất
+# Sau khi đồng bộ với game, các truy vấn "pellet gần nhất", "power pellet gần
+# nhất", "ghost có ở gần không" chỉ còn là lookup theo node id.
+
+import heapq
+from constants import *
+
+INF = float('inf')
+FULL_RESET_CHANGES = 8  # Nhiều thay đổi hơn thì tính lại cả field
+
+
+class DistanceField(object):
+    """
+    DistanceField - dist[v] = số bước Pacman đi từ node v tới source gần nhất
+
+    - nearest[v]: node id của source đó (bằng khoảng cách thì lấy id nhỏ hơn,
+      nên field không phụ thuộc thứ tự cập nhật)
+    - Source có bội số (nhiều ghost cùng một node): chỉ xóa khi bội số về 0
+    - add(): lan sóng từ source mới, chỉ sửa các node được rút ngắn
+    - remove(): chỉ tính lại vùng có nearest là source bị xóa, gieo từ biên
+    """
+    def __init__(self, graph, successors, predecessors):
+        """
+        Args:
+            graph: CompiledGraph của maze
+            successors: List (theo node id) neighbor id mà Pacman đi tới được
+            predecessors: Adjacency ngược của successors
+        """
+        self.graph = graph
+        self.successors = successors
+        self.predecessors = predecessors
+        self.dist = [INF] * graph.size
+        self.nearest = [-1] * graph.size
+        self.counts = {}  # source id -> bội số
+
+    @property
+    def sources(self):
+        return self.counts.keys()
+
+    def reset(self, sources=()):
+        """
+        Tính lại toàn bộ field từ tập source (id, có thể lặp)
+        """
+        size = self.graph.size
+        self.dist = [INF] * size
+        self.nearest = [-1] * size
+        self.counts = {}
+        heap = []
+        for source in sources:
+            self.counts[source] = self.counts.get(source, 0) + 1
+            if self.dist[source]:
+                self.dist[source] = 0
+                self.nearest[source] = source
+                heap.append((0, source, source))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def add(self, source):
+        count = self.counts.get(source, 0)
+        self.counts[source] = count + 1
+        if count:
+            return
+        self.dist[source] = 0
+        self.nearest[source] = source
+        self._propagate([(0, source, source)])
+
+    def remove(self, source):
+        count = self.counts.get(source, 0)
+        if count > 1:
+            self.counts[source] = count - 1
+            return
+        if not count:
+            return
+        del self.counts[source]
+
+        dist = self.dist
+        nearest = self.nearest
+        affected = self._owned(source)
+        for index in affected:
+            dist[index] = INF
+            nearest[index] = -1
+
+        # Gieo lại từ các node bên ngoài vùng bị ảnh hưởng (label của chúng vẫn đúng)
+        heap = []
+        for index in affected:
+            best = (INF, -1)
+            for neighbor in self.successors[index]:
+                if nearest[neighbor] >= 0:
+                    best = min(best, (dist[neighbor] + 1, nearest[neighbor]))
+            if best[1] >= 0:
+                dist[index], nearest[index] = best
+                heap.append((best[0], best[1], index))
+        heapq.heapify(heap)
+        self._propagate(heap)
+
+    def _owned(self, source):
+        """
+        Các node có nearest là source - chỉ duyệt vùng của source
+        - Node kế tiếp trên đường ngắn nhất từ một node của vùng tới source cũng
+          thuộc vùng (tie-break theo id nhỏ hơn), nên vùng liên thông theo cạnh
+          ngược từ source
+        Returns:
+            List node id
+        """
+        nearest = self.nearest
+        predecessors = self.predecessors
+        owned = [source]
+        seen = {source}
+        for index in owned:
+            for previous in predecessors[index]:
+                if nearest[previous] == source and previous not in seen:
+                    seen.add(previous)
+                    owned.append(previous)
+        return owned
+
+    def sync(self, sources):
+        """
+        Đưa field về đúng tập source mới bằng add/remove phần chênh lệch
+        Args:
+            sources: Dict source id -> bội số
+        """
+        counts = self.counts
+        changes = sum(abs(count - counts.get(source, 0)) for source, count in sources.items())
+        changes += sum(count for source, count in counts.items() if source not in sources)
+        if not changes:
+            return
+        if not counts or changes > FULL_RESET_CHANGES:
+            # Thay đổi lớn (đổi level, hồi pellet): tính lại từ đầu rẻ hơn
+            self.reset(source for source, count in sources.items() for _ in range(count))
+            return
+        for source, count in list(counts.items()):
+            for _ in range(count - sources.get(source, 0)):
+                self.remove(source)
+        for source, count in sources.items():
+            for _ in range(count - counts.get(source, 0)):
+                self.add(source)
+
+    def _propagate(self, heap):
+        """
+        Lan theo cạnh ngược (node -> node có thể đi tới nó) theo thứ tự (dist, source)
+        """
+        dist = self.dist
+        nearest = self.nearest
+        predecessors = self.predecessors
+        while heap:
+            d, source, index = heapq.heappop(heap)
+            if d != dist[index] or source != nearest[index]:
+                continue
+            d += 1
+            for previous in predecessors[index]:
+                if d < dist[previous] or (d == dist[previous] and source < nearest[previous]):
+                    dist[previous] = d
+                    nearest[previous] = source
+                    heapq.heappush(heap, (d, source, previous))
+
+
+class DistanceFields(object):
+    """
+    DistanceFields - các distance field của một maze, giữ qua nhiều quyết định
+
+    - pellets / power: field tới pellet / power pellet còn lại, đồng bộ với
+      bitset của PelletGroup (chỉ xử lý các pellet vừa bị ăn)
+    - ghosts: field tới ghost nguy hiểm gần nhất, đồng bộ khi ghost đổi node
+      hoặc đổi mode
+    - Tự dựng lại khi access của Pacman thay đổi (denyAccess/allowAccess)
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.revision = graph.accessRevision(PACMAN)
+        self.successors = graph.successorLists(PACMAN, portals=True)
+        self.predecessors = [[] for _ in range(graph.size)]
+        for index, neighbors in enumerate(self.successors):
+            for neighbor in neighbors:
+                self.predecessors[neighbor].append(index)
+        self.pellets = self._field()
+        self.power = self._field()
+        self.ghosts = self._field()
+        self._pellet_bits = None
+        self._power_bits = None
+
+    def matches(self, graph):
+        """
+        True nếu field còn dùng được cho graph này
+        """
+        return graph is self.graph and self.revision == graph.accessRevision(PACMAN)
+
+    def update_pellets(self, pellet_group):
+        """
+        Đồng bộ field pellet / power pellet với pellet còn lại trong game
+        """
+        if hasattr(pellet_group, 'nodeBits'):
+            pellet_bits, power_bits, _ = pellet_group.nodeBits(self.graph)
+        else:
+            pellet_bits = power_bits = 0
+            for pellet in (getattr(pellet_group, 'pelletList', None) or ()):
+                node = getattr(pellet, 'node', None)
+                if node is None or not getattr(pellet, 'visible', True) or not self.graph.owns(node):
+                    continue
+                pellet_bits |= 1 << node.index
+                if getattr(pellet, 'name', None) == POWERPELLET:
+                    power_bits |= 1 << node.index
+        if pellet_bits != self._pellet_bits:
+            self.pellets.sync(dict.fromkeys(_bit_indices(pellet_bits), 1))
+            self._pellet_bits = pellet_bits
+        if power_bits != self._power_bits:
+            self.power.sync(dict.fromkeys(_bit_indices(power_bits), 1))
+            self._power_bits = power_bits
+
+    def update_ghosts(self, ghostgroup, dangerous_modes):
+        """
+        Đồng bộ vị trí ghost và field tới ghost nguy hiểm
+        Args:
+            ghostgroup: GhostGroup hiện tại
+            dangerous_modes: Các mode ghost tính là nguy hiểm (CHASE, SCATTER)
+        """
+        dangerous = {}
+        for ghost in (getattr(ghostgroup, 'ghosts', None) or ()):
+            node = getattr(ghost, 'node', None)
+            if node is None or not self.graph.owns(node):
+                continue
+            if getattr(getattr(ghost, 'mode', None), 'current', None) in dangerous_modes:
+                dangerous[node.index] = dangerous.get(node.index, 0) + 1
+        self.ghosts.sync(dangerous)
+
+    def nearest_pellet(self, node):
+        """
+        Returns:
+            Node có pellet gần node nhất (theo maze distance) hoặc None
+        """
+        return self._nearest(self.pellets, node)
+
+    def nearest_power_pellet(self, node):
+        return self._nearest(self.power, node)
+
+    def ghost_distance(self, node):
+        """
+        Returns:
+            Maze distance từ node tới ghost nguy hiểm gần nhất (inf nếu không có)
+        """
+        return self.ghosts.dist[node.index]
+
+    def _field(self):
+        return DistanceField(self.graph, self.successors, self.predecessors)
+
+    def _nearest(self, field, node):
+        index = field.nearest[node.index]
+        if index < 0:
+            return None
+        return self.graph.nodes[index]
+
+
+def _bit_indices(bits):
+    """
+    Node id của các bit đang bật trong bitset
+    """
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
@@ -0,0 +1,92 @@
+# =============================================================================
+# DISTANCE_ORACLE.PY - BẢNG KHOẢNG CÁCH MAZE TÍNH TRƯỚC (ALL-PAIRS)
+# =============================================================================
+# File này chứa DistanceOracle - tính khoảng cách BFS giữa mọi cặp node một lần
+# cho mỗi maze, lưu trong ma trận NumPy int16 đánh index theo node id.
+# Sau khi build, mọi truy vấn khoảng cách maze chỉ còn là một lookup O(1).
+
+from collections import deque
+import numpy as np
+from constants import *
+
+UNREACHABLE = -1  # Giá trị trong ma trận khi không có đường đi
+
+
+class DistanceOracle(object):
+    """
+    DistanceOracle - bảng khoảng cách ngắn nhất giữa mọi cặp node
+
+    - Dùng id số nguyên (node.index) của CompiledGraph
+    - Chạy BFS từ mỗi node (tôn trọng access của entity, portal luôn đi được)
+    - Lưu kết quả vào ma trận int16: matrix[src, dst]
+    - Tự build lại khi access của entity thay đổi (denyAccess/allowAccess)
+    """
+    def __init__(self, nodes, entity=PACMAN):
+        """
+        Args:
+            nodes: NodeGroup của maze hiện tại
+            entity: Entity name dùng để kiểm tra access (mặc định PACMAN)
+        """
+        self.nodes = nodes
+        self.entity = entity
+        self.graph = None
+        self.nodeList = []
+        self.matrix = None
+        self.revision = None
+        self.build()
+
+    def build(self):
+        """
+        Build (hoặc build lại) ma trận khoảng cách trên CompiledGraph của NodeGroup
+        """
+        graph = self.nodes.compile()
+        self.graph = graph
+        self.nodeList = graph.nodes
+        for node in self.nodeList:
+            node.oracle = self
+
+        size = graph.size
+        adjacency = graph.successorLists(self.entity, portals=True)
+        matrix = np.full((size, size), UNREACHABLE, dtype=np.int16)
+
+        for source in range(size):
+            dist = [UNREACHABLE] * size
+            dist[source] = 0
+            queue = deque([source])
+            while queue:
+                current = queue.popleft()
+                next_dist = dist[current] + 1
+                for neighbor in adjacency[current]:
+                    if dist[neighbor] == UNREACHABLE:
+                        dist[neighbor] = next_dist
+                        queue.append(neighbor)
+            matrix[source] = dist
+
+        self.matrix = matrix
+        self.revision = graph.accessRevision(self.entity)
+
+    def is_stale(self):
+        """
+        True nếu access của entity trong graph này đã thay đổi kể từ lần build cuối
+        (thay đổi ở graph / Game khác không ảnh hưởng)
+        """
+        return self.revision != self.graph.accessRevision(self.entity)
+
+    def owns(self, node):
+        """
+        Kiểm tra node có thuộc bảng này không
+        """
+        return getattr(node, 'oracle', None) is self
+
+    def distance(self, node1, node2):
+        """
+        Khoảng cách maze từ node1 đến node2
+        Returns:
+            Số bước (int) hoặc float('inf') nếu không có đường đi
+        """
+        if self.is_stale():
+            self.build()
+        dist = self.matrix.item(node1.index, node2.index)
+        if dist == UNREACHABLE:
+            return float('inf')
+        return dist
@@ -0,0 +1,207 @@
+# =============================================================================
+# EFFECTS.PY - HIỆU ỨNG NỀN CỦA GAME (VIỀN, ENERGY ORB, OVERLAY + SCANLINE)
+# =============================================================================
+# File này chứa EffectsCache - vẽ các hiệu ứng động của game view theo chất
+# lượng (config effects_quality):
+# - full:   tính lại sin/cos và vẽ từng hình mỗi frame (như trước)
+# - cached: animation được lấy mẫu theo thời gian thành các frame lặp vòng,
+#           mỗi frame chỉ còn vài lần blit:
+#           + orb: bảng (x, y, sprite) theo chỉ số frame (EFFECT_FPS), sprite
+#             orb dựng sẵn theo (độ sáng, kích thước)
+#           + overlay + scanline: lấy mẫu theo EFFECT_FPS (cùng tốc độ chuyển
+#             động như full); overlay là một Surface SRCALPHA dùng lại, chỉ fill
+#             lại khi đổi độ sáng; scanline vẽ bằng fill từng hàng
+# - off:    không vẽ hiệu ứng nào (kể cả viền)
+
+import math
+from fractions import Fraction
+import pygame
+from constants import *
+
+EFFECTS_QUALITIES = ('full', 'cached', 'off')
+EFFECT_FPS = 30             # Số mẫu / giây của animation orb ở chế độ cached
+ORB_COUNT = 8
+SCANLINE_SPACING = 4        # Khoảng cách (pixel) giữa các scanline
+EFFECT_COLORKEY = (255, 0, 255)
+
+
+def _orb_loop_frames():
+    """
+    Số frame của một vòng orb: bội chung của chu kỳ theo x (W/20 giây) và
+    theo y (H/15 giây), nên vị trí orb nối liền khi quay vòng
+    """
+    x_period = Fraction(SCREENWIDTH, 20)
+    y_period = Fraction(SCREENHEIGHT, 15)
+    loop = Fraction(math.lcm(x_period.numerator, y_period.numerator),
+                    math.gcd(x_period.denominator, y_period.denominator))
+    return max(1, int(loop * EFFECT_FPS))
+
+
+class EffectsCache(object):
+    """
+    EffectsCache - hiệu ứng động của game view, dùng chung cho mọi Game
+
+    - draw_border(): viền quanh khu vực game (tĩnh)
+    - draw_orbs(): các energy orb, trả về list Rect đã vẽ (cho DirtyRenderer)
+    - draw_enhanced(): overlay nhấp nháy toàn màn hình + scanline
+    - enhanced_state() / overlay() / draw_scanlines(): từng phần của
+      draw_enhanced cho DirtyRenderer
+    """
+    def __init__(self, quality='cached'):
+        self.quality = quality
+        self.orb_loop = _orb_loop_frames()
+        self._orb_frames = {}       # chỉ số frame -> tuple (x, y, (sprite, bán kính))
+        self._orb_sprites = {}      # (alpha, size) -> (Surface, bán kính ngoài)
+        self._overlay = None
+        self._overlay_alpha = None
+
+    def draw_border(self, surface):
+        if self.quality == 'off':
+            return
+        for i in range(3):
+            border_rect = pygame.Rect(i, i, SCREENWIDTH - i*2, SCREENHEIGHT - i*2)
+            alpha = int(30 - i * 10)
+            color = (alpha, alpha, alpha + 40)
+            pygame.draw.rect(surface, color, border_rect, 1)
+
+    def draw_orbs(self, surface, current_time):
+        """
+        Returns:
+            List Rect vùng đã vẽ (mỗi orb một Rect)
+        """
+        if self.quality == 'off':
+            return []
+        if self.quality == 'full':
+            return [self._draw_orb(surface, x, y, alpha, size)
+                    for x, y, alpha, size in _orb_states(current_time)]
+
+        index = int(current_time * EFFECT_FPS) % self.orb_loop
+        frame = self._orb_frames.get(index)
+        if frame is None:
+            frame = self._orb_frames[index] = tuple(
+                (x, y, self._orb_sprite(alpha, size))
+                for x, y, alpha, size in _orb_states(index / EFFECT_FPS))
+        return [surface.blit(sprite, (x - radius, y - radius))
+                for x, y, (sprite, radius) in frame]
+
+    def draw_enhanced(self, surface, current_time):
+        if self.quality == 'off':
+            return
+        if self.quality == 'full':
+            pulse_alpha = int(10 + 5 * math.sin(current_time * 2))
+            overlay = pygame.Surface((SCREENWIDTH, SCREENHEIGHT), pygame.SRCALPHA)
+            overlay.fill((pulse_alpha, pulse_alpha, pulse_alpha + 20, pulse_alpha))
+            surface.blit(overlay, (0, 0))
+            _draw_scanlines(surface, current_time)
+            return
+
+        pulse_alpha, scanlines = self.enhanced_state(current_time)
+        surface.blit(self.overlay(pulse_alpha), (0, 0))
+        self.draw_scanlines(surface, scanlines)
+
+    def enhanced_state(self, current_time):
+        """
+        Trạng thái overlay + scanline tại current_time (cached: lấy mẫu theo EFFECT_FPS)
+        Returns:
+            (độ sáng overlay, tuple màu scanline theo hàng), hoặc None khi quality off
+        """
+        if self.quality == 'off':
+            return None
+        if self.quality != 'full':
+            current_time = int(current_time * EFFECT_FPS) / EFFECT_FPS
+        return int(10 + 5 * math.sin(current_time * 2)), _scanline_colors(current_time)
+
+    def overlay(self, pulse_alpha):
+        """
+        Surface overlay SRCALPHA dùng lại, chỉ fill lại khi đổi độ sáng
+        """
+        if self._overlay is None:
+            self._overlay = pygame.Surface((SCREENWIDTH, SCREENHEIGHT), pygame.SRCALPHA)
+        if pulse_alpha != self._overlay_alpha:
+            self._overlay.fill((pulse_alpha, pulse_alpha, pulse_alpha + 20, pulse_alpha))
+            self._overlay_alpha = pulse_alpha
+        return self._overlay
+
+    @staticmethod
+    def draw_scanlines(surface, scanlines, rect=None):
+        """
+        Vẽ scanline (một hàng pixel, màu đặc) - chỉ trong rect nếu có
+        Args:
+            scanlines: Tuple màu theo hàng (từ enhanced_state)
+        """
+        if rect is None:
+            rows = range(len(scanlines))
+            left, width = 0, SCREENWIDTH
+        else:
+            rows = range(max(0, -(-rect.top // SCANLINE_SPACING)),
+                         min(len(scanlines), -(-rect.bottom // SCANLINE_SPACING)))
+            left, width = rect.left, rect.width
+        for row in rows:
+            surface.fill(scanlines[row], (left, row * SCANLINE_SPACING, width, 1))
+
+    def clear(self):
+        self._orb_frames.clear()
+        self._orb_sprites.clear()
+        self._overlay = None
+        self._overlay_alpha = None
+
+    def _orb_sprite(self, alpha, size):
+        """
+        Sprite một orb (lõi + 2 vòng glow) trên nền colorkey, dựng một lần
+        """
+        key = (alpha, size)
+        entry = self._orb_sprites.get(key)
+        if entry is None:
+            radius = size + 5
+            sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1))
+            sprite.fill(EFFECT_COLORKEY)
+            self._draw_orb(sprite, radius, radius, alpha, size)
+            sprite.set_colorkey(EFFECT_COLORKEY)
+            entry = self._orb_sprites[key] = (sprite, radius)
+        return entry
+
+    @staticmethod
+    def _draw_orb(surface, x, y, alpha, size):
+        color = (alpha, max(0, min(255, alpha + 20)), max(0, min(255, alpha + 40)))
+        rect = pygame.draw.circle(surface, color, (x, y), size)
+
+        # Glow
+        for j in range(2, 0, -1):
+            glow_alpha = max(0, min(255, int(alpha * 0.5 - j * 10)))
+            glow_color = (glow_alpha, max(0, min(255, glow_alpha + 10)), max(0, min(255, glow_alpha + 20)))
+            rect = rect.union(pygame.draw.circle(surface, glow_color, (x, y), size + j * 2, 1))
+        return rect
+
+
+def _orb_states(current_time):
+    """
+    Vị trí, độ sáng và kích thước của từng orb tại current_time
+    Returns:
+        List (x, y, alpha, size)
+    """
+    states = []
+    for i in range(ORB_COUNT):
+        x = (current_time * 20 + i * 100) % SCREENWIDTH
+        y = (current_time * 15 + i * 80) % SCREENHEIGHT
+        alpha = max(0, min(255, int(30 + 20 * math.sin(current_time * 2 + i))))
+        size = 3 + int(2 * math.sin(current_time * 4 + i))
+        states.append((int(x), int(y), alpha, size))
+    return states
+
+
+def _scanline_colors(current_time):
+    colors = []
+    for i in range(0, SCREENHEIGHT, SCANLINE_SPACING):
+        scanline_alpha = int(5 + 3 * math.sin(current_time * 3 + i * 0.1))
+        colors.append((scanline_alpha, scanline_alpha, scanline_alpha + 10))
+    return tuple(colors)
+
+
+def _draw_scanlines(surface, current_time):
+    for i in range(0, SCREENHEIGHT, SCANLINE_SPACING):
+        scanline_alpha = int(5 + 3 * math.sin(current_time * 3 + i * 0.1))
+        color = (scanline_alpha, scanline_alpha, scanline_alpha + 10, scanline_alpha)
+        pygame.draw.line(surface, color, (0, i), (SCREENWIDTH, i))
+
+
+effects_cache = EffectsCache()
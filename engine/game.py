@@ -10,7 +10,7 @@ from constants import *
 from objects.nodes import NodeGroup
 from objects.pauser import Pause
 from objects.maze import MazeData
-from ui.sprites import LifeSprites ,MazeSprites
+from ui.sprites import LifeSprites ,MazeSprites, SPRITESHEET_PATH
 from objects.player import Pacman
 from objects.fruit import Fruit
 from objects.ghosts import GhostGroup
@@ -18,8 +18,16 @@ from objects.pellets import PelletGroup
 from ui.text import TextGroup
 import time
 import datetime
+import random
 from engine.compute_once_system import compute_once
 from engine.stats_logger import StatsLogger
+from engine.profiler import profiler
+from engine.background_cache import background_cache
+from engine.dirty_renderer import DirtyRenderer
+from engine.effects import effects_cache
+from engine.distance_oracle import DistanceOracle
+
+HEADLESS_DT = 1.0 / 60  # dt cố định mặc định của mô phỏng headless (một frame 60 FPS)
 
 class Game(object):
     """
@@ -33,9 +41,36 @@ class Game(object):
     - Quản lý timer, score, lives, levels
     - Tích hợp analytics system để theo dõi performance
     - Hỗ trợ các thuật toán AI (BFS, DFS, A*, UCS, IDS, Greedy)
+    - Headless mode: dt cố định, không display/render, chạy bằng step(n)
     """
-    def __init__(self, algorithm: str = 'BFS', config=None):
-        pygame.init()
+    def __init__(self, algorithm: str = 'BFS', config=None, headless=False, fixed_dt=None, seed=None):
+        """
+        Args:
+            algorithm: Thuật toán AI
+            config: Config truyền cho Pacman
+            headless: True = mô phỏng không display, không dựng background,
+                      AI dùng ngân sách cố định để kết quả deterministic
+            fixed_dt: dt cố định mỗi frame (giây); mặc định HEADLESS_DT khi headless,
+                      None = dt theo thời gian thực (clock.tick)
+            seed: Seed của ván; None = ngẫu nhiên mỗi lần chạy
+        """
+        if headless:
+            pygame.font.init()  # TextGroup cần font, không cần display
+        else:
+            pygame.init()
+        
+        # Mô phỏng headless / fixed timestep
+        self.headless = headless
+        self.fixed_dt = fixed_dt if fixed_dt is not None else (HEADLESS_DT if headless else None)
+        self.sim_time = 0.0             # Thời gian mô phỏng (giây) khi dùng fixed_dt
+        self.result = None              # "WIN" / "GAME_OVER" khi game kết thúc
+        
+        # RNG riêng cho từng hệ thống, cùng suy ra từ seed của ván: số lần AI
+        # dùng random không làm thay đổi chuyển động của ghost và ngược lại
+        self.seed = seed
+        self.ghost_rng = self._make_rng("ghosts")     # Hướng đi ngẫu nhiên của ghost (FREIGHT)
+        self.pellet_rng = self._make_rng("pellets")   # Chọn pellet ở chế độ few pellets
+        self.ai_rng = self._make_rng("ai")            # GA / MCTS của HybridAISystem
         
         # Lưu thuật toán AI được chọn
         self.algorithm = algorithm
@@ -82,6 +117,7 @@ class Game(object):
         self.background = None
         self.background_norm = None      # Background bình thường
         self.background_flash = None    # Background khi flash (level complete)
+        self.dirty_renderer = DirtyRenderer()  # Render theo vùng thay đổi (render_dirty)
         self.clock = pygame.time.Clock()
         
         # Objects trong game
@@ -111,8 +147,8 @@ class Game(object):
         self.mazedata = MazeData()      # Dữ liệu maze hiện tại
         
         # Thời gian
-        self.starttime = time.time()    # Thời gian bắt đầu level
-        self.endtime = time.time()      # Thời gian kết thúc level
+        self.starttime = self._now()    # Thời gian bắt đầu level
+        self.endtime = self._now()      # Thời gian kết thúc level
         self.running = True             # Game có đang chạy không
         self.ai_mode = True             # Chế độ AI (True) hay Player (False)
         self.ghost_mode = True          # Chế độ Ghost (True) hay không có Ghost (False)
@@ -127,34 +163,45 @@ class Game(object):
         - Tạo background bình thường và flash
         - Thêm gradient và hiệu ứng theo level
         - Áp dụng maze sprites lên background
+        - Background đã dựng được lấy lại từ background_cache (theo maze, hàng màu,
+          kích thước màn hình), chỉ dựng mới khi chưa có
         """
-        # Tạo surface cho background bình thường
-        try:
-            self.background_norm = pygame.surface.Surface(SCREENSIZE).convert()
-        except pygame.error:
-            # Headless mode - không cần convert()
-            self.background_norm = pygame.surface.Surface(SCREENSIZE)
-        self.background_norm.fill(BLACK)
+        if hasattr(self.config, 'get'):
+            background_cache.persist = self.config.get('background_cache_disk', True)
+        maze_name = self.mazedata.obj.name
+        sources = (
+            "assets/maze/"+maze_name+".txt",
+            "assets/maze/"+maze_name+"_rotation.txt",
+            SPRITESHEET_PATH,
+        )
+        # Background bình thường (màu theo level) và flash (khi level complete)
+        self.background_norm = background_cache.get(maze_name, self.level % 5, SCREENSIZE,
+                                                     self._build_background, sources)
+        self.background_flash = background_cache.get(maze_name, 5, SCREENSIZE,
+                                                     self._build_background, sources)
         
-        # Tạo surface cho background flash (khi level complete)
+        # Reset flash state
+        self.flashBG = False
+        self.background = self.background_norm
+    
+    def _build_background(self, row):
+        """
+        Dựng một background: gradient + hiệu ứng theo màu rồi vẽ tile của maze
+        Args:
+            row: Hàng màu trên spritesheet (level % 5, 5 = flash)
+        """
         try:
-            self.background_flash = pygame.surface.Surface(SCREENSIZE).convert()
+            background = pygame.surface.Surface(SCREENSIZE).convert()
         except pygame.error:
             # Headless mode - không cần convert()
-            self.background_flash = pygame.surface.Surface(SCREENSIZE)
-        self.background_flash.fill(BLACK)
+            background = pygame.surface.Surface(SCREENSIZE)
+        background.fill(BLACK)
         
         # Tạo background nâng cao với gradient và hiệu ứng
-        self._create_enhanced_background(self.background_norm, self.level % 5)
-        self._create_enhanced_background(self.background_flash, 5)
+        self._create_enhanced_background(background, row)
         
         # Áp dụng maze sprites lên background
-        self.background_norm = self.mazesprites.constructBackground(self.background_norm, self.level%5)
-        self.background_flash = self.mazesprites.constructBackground(self.background_flash, 5)
-        
-        # Reset flash state
-        self.flashBG = False
-        self.background = self.background_norm
+        return self.mazesprites.constructBackground(background, row)
     
     def _create_enhanced_background(self, surface, level):
         """Create enhanced background with gradient and visual effects"""
@@ -227,59 +274,27 @@ class Game(object):
     
     def _render_dynamic_effects(self, surface):
         """Render dynamic effects on top of the game"""
-        import math
-        import time
-        
-        current_time = time.time()
-        
-        # Add pulsing border effect around the entire game area
-        pulse_intensity = int(20 + 15 * math.sin(current_time * 3))
-        border_color = (pulse_intensity, pulse_intensity, pulse_intensity + 30)
-        
-        # Draw animated border
-        for i in range(3):
-            border_rect = pygame.Rect(i, i, SCREENWIDTH - i*2, SCREENHEIGHT - i*2)
-            alpha = int(30 - i * 10)
-            color = (alpha, alpha, alpha + 40)
-            pygame.draw.rect(surface, color, border_rect, 1)
-        
-        # Corner effects removed for cleaner interface
-        
-        # Add floating energy orbs
-        for i in range(8):
-            x = (current_time * 20 + i * 100) % SCREENWIDTH
-            y = (current_time * 15 + i * 80) % SCREENHEIGHT
-            alpha = max(0, min(255, int(30 + 20 * math.sin(current_time * 2 + i))))
-            color = (alpha, max(0, min(255, alpha + 20)), max(0, min(255, alpha + 40)))
-            size = 3 + int(2 * math.sin(current_time * 4 + i))
-            pygame.draw.circle(surface, color, (int(x), int(y)), size)
-            
-            # Add glow effect
-            for j in range(2, 0, -1):
-                glow_alpha = max(0, min(255, int(alpha * 0.5 - j * 10)))
-                glow_color = (glow_alpha, max(0, min(255, glow_alpha + 10)), max(0, min(255, glow_alpha + 20)))
-                pygame.draw.circle(surface, glow_color, (int(x), int(y)), size + j * 2, 1)
+        self._render_effect_border(surface)
+        self._render_effect_orbs(surface, time.time())
+    
+    def _render_effect_border(self, surface):
+        """
+        Viền quanh khu vực game (phần tĩnh của dynamic effects - DirtyRenderer
+        vẽ sẵn vào layer nền)
+        """
+        effects_cache.draw_border(surface)
+    
+    def _render_effect_orbs(self, surface, current_time):
+        """
+        Vẽ các energy orb di chuyển theo thời gian
+        Returns:
+            List Rect vùng đã vẽ (mỗi orb một Rect)
+        """
+        return effects_cache.draw_orbs(surface, current_time)
     
     def _render_enhanced_effects(self, surface):
         """Render enhanced visual effects for the main game screen"""
-        import math
-        import time
-        
-        current_time = time.time()
-        
-        # Add screen-wide pulsing effect
-        pulse_alpha = int(10 + 5 * math.sin(current_time * 2))
-        overlay = pygame.Surface((SCREENWIDTH, SCREENHEIGHT), pygame.SRCALPHA)
-        overlay.fill((pulse_alpha, pulse_alpha, pulse_alpha + 20, pulse_alpha))
-        surface.blit(overlay, (0, 0))
-        
-        # Add animated scanlines
-        for i in range(0, SCREENHEIGHT, 4):
-            scanline_alpha = int(5 + 3 * math.sin(current_time * 3 + i * 0.1))
-            color = (scanline_alpha, scanline_alpha, scanline_alpha + 10, scanline_alpha)
-            pygame.draw.line(surface, color, (0, i), (SCREENWIDTH, i))
-        
-        # Corner energy effects removed for cleaner interface
+        effects_cache.draw_enhanced(surface, time.time())
     
     def initialize_game(self):
         self.startGame()
@@ -287,14 +302,15 @@ class Game(object):
     def startGame(self):
         self.mazedata.loadMaze(self.level)
         
-        # Tạo maze sprites
-        self.mazesprites = MazeSprites(
-            "assets/maze/"+self.mazedata.obj.name+".txt", 
-            "assets/maze/"+self.mazedata.obj.name+"_rotation.txt"
-        )
-        
-        # Thiết lập background
-        self.setBackground()
+        if not self.headless:
+            # Tạo maze sprites
+            self.mazesprites = MazeSprites(
+                "assets/maze/"+self.mazedata.obj.name+".txt", 
+                "assets/maze/"+self.mazedata.obj.name+"_rotation.txt"
+            )
+            
+            # Thiết lập background
+            self.setBackground()
         
         # Tạo node group và thiết lập connections
         self.nodes = NodeGroup("assets/maze/"+self.mazedata.obj.name+".txt")
@@ -303,6 +319,12 @@ class Game(object):
         
         self.pacman = Pacman(self.nodes.getNodeFromTiles(*self.mazedata.obj.pacmanStart), self.config)
         self.pacman.game_instance = self
+        # Headless: tìm kiếm theo độ sâu/số vòng lặp cố định thay vì thời gian thực
+        self.pacman.hybrid_ai.fixed_budget = self.headless
+        self.pacman.hybrid_ai.rng = self.ai_rng
+        # Headless: master path offline tính đồng bộ để kết quả deterministic
+        self.pacman.async_planning = not self.headless
+        self.pacman.record_decisions = self.headless
         
         # Bắt đầu analytics nếu chưa bắt đầu
         if not self.analytics_started:
@@ -317,7 +339,9 @@ class Game(object):
         # Tạo pellets dựa trên maze của level hiện tại
         few_pellets_mode = getattr(self, 'few_pellets_mode', False)
         few_pellets_count = getattr(self, 'few_pellets_count', 20)
-        self.pellets = PelletGroup(maze_file, self.nodes, few_pellets_mode, few_pellets_count)
+        self.pellets = PelletGroup(maze_file, self.nodes, few_pellets_mode, few_pellets_count, self.pellet_rng)
+        if hasattr(self.config, 'get'):
+            self.pellets.setFlashing(self.config.get('power_pellet_flash', False))
         
         # Lưu tổng số pellets ban đầu để tính toán thống kê
         self.initial_pellets_total = len(self.pellets.pelletList) if hasattr(self.pellets, 'pelletList') else 0
@@ -325,6 +349,7 @@ class Game(object):
         
         # Tạo ghosts với vị trí bắt đầu từ maze data
         self.ghosts = GhostGroup(self.nodes.getStartTempNode(), self.pacman)
+        self.ghosts.setRng(self.ghost_rng)
         
         # Thiết lập vị trí bắt đầu cho từng ghost dựa trên maze data
         if hasattr(self.mazedata.obj, 'ghostStart'):
@@ -367,9 +392,15 @@ class Game(object):
             self.nodes.denyAccessList(15, 14, UP, self.ghosts)
             self.nodes.denyAccessList(12, 26, UP, self.ghosts)
             self.nodes.denyAccessList(15, 26, UP, self.ghosts)
+        
+        # Bảng khoảng cách maze all-pairs - build một lần cho mỗi maze
+        # (sau khi access rules đã được áp dụng)
+        self.distance_oracle = DistanceOracle(self.nodes)
     
     def update(self) : 
-        dt = self.clock.tick(60) / 1000.0
+        dt = self._frame_dt()
+        if self.headless:
+            self._resume_headless()
         self.textgroup.update(dt)
         self.pellets.update(dt)
         if not self.pause.paused:
@@ -397,7 +428,10 @@ class Game(object):
                     self.pacman.update(dt)
             self.pacman.score = self.score
         else:
-            self.pacman.update(dt)
+            if self.headless:
+                self.pacman.update_ai(dt)  # Headless không có keyboard, chỉ chạy animation chết
+            else:
+                self.pacman.update(dt)
             self.pacman.score = self.score
 
         if self.flashBG:
@@ -417,6 +451,75 @@ class Game(object):
         if hasattr(self, 'hybrid_ai_display') and self.hybrid_ai_display:
             self.hybrid_ai_display.update(dt)
         
+    def step(self, n=1):
+        """
+        Chạy n frame mô phỏng
+        Args:
+            n: Số frame
+        Returns:
+            True nếu game vẫn đang chạy
+        """
+        for _ in range(n):
+            if not self.running:
+                break
+            self.update()
+        return self.running
+    
+    def _frame_dt(self):
+        """
+        dt của frame hiện tại: cố định khi có fixed_dt, ngược lại theo clock (60 FPS)
+        """
+        if self.fixed_dt is not None:
+            self.sim_time += self.fixed_dt
+            return self.fixed_dt
+        return self.clock.tick(60) / 1000.0
+    
+    def _make_rng(self, stream):
+        """
+        random.Random của một hệ thống, seed = (seed của ván, tên hệ thống)
+        """
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{stream}")
+    
+    def _now(self):
+        """
+        Thời điểm hiện tại (giây): thời gian mô phỏng khi dùng fixed_dt, ngược lại time.time()
+        """
+        if self.fixed_dt is not None:
+            return self.sim_time
+        return time.time()
+    
+    def _resume_headless(self):
+        """
+        Headless không có người nhấn SPACE: tự bỏ pause READY (pause không hẹn giờ)
+        """
+        if self.pause.paused and self.pause.pauseTime is None:
+            self.pause.paused = False
+            self.textgroup.hideText()
+            self.showEntities()
+    
+    def _log_result(self, result):
+        """
+        Ghi thống kê khi kết thúc level/game vào CSV (headless không ghi),
+        kèm percentile của profiler (nếu bật) rồi bắt đầu đo lại cho level sau
+        """
+        if self.headless:
+            return
+        try:
+            stats = self.get_stats()
+            stats["result"] = result
+            StatsLogger.log(stats)
+        except Exception as e:
+            print(f"Warning: Failed to log game stats: {e}")
+        if profiler.enabled:
+            timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+            rows = profiler.summary()
+            for row in rows:
+                row.update(timestamp=timestamp, level=self.level, result=result)
+            StatsLogger.log_profile(rows)
+            profiler.reset()
+    
     def checkEvents(self) : 
         for event in pygame.event.get():
             if event.type == QUIT : 
@@ -451,31 +554,26 @@ class Game(object):
                         self.hybrid_ai_display.toggle_display()
                              
     def checkPelletEvents(self) :
-        pellet = self.pacman.eatPellets(self.pellets.pelletList)
+        # Chỉ xét pellet trong các ô quanh Pac-Man (spatial index của PelletGroup)
+        pellet = self.pacman.eatPellets(self.pellets.pelletsNear(self.pacman.position, self.pacman.collideRadius))
         if pellet:
             self.pellets.numEaten += 1 
             self.updateScore(pellet.points)
             if self.ghost_mode:
                     self.ghosts.inky.startNode.allowAccess(RIGHT,self.ghosts.inky)
                     self.ghosts.clyde.startNode.allowAccess(LEFT,self.ghosts.clyde)
-            self.pellets.pelletList.remove(pellet)
+            self.pellets.removePellet(pellet)
             if pellet.name == POWERPELLET and self.ghost_mode:
                 self.ghosts.startFreight()
             if self.pellets.isEmpty():
                 # Level hoàn thành - GHI LOG THỐNG KÊ
-                try:
-                    stats = self.get_stats()
-                    # Set result dựa trên mode hiện tại
-                    stats["result"] = "LEVEL_COMPLETE"
-                    StatsLogger.log(stats)
-                except Exception as e:
-                    print(f"Warning: Failed to log game stats: {e}")
+                self._log_result("LEVEL_COMPLETE")
                 
                 # Hiển thị thông báo level complete
                 self.textgroup.showText(LEVELCOMPLETETXT)
                 self.flashBG = True
                 self.hideEntities()
-                self.endtime = time.time()
+                self.endtime = self._now()
                 self.pause.setPause(pauseTime=3,func=self.nextLevel)
     
     def checkWinCondition(self):
@@ -485,18 +583,16 @@ class Game(object):
         - Hiển thị thông báo YOU WIN!
         """
         if self.pellets.isEmpty() and self.level >= 2:  # Hoàn thành 3 level (0, 1, 2)
-            try:
-                stats = self.get_stats()
-                stats["result"] = "WIN"
-                StatsLogger.log(stats)
-            except Exception as e:
-                print(f"Warning: Failed to log win stats: {e}")
+            self._log_result("WIN")
+            self.result = "WIN"
             
             self.textgroup.showText(WINTXT)
             self.flashBG = True
             self.hideEntities()
-            self.endtime = time.time()
+            self.endtime = self._now()
             self.pause.setPause(pauseTime=5, func=self.restartGame)  # Restart sau khi thắng
+            if self.headless:
+                self.running = False  # Mô phỏng kết thúc, không restart
     
     def checkGhostEvents(self) :
         # Chỉ kiểm tra ghost events khi ghost mode được bật
@@ -521,16 +617,14 @@ class Game(object):
                             self.ghosts.hide()
                             if self.lives <= 0 : 
                                 # Kết thúc game hoàn toàn - GHI LOG THỐNG KÊ
-                                try:
-                                    stats = self.get_stats()
-                                    stats["result"] = "GAME_OVER"
-                                    StatsLogger.log(stats)
-                                except Exception as e:
-                                    print(f"Warning: Failed to log game stats: {e}")
+                                self._log_result("GAME_OVER")
+                                self.result = "GAME_OVER"
                                 
                                 total_pellets = len(self.pellets.pelletList) if hasattr(self, 'pellets') else 0                                
                                 self.textgroup.showText(GAMEOVERTXT) 
                                 self.pause.setPause(pauseTime=3,func=self.restartGame) 
+                                if self.headless:
+                                    self.running = False  # Mô phỏng kết thúc, không restart
                             else : 
                                 self.pause.setPause(pauseTime=3,func=self.resetLevel) 
     
@@ -634,81 +728,6 @@ class Game(object):
         
         # Cập nhật điểm số trong analytics    
     
-    def render(self, surface=None):
-        """Render the game scene onto the given surface."""
-        target_surface = surface if surface is not None else self.screen
-
-        if target_surface is None:
-            raise ValueError("No render surface provided and game screen is not initialized.")
-
-        if hasattr(self, 'background') and self.background:
-            target_surface.blit(self.background, (0, 0))
-
-        # Add visual effects layers
-        self._render_dynamic_effects(target_surface)
-        self._render_enhanced_effects(target_surface)
-        if hasattr(self, 'nodes'):
-            self.nodes.render(target_surface)
-        if hasattr(self, 'pellets'):
-            self.pellets.render(target_surface)
-        if hasattr(self, 'fruit') and self.fruit:
-            self.fruit.render(target_surface)
-        if hasattr(self, 'pacman'):
-            self.pacman.render(target_surface)
-        if hasattr(self, 'ghosts') and self.ghost_mode:
-            self.ghosts.render(target_surface)
-
-        if hasattr(self, 'hybrid_ai_display') and self.hybrid_ai_display:
-            self.hybrid_ai_display.draw(target_surface)
-
-        if hasattr(self, 'textgroup'):
-            self.textgroup.render(target_surface)
-
-        # Enhanced life sprites rendering
-        if hasattr(self, 'lifesprites'):
-            for i, image in enumerate(self.lifesprites.images):
-                x = image.get_width() * i
-                y = SCREENHEIGHT - image.get_height()
-
-                glow_surface = pygame.Surface((image.get_width() + 4,
-                                               image.get_height() + 4), pygame.SRCALPHA)
-                glow_color = (255, 255, 0, 50)  # Yellow glow
-                pygame.draw.circle(
-                    glow_surface,
-                    glow_color,
-                    (glow_surface.get_width() // 2, glow_surface.get_height() // 2),
-                    image.get_width() // 2 + 2,
-                )
-                target_surface.blit(glow_surface, (x - 2, y - 2))
-                target_surface.blit(image, (x, y))
-
-        if hasattr(self, 'fruitCaptured'):
-            import math
-            import time
-
-            current_time = time.time()
-            for i, fruit_image in enumerate(self.fruitCaptured):
-                x = SCREENWIDTH - fruit_image.get_width() * (i + 1)
-                y = SCREENHEIGHT - fruit_image.get_height()
-
-                pulse_scale = 1.0 + 0.1 * math.sin(current_time * 4 + i)
-
-                scaled_fruit = pygame.transform.scale(
-                    fruit_image,
-                    (
-                        int(fruit_image.get_width() * pulse_scale),
-                        int(fruit_image.get_height() * pulse_scale),
-                    ),
-                )
-
-                offset_x = (scaled_fruit.get_width() - fruit_image.get_width()) // 2
-                offset_y = (scaled_fruit.get_height() - fruit_image.get_height()) // 2
-
-                target_surface.blit(scaled_fruit, (x - offset_x, y - offset_y))
-
-        if target_surface is self.screen:
-            pygame.display.update()
-    
     def handle_event(self, event ,auto = False):
         """Handle pygame events for the game"""
         if event.type == pygame.KEYDOWN: 
@@ -725,6 +744,7 @@ class Game(object):
         
         # Add dynamic background effects
         self._render_dynamic_effects(surface)
+        self._render_enhanced_effects(surface)
         
         if hasattr(self, 'nodes'):
             self.nodes.render(surface)
@@ -743,6 +763,25 @@ class Game(object):
         
         # Removed textgroup render - score and level now shown in control panel
     
+    def render_dirty(self, surface=None, text=False):
+        """
+        Render chỉ các vùng thay đổi so với frame trước (DirtyRenderer)
+        - surface phải được giữ lại giữa các frame (nội dung cũ được dùng lại)
+        - Không có surface: vẽ lên self.screen và pygame.display.update(rects)
+        Args:
+            surface: Surface kích thước SCREENSIZE
+            text: Có vẽ TextGroup không
+        Returns:
+            List Rect đã vẽ lại
+        """
+        target_surface = surface if surface is not None else self.screen
+        if target_surface is None:
+            raise ValueError("No render surface provided and game screen is not initialized.")
+        rects = self.dirty_renderer.render(self, target_surface, text)
+        if target_surface is self.screen:
+            pygame.display.update(rects)
+        return rects
+    
     def quit_game(self):
         """Quit the game"""
         self.running = False
@@ -817,6 +856,10 @@ class Game(object):
                 # Alpha-Beta sử dụng hybrid AI system
                 self.pacman.set_algorithm('Alpha-Beta', None)
                 self.pacman.enable_hybrid_ai()
+            elif algorithm == 'MCTS':
+                # MCTS sử dụng hybrid AI system
+                self.pacman.set_algorithm('MCTS', None)
+                self.pacman.enable_hybrid_ai()
             elif algorithm == 'GBFS':
                 # GBFS sử dụng hybrid AI system
                 self.pacman.set_algorithm('GBFS', None)
@@ -833,6 +876,11 @@ class Game(object):
                 # Greedy sử dụng offline mode với compute_once_system
                 self.pacman.set_algorithm('Greedy', self._get_algorithm_with_heuristic(greedy))
                 self.pacman.disable_hybrid_ai()
+            elif algorithm == 'Held-Karp':
+                # Held-Karp (tour solver) sử dụng offline mode với compute_once_system
+                from engine.tour_solver import held_karp
+                self.pacman.set_algorithm('Held-Karp', self._get_algorithm_with_heuristic(held_karp))
+                self.pacman.disable_hybrid_ai()
 
             self.pacman.path = []
             self.pacman.locked_target_node = None
@@ -907,14 +955,14 @@ class Game(object):
     def start_timer(self):
         """Bắt đầu đo thời gian game"""
         if not self.is_timer_running:
-            self.start_time = time.time() - self.game_time
+            self.start_time = self._now() - self.game_time
             self.is_timer_running = True
             self.timer_started_by_user = True            
     
     def stop_timer(self):
         """Dừng đo thời gian game và lưu thời gian hiện tại"""
-        if self.is_timer_running and self.start_time:
-            self.game_time = time.time() - self.start_time
+        if self.is_timer_running and self.start_time is not None:
+            self.game_time = self._now() - self.start_time
             self.is_timer_running = False
     
     def reset_timer(self):
@@ -926,8 +974,8 @@ class Game(object):
     
     def get_game_time(self):
         """Lấy thời gian game hiện tại (tính bằng giây)"""
-        if self.is_timer_running and self.start_time:
-            return time.time() - self.start_time
+        if self.is_timer_running and self.start_time is not None:
+            return self._now() - self.start_time
         return self.game_time
     
     def get_formatted_time(self):
@@ -1015,8 +1063,8 @@ class Game(object):
         power_pellets_remaining = 0
         
         if hasattr(self, "pellets") and self.pellets and hasattr(self.pellets, "pelletList"):
-            pellets_remaining = len([p for p in self.pellets.pelletList if getattr(p, "visible", False)])
-            power_pellets_remaining = len([p for p in self.pellets.powerpellets if getattr(p, "visible", False)])
+            pellets_remaining = self.pellets.liveCount
+            power_pellets_remaining = self.pellets.powerCount
         
         pellets_eaten = max(0, pellets_total - pellets_remaining)
         power_pellets_eaten = max(0, power_pellets_total - power_pellets_remaining)
@@ -39,8 +39,14 @@ class Heuristic:
     @staticmethod
     def mazedistance(node1, node2):
         """
-        Maze distance heuristic - tính khoảng cách thực tế trong maze bằng BFS
+        Maze distance heuristic - tính khoảng cách thực tế trong maze
+        - Lookup O(1) trong DistanceOracle nếu node đã được index
+        - Fallback BFS khi node không thuộc oracle nào
         """
+        oracle = getattr(node1, 'oracle', None)
+        if oracle is not None and oracle.owns(node2):
+            return oracle.distance(node1, node2)
+
         from collections import deque
         visited = set()
         queue = deque([(node1, 0)])
@@ -1,7 +1,7 @@
-import copy
 import heapq
 import math
 import random
+import time
 from collections import deque
 from typing import Dict, Optional, Tuple
 from constants import (
@@ -41,6 +41,16 @@ FREIGHT_CHASE_RADIUS = 3
 GRID_SIZE = max(TILEWIDTH, 1)
 DANGEROUS_GHOST_MODES = {CHASE, SCATTER}
 DEFAULT_ALGORITHM = "A*"
+DEFAULT_SEARCH_BUDGET_MS = 15.0   # Thời gian tối đa cho một quyết định Minimax/Alpha-Beta
+MAX_SEARCH_DEPTH = 8              # Độ sâu tối đa của iterative deepening
+MCTS_MAX_ITERATIONS = 3000        # Số vòng lặp MCTS tối đa cho một quyết định
+FIXED_SEARCH_DEPTH = 4            # Độ sâu Minimax/Alpha-Beta khi ngân sách cố định (headless)
+FIXED_MCTS_ITERATIONS = 200       # Số vòng lặp MCTS khi ngân sách cố định (headless)
+MCTS_EXPLORATION = 1.41           # Hằng số C của UCT
+MCTS_ROLLOUT_DEPTH = 10           # Số lượt (Pacman + ghost) của một rollout
+MCTS_REWARD_SCALE = 200.0         # Chênh lệch evaluate ứng với reward ~0.88
+MCTS_GHOST_CHASE = 0.8            # Xác suất ghost đuổi theo Pacman trong rollout
+MCTS_REUSE_DEPTH = 4              # Số tầng tìm gốc mới trong subtree giữ lại
 
 EVALUATION_WEIGHTS: Dict[str, float] = {
     "progress": 1.0,
@@ -51,6 +61,30 @@ EVALUATION_WEIGHTS: Dict[str, float] = {
     "capsules": -50.0
 }
 from engine.heuristic import Heuristic
+from engine.algorithms_practical import get_compiled_graph
+from engine.search_state import DistanceRows, SearchModel
+from engine.distance_fields import DistanceFields
+from engine.transposition_table import EXACT, LOWER, UPPER, TranspositionTable, ZobristHasher
+
+
+class _SearchTimeout(Exception):
+    """Hết thời gian của một lần quyết định (dùng để thoát iterative deepening)"""
+
+
+class _MCTSNode(object):
+    """Node của cây MCTS (total = tổng reward theo góc nhìn Pacman)"""
+    __slots__ = ('state', 'agent_index', 'parent', 'action', 'children', 'untried', 'visits', 'total')
+
+    def __init__(self, state, agent_index, parent=None, action=None):
+        self.state = state
+        self.agent_index = agent_index
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = []
+        self.visits = 0
+        self.total = 0.0
+
 
 class HybridAISystem:
     def __init__(self, pacman, config=None):
@@ -70,9 +104,17 @@ class HybridAISystem:
         # Performance tracking
         self.mode_switch_count = 0
 
-        # Caching d? t?i uu performance
-        self._evaluation_cache = {}
-        self._cache_max_size = 1000
+        # Transposition table (Zobrist) cho Minimax/Alpha-Beta, giữ qua các quyết
+        # trong cùng level, xóa khi maze (CompiledGraph) hoặc heuristic thay đổi
+        self._zobrist = None
+        self._distance_rows = None     # DistanceRows theo heuristic hiện tại
+        self._pellet_field = None      # PelletField (distance field tới pellet gần nhất)
+        self._search_model = None      # SearchModel của lần quyết định gần nhất
+        self._distance_fields = None   # DistanceFields (pellet, power pellet, ghost) của maze
+        self._transposition_tables = {
+            "Minimax": TranspositionTable(),
+            "Alpha-Beta": TranspositionTable(),
+        }
 
         self.prev_q_state = None
         self.prev_q_action = None
@@ -81,6 +123,22 @@ class HybridAISystem:
         self._portal_used = False
 
         self._evaluation_weights = dict(EVALUATION_WEIGHTS)
+
+        # Iterative deepening cho Minimax/Alpha-Beta
+        self._search_deadline = None   # perf_counter deadline, None = không giới hạn
+        self._move_ordering = {}       # pacman node id -> best action của lượt trước
+        self.last_search_depth = 0     # Độ sâu hoàn thành gần nhất
+        # Ngân sách cố định (độ sâu / số vòng lặp) thay cho ngân sách thời gian:
+        # kết quả không phụ thuộc tốc độ máy, dùng cho mô phỏng headless
+        self.fixed_budget = False
+        # Bộ sinh số ngẫu nhiên của GA/MCTS; Game gán random.Random riêng theo seed
+        self.rng = random
+
+        # MCTS: subtree giữ lại giữa các quyết định liên tiếp
+        self._mcts_root = None
+        self._mcts_zobrist = None
+        self.last_mcts_iterations = 0
+        self.last_mcts_reused = False
         self._algorithm_handlers = {
             "Minimax": self._run_minimax,
             "Alpha-Beta": self._run_alpha_beta,
@@ -88,6 +146,7 @@ class HybridAISystem:
             "A* Online": self._run_astar,
             "Genetic Algorithm": self._run_genetic_algorithm,
             "GBFS": self._run_gbfs,
+            "MCTS": self._run_mcts,
         }
 
     def set_mode(self, mode):
@@ -114,197 +173,72 @@ class HybridAISystem:
 # - Pac-Man là người chơi tối đa (Maximizing Player)
 # - Ghost là người chơi tối thiểu (Minimizing Player)
 # - Đệ quy tìm kiếm trạng thái tốt nhất cho Pac-Man
+# - Mô phỏng trên SearchState (engine/search_state.py), không clone entity
 # ==========================================================
-    def minimax(self, pacman, ghostgroup, pellet_group, depth, agent_index=0, fruit=None):
-        if depth == 0 or self.is_terminal_state(pacman, ghostgroup, pellet_group):
-            return self.evaluate(pacman, ghostgroup, pellet_group, fruit), None
-
-        ghosts = self._ghosts(ghostgroup)
-        simulated_ghosts = min(len(ghosts), MAX_SIMULATED_GHOSTS)
+    def minimax(self, state, depth, agent_index=0):
+        self._check_search_deadline()
+        if depth == 0 or self.is_terminal_state(state):
+            return self.evaluate(state), None
+
+        # Value trong bảng lưu tương đối so với score của state (dùng lại được qua các quyết định)
+        table = self._transposition_tables["Minimax"]
+        key = state.key ^ self._search_model.zobrist.agent_key(agent_index)
+        entry = table.probe(key)
+        if entry is not None and entry.depth >= depth:
+            return entry.value + state.score, entry.best_move
+
+        simulated_ghosts = min(len(state.ghosts), MAX_SIMULATED_GHOSTS)
         num_agents = 1 + simulated_ghosts  # Pacman + simulated ghosts
         is_pacman = (agent_index == 0)
-        
-        actions = self.get_legal_actions_for_agent(pacman, ghostgroup, pellet_group, agent_index)
-        
+
+        actions = self.get_legal_actions_for_agent(state, agent_index)
+
         if not actions:
-            eval_score = self.evaluate(pacman, ghostgroup, pellet_group, fruit)
+            eval_score = self.evaluate(state)
             return eval_score, None
 
         next_agent = (agent_index + 1) % num_agents
         next_depth = depth - 1 if next_agent == 0 else depth
-        
+        preferred = entry.best_move if entry is not None else None
+
         if is_pacman:
+            actions = self._order_actions(state.pacman, actions, preferred)
             max_eval = float('-inf')
             best_action = actions[0]
-            
-            for i, action in enumerate(actions):
-                next_pacman, next_ghostgroup, next_pellet_group = self.apply_action_for_agent(
-                    pacman, ghostgroup, pellet_group, action, 0,fruit
-                )
-                eval_score, _ = self.minimax(next_pacman, next_ghostgroup, next_pellet_group, next_depth, next_agent)
+
+            for action in actions:
+                next_state = self.apply_action_for_agent(state, action, 0)
+                eval_score, _ = self.minimax(next_state, next_depth, next_agent)
                 if eval_score > max_eval:
                     max_eval = eval_score
                     best_action = action
+            self._remember_best_action(state.pacman, best_action)
+            table.store(key, depth, max_eval - state.score, EXACT, best_action)
             return max_eval, best_action
-        else:   
+        else:
+            actions = self._order_actions(None, actions, preferred)
             min_eval = float('inf')
             best_action = actions[0]
 
             for action in actions:
-                next_pacman, next_ghostgroup, next_pellet_group = self.apply_action_for_agent(
-                    pacman, ghostgroup, pellet_group, action, agent_index,fruit
-                )
-                eval_score, _ = self.minimax(next_pacman, next_ghostgroup, next_pellet_group, next_depth, next_agent,fruit)
+                next_state = self.apply_action_for_agent(state, action, agent_index)
+                eval_score, _ = self.minimax(next_state, next_depth, next_agent)
                 if eval_score < min_eval:
                     min_eval = eval_score
                     best_action = action
+            table.store(key, depth, min_eval - state.score, EXACT, best_action)
             return min_eval, best_action
 
-    def is_terminal_state(self, pacman, ghostgroup, pellet_group):
-        for ghost in self._ghosts(ghostgroup):
-            if ghost.node == pacman.node:
-                return True
-
-        pellets_left = any(pellet.visible for pellet in pellet_group.pelletList)
-        if not pellets_left:
-            return True
-
-        return False
-
-    def get_legal_actions_for_agent(self, pacman, ghostgroup, pellet_group, agent_index):
-        if agent_index == 0:
-            node = getattr(pacman, "node", None)
-            entity_type = PACMAN
-        else:
-            # ✅ Fix: dùng cùng danh sách ghost với apply_action_for_agent
-            closest_ghosts = self._get_n_closest_ghosts(pacman, ghostgroup, n=MAX_SIMULATED_GHOSTS)
-            ghost_idx = agent_index - 1
-            if ghost_idx >= len(closest_ghosts):
-                return []
-            ghost = closest_ghosts[ghost_idx]
-            node = getattr(ghost, "node", None)
-            entity_type = GHOST
-        if node is None:
-            return []
-        return [direction for direction in ALL_DIRECTIONS if self._can_move_in_direction(node, direction, entity_type)]
-
-    def _can_move_in_direction(self, current_node, direction, entity_type=PACMAN):
-        if current_node is None:
-            return False
-        if direction == PORTAL:
-            return current_node.neighbors.get(PORTAL) is not None
-
-        neighbor = current_node.neighbors.get(direction)
-        if neighbor is None:
-            return False
-
-        access = getattr(current_node, "access", {})
-        allowed = access.get(direction)
-        if not allowed:
-            return True
-        if isinstance(allowed, (set, list, tuple)):
-            return entity_type in allowed
-        return True
+    def is_terminal_state(self, state):
+        return self._search_model.is_terminal(state)
 
-    def apply_action_for_agent(self, pacman, ghostgroup, pellet_group, action, agent_index, fruit=None):
-        if agent_index == 0:
-            if action == STOP:
-                return pacman, ghostgroup, pellet_group
-            pacman_node = getattr(pacman, "node", None)
-            if pacman_node is None:
-                return pacman, ghostgroup, pellet_group
-            if action not in pacman_node.neighbors:
-                return pacman, ghostgroup, pellet_group
-            next_node = pacman_node.neighbors.get(action)
-            if next_node is None:
-                return pacman, ghostgroup, pellet_group
-            new_pacman = self._clone_entity(
-                pacman,
-                node=next_node,
-                previous=pacman_node,
-                previous_direction=getattr(pacman, "direction", None),
-                direction=action,
-                position=getattr(next_node, "position", getattr(pacman, "position", None)),
-            )
-            new_pellet_group = self._simulate_eat_pellets_fast(new_pacman, pellet_group)
-            return new_pacman, ghostgroup, new_pellet_group
-
-        closest_ghosts = self._get_n_closest_ghosts(pacman, ghostgroup, n=MAX_SIMULATED_GHOSTS)
-        ghost_idx = agent_index - 1
-        if ghost_idx >= len(closest_ghosts):
-            return pacman, ghostgroup, pellet_group
-        target_ghost = closest_ghosts[ghost_idx]
-        ghost_node = getattr(target_ghost, "node", None)
-        if action == STOP or ghost_node is None:
-            return pacman, ghostgroup, pellet_group
-        if action not in ghost_node.neighbors:
-            return pacman, ghostgroup, pellet_group
-        next_node = ghost_node.neighbors.get(action)
-        if next_node is None:
-            return pacman, ghostgroup, pellet_group
-        new_ghost = self._clone_entity(
-            target_ghost,
-            node=next_node,
-            previous_direction=getattr(target_ghost, "direction", None),
-            direction=action,
-            position=getattr(next_node, "position", getattr(target_ghost, "position", None)),
-        )
-        original_ghosts = getattr(ghostgroup, "ghosts", None) or []
-        new_ghosts = [new_ghost if g is target_ghost else g for g in original_ghosts]
-        new_ghostgroup = self._clone_entity(ghostgroup, ghosts=new_ghosts)
-        return pacman, new_ghostgroup, pellet_group
-
-    def _simulate_eat_pellets_fast(self, pacman, pellet_group):
-        pacman_node = getattr(pacman, "node", None)
-        pellets = getattr(pellet_group, "pelletList", None) or []
-        if pacman_node is None or not pellets:
-            return pellet_group
-        remaining = [
-            pellet
-            for pellet in pellets
-            if getattr(pellet, "node", None) is not pacman_node and getattr(pellet, "visible", True)
-        ]
-        return self._clone_entity(pellet_group, pelletList=remaining)
+    def get_legal_actions_for_agent(self, state, agent_index):
+        return self._search_model.legal_actions(state, agent_index)
 
-    def _get_n_closest_ghosts(self, pacman, ghostgroup, n=MAX_SIMULATED_GHOSTS):
-        pacman_node = getattr(pacman, 'node', None)
-        if pacman_node is None:
-            return []
+    def apply_action_for_agent(self, state, action, agent_index):
+        return self._search_model.apply(state, action, agent_index)
 
-        ghost_distances = []
-        for ghost in self._ghosts(ghostgroup):
-            ghost_node = getattr(ghost, 'node', None)
-            if ghost_node is None:
-                continue
-            distance = self._calculate_distance(pacman_node, ghost_node)
-            ghost_distances.append((ghost, distance))
-
-        ghost_distances.sort(key=lambda x: x[1])
-        return [ghost for ghost, _ in ghost_distances[:n]]
-
-    def evaluate(self, pacman, ghostgroup, pellet_group, fruit=None):
-        pellets = self._pellets(pellet_group)
-        visible_pellets = []
-        visible_nodes = []
-        for pellet in pellets:
-            if not getattr(pellet, 'visible', True):
-                continue
-            visible_pellets.append(pellet)
-            node = getattr(pellet, 'node', None)
-            if node is not None:
-                visible_nodes.append(node)
-        state = {
-            'pacman': pacman,
-            'ghostgroup': ghostgroup,
-            'pellet_group': pellet_group,
-            'fruit': fruit,
-            'pellet_data': {
-                'all': pellets,
-                'visible': tuple(visible_pellets),
-                'visible_nodes': tuple(visible_nodes),
-            },
-            'heuristic_func': Heuristic.get_heuristic_function(self._resolve_config()),
-        }
+    def evaluate(self, state):
         weights = self._evaluation_weights
         return (
             weights['progress'] * self.GameProgress(state) +
@@ -314,117 +248,47 @@ class HybridAISystem:
             weights['power_play'] * self.PowerPlayValue(state) +
             weights['capsules'] * self.StrateCapsules(state)
         )
-  
+
     def GameProgress(self, state):
-        pacman = state.get('pacman')
-        return getattr(pacman, 'score', 0) if pacman else 0
+        return state.score
 
     def RemainingPellets(self, state):
-        pellet_data = state.get('pellet_data')
-        if pellet_data:
-            return len(pellet_data.get('all', ()))
-        return len(self._pellets(state.get('pellet_group')))
+        return state.remaining
 
     def PelletProximity(self, state):
-        pacman = state.get('pacman')
-        pellet_group = state.get('pellet_group')
-        pacman_node = getattr(pacman, 'node', None)
-        pellet_data = state.get('pellet_data') or {}
-        pellet_nodes = pellet_data.get('visible_nodes')
-        if pellet_nodes is None:
-            pellet_nodes = [
-                getattr(pellet, 'node', None)
-                for pellet in self._pellets(pellet_group)
-                if getattr(pellet, 'visible', True)
-            ]
-        pellet_nodes = [node for node in pellet_nodes if node is not None]
+        return state.nearest
 
-        if pacman_node is None or not pellet_nodes:
-            return 0
-        
-        heuristic_func = state.get('heuristic_func')
-        if heuristic_func is None:
-            heuristic_func = Heuristic.get_heuristic_function(self._resolve_config())
-        is_maze_distance = heuristic_func == Heuristic.mazedistance
-       
-        
-        if not pellet_nodes:
-            distances = []
-        elif is_maze_distance:
-            N = 10  
-            manhattan = Heuristic.manhattan
-            pellet_nodes_sorted = sorted(
-                pellet_nodes,
-                key=lambda node: manhattan(pacman_node, node)
-            )[:N]
-            distances = [
-                self._calculate_distance(pacman_node, node, heuristic_func=heuristic_func)
-                for node in pellet_nodes_sorted
-            ]
-        else:
-            distances = [
-                self._calculate_distance(pacman_node, node)
-                for node in pellet_nodes
-            ]
-        return min(distances) if distances else 0
-    
     def ThreatLevel(self, state):
-        pacman = state.get('pacman')
-        ghostgroup = state.get('ghostgroup')
-        pacman_node = getattr(pacman, 'node', None)
-        if pacman_node is None:
-            return 0
+        model = self._search_model
+        row = model.distances.row(state.pacman)
         total_risk = 0.0
-        for ghost in self._ghosts(ghostgroup):
-            if not getattr(ghost, 'visible', True):
-                continue
-            mode_controller = getattr(ghost, 'mode', None)
-            if getattr(mode_controller, 'current', None) not in DANGEROUS_GHOST_MODES:
+        for slot, ghost_node in enumerate(state.ghosts):
+            if not model.ghost_visible[slot]:
                 continue
-            ghost_node = getattr(ghost, 'node', None)
-            if ghost_node is None:
+            if state.modes[slot] not in DANGEROUS_GHOST_MODES:
                 continue
-            dist = self._calculate_distance(pacman_node, ghost_node)
+            dist = row[ghost_node]
             if dist == math.inf or dist > THREAT_RANGE:
                 continue
             total_risk += 1.0 / ((dist + 0.0001) ** THREAT_DECAY)
         return total_risk
 
     def PowerPlayValue(self, state):
-        pacman = state.get('pacman')
-        ghostgroup = state.get('ghostgroup')
-        pacman_node = getattr(pacman, 'node', None)
-        if pacman_node is None:
-            return 0
+        model = self._search_model
+        row = model.distances.row(state.pacman)
         value = 0.0
-        for ghost in self._ghosts(ghostgroup):
-            if not getattr(ghost, 'visible', True):
+        for slot, ghost_node in enumerate(state.ghosts):
+            if not model.ghost_visible[slot]:
                 continue
-            mode_controller = getattr(ghost, 'mode', None)
-            if getattr(mode_controller, 'current', None) != FREIGHT:
+            time_ratio = model.ghost_freight[slot]
+            if time_ratio is None:
                 continue
-            time_total = getattr(mode_controller, 'time', 0)
-            time_timer = getattr(mode_controller, 'timer', 0)
-            time_left = max(0, float(time_total) - float(time_timer))
-            time_ratio = time_left / (float(time_total) + 0.0001) 
-
-            ghost_node = getattr(ghost, 'node', None)
-            if pacman_node is not None and ghost_node is not None:
-                dist = self._calculate_distance(pacman_node, ghost_node)
-                distance_factor = 1.0 / (dist + 0.0001)
-            else:
-                distance_factor = 1.0
-
+            distance_factor = 1.0 / (row[ghost_node] + 0.0001)
             value += 200 * time_ratio * distance_factor
         return value
 
     def StrateCapsules(self, state):
-        pellet_data = state.get('pellet_data')
-        if pellet_data:
-            pellets = pellet_data.get('all', ())
-        else:
-            pellets = self._pellets(state.get('pellet_group'))       
-        return sum(1 for pellet in pellets if getattr(pellet, 'name', None) == POWERPELLET)
+        return state.capsules
 
 # ==========================================================
 #                    END OF MINIMAX ALGORITHM
@@ -441,26 +305,44 @@ class HybridAISystem:
 # - Nếu tìm được nhánh tệ hơn giá trị hiện tại của Max hoặc Min, dừng duyệt nhánh đó (cắt tỉa)
 # - Đệ quy tìm kiếm trạng thái tốt nhất cho Pac-Man với hiệu suất cao hơn Minimax thường
 # ==========================================================
-    def alpha_beta_pruning(self, pacman, ghostgroup, pellet_group, depth, alpha=-math.inf, beta=math.inf, agent_index=0):
-        if depth == 0 or self.is_terminal_state(pacman, ghostgroup, pellet_group):
-            return self.evaluate(pacman, ghostgroup, pellet_group), None
+    def alpha_beta_pruning(self, state, depth, alpha=-math.inf, beta=math.inf, agent_index=0):
+        self._check_search_deadline()
+        if depth == 0 or self.is_terminal_state(state):
+            return self.evaluate(state), None
+
+        # Tra transposition table: entry đủ sâu cho giá trị chính xác hoặc thu hẹp cửa sổ
+        table = self._transposition_tables["Alpha-Beta"]
+        key = state.key ^ self._search_model.zobrist.agent_key(agent_index)
+        entry = table.probe(key)
+        alpha_orig, beta_orig = alpha, beta
+        if entry is not None and entry.depth >= depth:
+            value = entry.value + state.score
+            if entry.bound == EXACT:
+                return value, entry.best_move
+            if entry.bound == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if beta <= alpha:
+                return value, entry.best_move
 
-        ghosts = self._ghosts(ghostgroup)
-        simulated_ghosts = min(len(ghosts), MAX_SIMULATED_GHOSTS)
+        simulated_ghosts = min(len(state.ghosts), MAX_SIMULATED_GHOSTS)
         num_agents = 1 + simulated_ghosts  # Pacman + simulated ghosts
-        actions = list(self.get_legal_actions_for_agent(pacman, ghostgroup, pellet_group, agent_index))
+        actions = self.get_legal_actions_for_agent(state, agent_index)
         if not actions:
-            return self.evaluate(pacman, ghostgroup, pellet_group), None
+            return self.evaluate(state), None
 
         next_agent = (agent_index + 1) % num_agents
-        next_depth = depth - 1 
+        next_depth = depth - 1
+        preferred = entry.best_move if entry is not None else None
 
         if agent_index == 0:
+            actions = self._order_actions(state.pacman, actions, preferred)
             best_value = -math.inf
             best_action = actions[0]
             for order, action in enumerate(actions):
-                next_state = self.apply_action_for_agent(pacman, ghostgroup, pellet_group, action, 0)
-                value, _ = self.alpha_beta_pruning(*next_state, next_depth, alpha, beta, next_agent)
+                next_state = self.apply_action_for_agent(state, action, 0)
+                value, _ = self.alpha_beta_pruning(next_state, next_depth, alpha, beta, next_agent)
                 value += self._alpha_beta_noise(order)
                 if value > best_value:
                     best_value = value
@@ -468,19 +350,28 @@ class HybridAISystem:
                 alpha = max(alpha, best_value)
                 if beta <= alpha:
                     break
-            return best_value, best_action
-
-        for action in actions:
+            self._remember_best_action(state.pacman, best_action)
+        else:
+            actions = self._order_actions(None, actions, preferred)
             best_value = math.inf
             best_action = actions[0]
-            next_state = self.apply_action_for_agent(pacman, ghostgroup, pellet_group, action, agent_index)
-            value, _ = self.alpha_beta_pruning(*next_state, next_depth, alpha, beta, next_agent)
-            if value < best_value:
-                best_value = value
-                best_action = action
-            beta = min(beta, best_value)
-            if beta <= alpha:
-                break
+            for action in actions:
+                next_state = self.apply_action_for_agent(state, action, agent_index)
+                value, _ = self.alpha_beta_pruning(next_state, next_depth, alpha, beta, next_agent)
+                if value < best_value:
+                    best_value = value
+                    best_action = action
+                beta = min(beta, best_value)
+                if beta <= alpha:
+                    break
+
+        if best_value <= alpha_orig:
+            bound = UPPER
+        elif best_value >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(key, depth, best_value - state.score, bound, best_action)
         return best_value, best_action
 
     def _alpha_beta_noise(self, order):
@@ -488,7 +379,7 @@ class HybridAISystem:
         Thêm noise nhỏ để tránh tie-breaking deterministic
         Ưu tiên action đầu tiên khi có cùng giá trị
         """
-        return -0.001 * order  
+        return -0.001 * order
 
 
 # ==========================================================
@@ -498,60 +389,28 @@ class HybridAISystem:
 # - Luôn chọn nước đi cải thiện điểm số (evaluation) so với hiện tại
 # - Không đảm bảo tìm được nghiệm tối ưu toàn cục (có thể mắc kẹt ở local optimum)
 # ==========================================================
-    def hill_climbing(self, pacman, ghost_group, pellet_group, max_steps=5):
-        if pacman is None:
+    def hill_climbing(self, state, max_steps=5):
+        if state is None:
             return STOP
 
-        current_pacman = pacman
-        current_ghost_group = ghost_group
-        current_pellet_group = pellet_group
-
-        def node_key(node):
-            if node is None:
-                return ("NONE",)
-            position = getattr(node, 'position', None)
-            if position is None:
-                return ("ID", id(node))
-            return ("POS", position.x, position.y)
-        def ghost_signature(ghost_state):
-            signature = []
-            for ghost in self._ghosts(ghost_state):
-                node = getattr(ghost, 'node', None)
-                mode_controller = getattr(ghost, 'mode', None)
-                signature.append((
-                    str(getattr(ghost, 'name', '')),
-                    node_key(node),
-                    str(getattr(mode_controller, 'current', None)),
-                ))
-            return tuple(sorted(signature))
+        current_state = state
+
+        # Zobrist key của SearchState đã gồm Pacman node, ghost và pellet còn lại
         evaluation_cache = {}
-        def pellet_fingerprint(pellet_state):
-            pellets = getattr(pellet_state, 'pelletList', None) or []
-            visible = [
-                node_key(getattr(pellet, 'node', None))
-                for pellet in pellets
-                if getattr(pellet, 'visible', True)
-            ]
-            return tuple(sorted(visible))
-        def score_state(pacman_state, ghost_state, pellet_state):
-            key = (
-                node_key(getattr(pacman_state, 'node', None)),
-                pellet_fingerprint(pellet_state),
-                ghost_signature(ghost_state),
-            )
-            if key in evaluation_cache:
-                return evaluation_cache[key]
-            value = self.evaluate(pacman_state, ghost_state, pellet_state)
-            evaluation_cache[key] = value
+        def score_state(search_state):
+            value = evaluation_cache.get(search_state.key)
+            if value is None:
+                value = self.evaluate(search_state)
+                evaluation_cache[search_state.key] = value
             return value
 
-        current_score = score_state(current_pacman, current_ghost_group, current_pellet_group)
+        current_score = score_state(current_state)
         best_initial_action = STOP
 
-        
+
 
         for _ in range(max_steps):
-            actions = self.get_legal_actions_for_agent(current_pacman, current_ghost_group, current_pellet_group, 0)
+            actions = self.get_legal_actions_for_agent(current_state, 0)
             if not actions:
                 break
 
@@ -560,13 +419,11 @@ class HybridAISystem:
             best_neighbor_action = STOP
 
             for action in actions:
-                next_pacman, next_ghost_group, next_pellet_group = self.apply_action_for_agent(
-                    current_pacman, current_ghost_group, current_pellet_group, action, 0
-                )
-                neighbor_score = score_state(next_pacman, next_ghost_group, next_pellet_group)
+                next_state = self.apply_action_for_agent(current_state, action, 0)
+                neighbor_score = score_state(next_state)
                 if neighbor_score > best_neighbor_score:
                     best_neighbor_score = neighbor_score
-                    best_neighbor_state = (next_pacman, next_ghost_group, next_pellet_group)
+                    best_neighbor_state = next_state
                     best_neighbor_action = action
 
             if best_neighbor_state is None:
@@ -575,11 +432,11 @@ class HybridAISystem:
             if best_initial_action == STOP:
                 best_initial_action = best_neighbor_action
 
-            current_pacman, current_ghost_group, current_pellet_group = best_neighbor_state
+            current_state = best_neighbor_state
             current_score = best_neighbor_score
 
         return best_initial_action
-      
+
 # ==========================================================
 #                    END OF HILL CLIMBING ALGORITHM
 # ==========================================================
@@ -595,10 +452,7 @@ class HybridAISystem:
 # ==========================================================
     def genetic_algorithm(
         self,
-        pacman,
-        ghost_group,
-        pellet_group,
-        fruit=None,
+        state,
         population_size=20,
         sequence_length=6,
         generations=15,
@@ -606,8 +460,7 @@ class HybridAISystem:
         elite_fraction=0.2,
         tournament_size=3,
     ):
-        heuristic_func = Heuristic.get_heuristic_function(self._resolve_config())
-        legal_actions = self.get_legal_actions_for_agent(pacman, ghost_group, pellet_group, 0)
+        legal_actions = self.get_legal_actions_for_agent(state, 0)
         if not legal_actions:
             return []
 
@@ -616,10 +469,10 @@ class HybridAISystem:
         generations = max(1, generations)
 
         def random_sequence():
-            return [random.choice(legal_actions) for _ in range(sequence_length)]
+            return [self.rng.choice(legal_actions) for _ in range(sequence_length)]
 
-        base_pacman_state = self._clone_entity(pacman)
-        state_prefix_cache = {(): (base_pacman_state, ghost_group, pellet_group)}
+        # SearchState bất biến nên prefix cache giữ thẳng state, không cần clone
+        state_prefix_cache = {(): state}
         sequence_score_cache = {}
 
         def evaluate_sequence(action_sequence):
@@ -627,41 +480,15 @@ class HybridAISystem:
             if sequence_key in sequence_score_cache:
                 return sequence_score_cache[sequence_key]
 
-            base_state = state_prefix_cache[()]
-            pacman_state = self._clone_entity(base_state[0])
-            ghost_state = base_state[1]
-            pellet_state = base_state[2]
-
-            if not action_sequence:
-                score = self.evaluate(pacman_state, ghost_state, pellet_state, fruit)
-                sequence_score_cache[sequence_key] = score
-                return score
-
-            prefix = []
-            for action in action_sequence:
-                prefix.append(action)
-                prefix_key = tuple(prefix)
+            search_state = state_prefix_cache[()]
+            for length in range(1, len(sequence_key) + 1):
+                prefix_key = sequence_key[:length]
                 cached_state = state_prefix_cache.get(prefix_key)
-                if cached_state is not None:
-                    pacman_state = self._clone_entity(cached_state[0])
-                    ghost_state = cached_state[1]
-                    pellet_state = cached_state[2]
-                    continue
-
-                pacman_state, ghost_state, pellet_state = self.apply_action_for_agent(
-                    pacman_state,
-                    ghost_state,
-                    pellet_state,
-                    action,
-                    0,
-                    fruit,
-                )
-                state_prefix_cache[prefix_key] = (
-                    self._clone_entity(pacman_state),
-                    ghost_state,
-                    pellet_state,
-                )
-            score = self.evaluate(pacman_state, ghost_state, pellet_state, fruit)
+                if cached_state is None:
+                    cached_state = self.apply_action_for_agent(search_state, prefix_key[-1], 0)
+                    state_prefix_cache[prefix_key] = cached_state
+                search_state = cached_state
+            score = self.evaluate(search_state)
             sequence_score_cache[sequence_key] = score
             return score
 
@@ -676,7 +503,7 @@ class HybridAISystem:
             chosen_indices = set()
             population_len = len(scored_population)
             while len(chosen_indices) < pool_size:
-                chosen_indices.add(random.randrange(population_len))
+                chosen_indices.add(self.rng.randrange(population_len))
             best_index = max(chosen_indices, key=lambda idx: scored_population[idx][0])
             return scored_population[best_index][1][:]
 
@@ -684,12 +511,12 @@ class HybridAISystem:
         def crossover(parent_a, parent_b):
             if sequence_length <= 1:
                 return parent_a[:]
-            point = random.randint(1, sequence_length - 1)
+            point = self.rng.randint(1, sequence_length - 1)
             return parent_a[:point] + parent_b[point:]
 
         def mutate(sequence):
             return [
-                random.choice(legal_actions) if random.random() < mutation_rate else action
+                self.rng.choice(legal_actions) if self.rng.random() < mutation_rate else action
                 for action in sequence
             ]
 
@@ -747,7 +574,182 @@ class HybridAISystem:
 # - Gồm 4 bước: Selection, Expansion, Simulation, Backpropagation
 # - Chọn hành động dựa trên thống kê kết quả mô phỏng
 # - Phù hợp với môi trường có nhiều trạng thái và không xác định
+# - Anytime: chạy tới khi hết ngân sách thời gian hoặc số vòng lặp
+# - Subtree của nước đã chọn được giữ lại và làm gốc cho lần quyết định sau
 # ==========================================================
+    def monte_carlo_tree_search(self, state):
+        """
+        MCTS anytime trên SearchState
+        Args:
+            state: SearchState gốc (Pacman đi trước)
+        Returns:
+            Action của child được thăm nhiều nhất ở gốc, hoặc None
+        """
+        root = self._reuse_mcts_root(state)
+        baseline = self.evaluate(root.state)
+        if self.fixed_budget:
+            deadline = None
+            max_iterations = self._fixed_budget_value('ai_fixed_mcts_iterations', FIXED_MCTS_ITERATIONS)
+        else:
+            deadline = time.perf_counter() + self._search_budget()
+            max_iterations = self._mcts_iterations()
+
+        iterations = 0
+        while iterations < max_iterations:
+            # 1. Selection: đi theo UCT tới node còn action chưa mở rộng
+            node = root
+            while not node.untried and node.children:
+                node = self._uct_select(node)
+
+            # 2. Expansion
+            if node.untried:
+                action = node.untried.pop()
+                child_state = self.apply_action_for_agent(node.state, action, node.agent_index)
+                child = _MCTSNode(child_state, self._next_agent(child_state, node.agent_index), node, action)
+                child.untried = self._mcts_actions(child)
+                node.children.append(child)
+                node = child
+
+            # 3. Simulation
+            reward = self._mcts_rollout(node.state, node.agent_index, baseline)
+
+            # 4. Backpropagation (reward theo góc nhìn Pacman, trong [0, 1])
+            while node is not None:
+                node.visits += 1
+                node.total += reward
+                node = node.parent
+
+            iterations += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        self.last_mcts_iterations = iterations
+        if not root.children:
+            self._mcts_root = None
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        # Giữ subtree của nước đã chọn để dùng lại ở lần quyết định sau
+        best.parent = None
+        self._mcts_root = best
+        return best.action
+
+    def _reuse_mcts_root(self, state):
+        """
+        Tìm trong subtree giữ lại từ lượt trước node trùng với trạng thái hiện tại
+        (cùng Zobrist key, Pacman đi) và dùng nó làm gốc mới
+        """
+        previous = self._mcts_root
+        self._mcts_root = None
+        self.last_mcts_reused = False
+        if previous is not None and self._mcts_zobrist is self._search_model.zobrist:
+            frontier = [previous]
+            for _ in range(MCTS_REUSE_DEPTH):
+                next_frontier = []
+                for node in frontier:
+                    if node.agent_index == 0 and node.state.key == state.key:
+                        node.parent = None
+                        node.action = None
+                        self.last_mcts_reused = True
+                        return node
+                    next_frontier.extend(node.children)
+                frontier = next_frontier
+        self._mcts_zobrist = self._search_model.zobrist
+        root = _MCTSNode(state, 0)
+        root.untried = self._mcts_actions(root)
+        return root
+
+    def _mcts_actions(self, node):
+        """
+        Action chưa mở rộng của node (rỗng nếu state kết thúc)
+        """
+        if self.is_terminal_state(node.state):
+            return []
+        actions = self.get_legal_actions_for_agent(node.state, node.agent_index)
+        self.rng.shuffle(actions)
+        return actions
+
+    def _next_agent(self, state, agent_index):
+        num_agents = 1 + min(len(state.ghosts), MAX_SIMULATED_GHOSTS)
+        return (agent_index + 1) % num_agents
+
+    def _uct_select(self, node):
+        """
+        UCT: Pacman chọn child có mean reward cao, ghost chọn child có mean reward thấp
+        """
+        log_visits = math.log(node.visits)
+        maximizing = node.agent_index == 0
+        best_child = None
+        best_score = -math.inf
+        for child in node.children:
+            mean = child.total / child.visits
+            if not maximizing:
+                mean = 1.0 - mean
+            score = mean + MCTS_EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _mcts_rollout(self, state, agent_index, baseline):
+        """
+        Rollout rẻ trên SearchState:
+        - Pacman: ưu tiên ô có pellet, tránh quay đầu
+        - Ghost (không FREIGHT): đi về phía Pacman với xác suất MCTS_GHOST_CHASE
+        - Thứ tự ghost gần nhất chỉ tính lại mỗi lượt (không phải mỗi ply)
+        Returns:
+            Reward trong [0, 1] từ evaluate() của state cuối so với gốc
+        """
+        model = self._search_model
+        num_agents = 1 + min(len(state.ghosts), MAX_SIMULATED_GHOSTS)
+        closest = None
+        for _ in range(MCTS_ROLLOUT_DEPTH * num_agents):
+            if model.is_terminal(state):
+                break
+            if agent_index == 0:
+                state = self._rollout_pacman_move(state)
+                closest = None
+            else:
+                if closest is None:
+                    closest = model.closest_ghosts(state)
+                if agent_index - 1 < len(closest):
+                    state = self._rollout_ghost_move(state, closest[agent_index - 1])
+            agent_index = (agent_index + 1) % num_agents
+        return 0.5 + 0.5 * math.tanh((self.evaluate(state) - baseline) / MCTS_REWARD_SCALE)
+
+    def _rollout_pacman_move(self, state):
+        moves = self._search_model.pacman_moves[state.pacman]
+        if not moves:
+            return state
+        reverse = -state.direction if state.direction in ORTHOGONAL_DIRECTIONS else None
+        eating = [move for move in moves if state.pellets >> move[0] & 1]
+        if eating:
+            target, direction = self.rng.choice(eating)
+        else:
+            forward = [move for move in moves if move[1] != reverse]
+            target, direction = self.rng.choice(forward) if forward else moves[0]
+        return self._search_model.move_pacman(state, target, direction)
+
+    def _rollout_ghost_move(self, state, ghost_slot):
+        model = self._search_model
+        moves = model.ghost_moves[ghost_slot][state.ghosts[ghost_slot]]
+        if not moves:
+            return state
+        if state.modes[ghost_slot] != FREIGHT and self.rng.random() < MCTS_GHOST_CHASE:
+            row = model.distances.row(state.pacman)
+            target = min(moves, key=lambda move: row[move[0]])[0]
+        else:
+            target = self.rng.choice(moves)[0]
+        return model.move_ghost(state, ghost_slot, target)
+
+    def _mcts_iterations(self):
+        """
+        Số vòng lặp MCTS tối đa cho một quyết định, từ config ai_mcts_iterations
+        """
+        iterations = MCTS_MAX_ITERATIONS
+        config = self._resolve_config()
+        if config is not None and hasattr(config, 'get'):
+            iterations = config.get('ai_mcts_iterations', iterations)
+        return max(1, int(iterations))
 
 # ==========================================================
 #                END OF MONTE CARLO TREE SEARCH (MCTS)
@@ -991,21 +993,19 @@ class HybridAISystem:
         return STOP
 
     def find_furthes_safe_node(self, pacman_node, ghostgroup, max_depth=5):
+        fields = self._fields(pacman_node)
+        if fields is None:
+            return pacman_node
+        fields.update_ghosts(ghostgroup, DANGEROUS_GHOST_MODES)
+        if not fields.ghosts.sources:
+            # Không có ghost nguy hiểm: đứng yên
+            return pacman_node
+
         visited = set()
         queue = deque([(pacman_node, 0)])
         best_node = pacman_node
         best_dist = -1
-
-        # Get all dangerous ghosts
-        dangerous_ghosts = [
-            ghost for ghost in self._ghosts(ghostgroup)
-            if getattr(ghost, 'node', None) is not None
-            and getattr(getattr(ghost, 'mode', None), 'current', None) in DANGEROUS_GHOST_MODES
-        ]
-
-        # If no dangerous ghosts, return current position
-        if not dangerous_ghosts:
-            return pacman_node
+        ghost_dist = fields.ghosts.dist
 
         while queue:
             node, depth = queue.popleft()
@@ -1013,15 +1013,8 @@ class HybridAISystem:
                 continue
             visited.add(node)
 
-            # Calculate minimum distance to any dangerous ghost
-            min_ghost_dist = min(
-                (
-                    self._calculate_distance(node, ghost.node)
-                    for ghost in dangerous_ghosts
-                ),
-                default=float('inf'),
-            )
-
+            # Khoảng cách tới ghost nguy hiểm gần nhất: lookup trong distance field
+            min_ghost_dist = ghost_dist[node.index] if fields.graph.owns(node) else -1
             if min_ghost_dist > best_dist:
                 best_dist = min_ghost_dist
                 best_node = node
@@ -1033,52 +1026,38 @@ class HybridAISystem:
         return best_node
 
     def find_nearest_power_pellet(self, pacman_node, pellet_group):
-        pellet_list = getattr(pellet_group, 'pelletList', None)
-        if not pellet_list:
+        fields = self._fields(pacman_node)
+        if fields is None or pellet_group is None:
             return None
-
-        return min(
-            (
-                getattr(pellet, 'node', None)
-                for pellet in pellet_list
-                if getattr(pellet, 'name', None) == POWERPELLET
-                and getattr(pellet, 'node', None) is not None
-                and getattr(pellet, 'visible', True)
-            ),
-            key=lambda node: self._calculate_distance(pacman_node, node),
-            default=None,
-        )
+        fields.update_pellets(pellet_group)
+        return fields.nearest_power_pellet(pacman_node)
 
     def find_nearest_pellet(self, pacman_node, pellet_group):
-        pellet_list = getattr(pellet_group, 'pelletList', None)
-        if not pellet_list:
+        fields = self._fields(pacman_node)
+        if fields is None or pellet_group is None:
             return None
-
-        return min(
-            (
-                getattr(pellet, 'node', None)
-                for pellet in pellet_list
-                if getattr(pellet, 'node', None) is not None
-                and getattr(pellet, 'visible', True)
-            ),
-            key=lambda node: self._calculate_distance(pacman_node, node),
-            default=None,
-        )
+        fields.update_pellets(pellet_group)
+        return fields.nearest_pellet(pacman_node)
     
     def is_ghost_near(self, pacman_node, ghostgroup, threat_range=THREAT_RANGE):
-        if pacman_node is None:
+        fields = self._fields(pacman_node)
+        if fields is None:
             return False
+        fields.update_ghosts(ghostgroup, DANGEROUS_GHOST_MODES)
+        return fields.ghost_distance(pacman_node) <= threat_range
 
-        for ghost in self._ghosts(ghostgroup):
-            ghost_node = getattr(ghost, 'node', None)
-            if ghost_node is None:
-                continue
-
-            mode = getattr(getattr(ghost, 'mode', None), 'current', None)
-            if mode in DANGEROUS_GHOST_MODES and self._calculate_distance(pacman_node, ghost_node) <= threat_range:
-                return True
-
-        return False
+    def _fields(self, pacman_node):
+        """
+        DistanceFields của maze chứa pacman_node (dựng lại khi đổi maze / access)
+        Returns:
+            DistanceFields hoặc None nếu không có node
+        """
+        if pacman_node is None:
+            return None
+        graph = get_compiled_graph(pacman_node)
+        if self._distance_fields is None or not self._distance_fields.matches(graph):
+            self._distance_fields = DistanceFields(graph)
+        return self._distance_fields
 
 # ==========================================================
 #                    END OF GBFS ALGORITHM
@@ -1090,6 +1069,7 @@ class HybridAISystem:
 # - Đóng vai trò là "bộ chuyển đổi" giữa hệ thống và các thuật toán tìm đường:
 #   + _run_minimax:      Gọi thuật toán Minimax để chọn hướng đi tối ưu cho Pac-Man
 #   + _run_alpha_beta:   Gọi thuật toán Alpha-Beta Pruning để chọn hướng đi tối ưu
+#   + _run_mcts:         Gọi Monte Carlo Tree Search (anytime, dùng lại cây)
 #   + _run_hill_climbing:Gọi thuật toán Hill Climbing để chọn hướng đi
 #   + _run_astar:        Gọi thuật toán A* để chọn hướng đi ngắn nhất/tránh nguy hiểm
 # - Các hàm này nhận vào trạng thái hiện tại (pellet_group, ghost_group, fruit)
@@ -1097,34 +1077,155 @@ class HybridAISystem:
 # ==========================================================
 
     def _run_minimax(self, pellet_group, ghost_group, fruit):
-        pacman_copy = self._clone_entity(
-            self.pacman,
-            direction=getattr(self.pacman, 'direction', None),
-            previous_direction=getattr(self.pacman, 'direction', None),
+        root = self._prepare_search(pellet_group, ghost_group)
+        if root is None:
+            return STOP
+        return self._iterative_deepening(
+            lambda depth: self.minimax(root, depth=depth, agent_index=0)
         )
-        score, action = self.minimax(pacman_copy, ghost_group, pellet_group, depth=2, agent_index=0, fruit=fruit)
-        return action
     def _run_genetic_algorithm(self, pellet_group, ghost_group, fruit):
-        pacman_copy = self._clone_entity(
-            self.pacman,
-            direction=getattr(self.pacman, 'direction', None),
-            previous_direction=getattr(self.pacman, 'direction', None),
-        )
-        action_sequence = self.genetic_algorithm(pacman_copy, ghost_group, pellet_group, fruit)
+        root = self._prepare_search(pellet_group, ghost_group)
+        action_sequence = self.genetic_algorithm(root) if root is not None else []
         if action_sequence:
             return action_sequence[0]
         return self._run_astar(pellet_group, ghost_group, fruit)
     def _run_alpha_beta(self, pellet_group, ghost_group, fruit):
-        pacman_copy = self._clone_entity(
-            self.pacman,
-            direction=getattr(self.pacman, 'direction', None),
-            previous_direction=getattr(self.pacman, 'direction', None),
+        root = self._prepare_search(pellet_group, ghost_group)
+        if root is None:
+            return STOP
+        return self._iterative_deepening(
+            lambda depth: self.alpha_beta_pruning(root, depth=depth, agent_index=0)
         )
-        _, action = self.alpha_beta_pruning(pacman_copy, ghost_group, pellet_group, depth=3, agent_index=0)
+    def _run_mcts(self, pellet_group, ghost_group, fruit):
+        root = self._prepare_search(pellet_group, ghost_group)
+        action = self.monte_carlo_tree_search(root) if root is not None else None
+        if action is None:
+            return self._run_astar(pellet_group, ghost_group, fruit)
         return action
 
+# ==========================================================
+#            ITERATIVE DEEPENING (MINIMAX / ALPHA-BETA)
+# ----------------------------------------------------------
+# - Tìm với depth = 1, 2, 3, ... cho tới khi hết ngân sách thời gian
+# - Giữ nước đi tốt nhất của độ sâu cuối cùng đã hoàn thành
+# - Nước đi tốt nhất của lượt trước được thử đầu tiên ở lượt sau
+#   (move ordering giúp Alpha-Beta cắt tỉa sớm hơn)
+# - fixed_budget: tìm tới độ sâu cố định, không giới hạn thời gian
+# ==========================================================
+    def _iterative_deepening(self, search):
+        """
+        Args:
+            search: Hàm search(depth) -> (score, action)
+        Returns:
+            Action tốt nhất của độ sâu cuối cùng đã hoàn thành
+        """
+        if self.fixed_budget:
+            deadline = None
+            max_depth = self._fixed_budget_value('ai_fixed_search_depth', FIXED_SEARCH_DEPTH)
+        else:
+            deadline = time.perf_counter() + self._search_budget()
+            max_depth = MAX_SEARCH_DEPTH
+        self._move_ordering = {}
+        self._search_deadline = None  # Depth 1 luôn chạy hết để luôn có nước đi
+        best_action = None
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    _, action = search(depth)
+                except _SearchTimeout:
+                    break
+                if action is not None:
+                    best_action = action
+                self.last_search_depth = depth
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                self._search_deadline = deadline
+        finally:
+            self._search_deadline = None
+        return best_action
+
+    def _search_budget(self):
+        """
+        Ngân sách thời gian cho một quyết định (giây), từ config ai_search_budget_ms
+        """
+        budget_ms = DEFAULT_SEARCH_BUDGET_MS
+        config = self._resolve_config()
+        if config is not None and hasattr(config, 'get'):
+            budget_ms = config.get('ai_search_budget_ms', budget_ms)
+        return budget_ms / 1000.0
+
+    def _fixed_budget_value(self, key, default):
+        """
+        Ngân sách cố định (độ sâu hoặc số vòng lặp) từ config, dùng khi fixed_budget
+        """
+        value = default
+        config = self._resolve_config()
+        if config is not None and hasattr(config, 'get'):
+            value = config.get(key, value)
+        return max(1, int(value))
+
+    def _check_search_deadline(self):
+        if self._search_deadline is not None and time.perf_counter() > self._search_deadline:
+            raise _SearchTimeout()
+
+    def _order_actions(self, node, actions, preferred=None):
+        """
+        Đưa best move của transposition table (nếu có), hoặc best action của
+        lượt trước (cùng pacman node id) lên đầu
+        """
+        best = preferred
+        if best is None and node is not None:
+            best = self._move_ordering.get(node)
+        if best is None or best not in actions or actions[0] == best:
+            return actions
+        return [best] + [action for action in actions if action != best]
+
+    def _remember_best_action(self, node, action):
+        if action is not None:
+            self._move_ordering[node] = action
+
+# ==========================================================
+#          SEARCH STATE + TRANSPOSITION TABLE (ZOBRIST)
+# ----------------------------------------------------------
+# - Mỗi lần quyết định dựng một SearchModel từ object của game; các thuật
+#   toán chỉ làm việc trên SearchState (id số nguyên + bitset)
+# - Zobrist key = XOR của: Pacman node, node + mode + visible + tỉ lệ
+#   FREIGHT (lượng tử hóa) của từng ghost, tập pellet còn lại (agent đang đi
+#   được XOR thêm khi tra bảng)
+# - Transposition table và DistanceRows giữ qua các quyết định liên tiếp;
+#   xóa khi sang level mới (maze mới) hoặc khi đổi heuristic
+# ==========================================================
+    def _prepare_search(self, pellet_group, ghost_group):
+        """
+        Dựng SearchModel cho lần quyết định hiện tại
+        Returns:
+            SearchState gốc hoặc None nếu không dựng được
+        """
+        node = getattr(self.pacman, 'node', None)
+        if node is None:
+            return None
+        graph = get_compiled_graph(node)
+        if self._zobrist is None or self._zobrist.graph is not graph:
+            self._zobrist = ZobristHasher(graph)
+            for table in self._transposition_tables.values():
+                table.clear()
+        heuristic_func = Heuristic.get_heuristic_function(self._resolve_config())
+        if self._distance_rows is None or not self._distance_rows.matches(graph, heuristic_func):
+            self._distance_rows = DistanceRows(graph, heuristic_func)
+            # Value đã lưu tính theo khoảng cách của heuristic cũ
+            for table in self._transposition_tables.values():
+                table.clear()
+        self._search_model = SearchModel.from_game(
+            graph, self._distance_rows, self._pellet_field, self._zobrist,
+            self.pacman, ghost_group, pellet_group, MAX_SIMULATED_GHOSTS,
+        )
+        if self._search_model is None:
+            return None
+        self._pellet_field = self._search_model.field
+        return self._search_model.root
+
     def _run_hill_climbing(self, pellet_group, ghost_group, fruit):
-        return self.hill_climbing(self.pacman, ghost_group, pellet_group)
+        return self.hill_climbing(self._prepare_search(pellet_group, ghost_group))
 
     def _run_astar(self, pellet_group, ghost_group, fruit):
         return self.astar_pacman_direction(self.pacman, ghost_group, pellet_group)
@@ -1135,18 +1236,9 @@ class HybridAISystem:
 # ==========================================================
 #            Các hàm tiện ích static cho HybridAISystem
 # ----------------------------------------------------------
-#  - Hỗ trợ clone entity, lấy danh sách ghost, pellet, v.v.
+#  - Hỗ trợ lấy danh sách ghost, pellet, v.v.
 #  - Được sử dụng nội bộ cho các thuật toán AI
 # ==========================================================
-    @staticmethod
-    def _clone_entity(entity, **overrides):
-        if entity is None:
-            return None
-        clone = copy.copy(entity)
-        for attr, value in overrides.items():
-            setattr(clone, attr, value)
-        return clone
-
     @staticmethod
     def _ghosts(ghostgroup):
         if ghostgroup is None:
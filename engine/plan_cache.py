@@ -0,0 +1,173 @@
+# =============================================================================
+# PLAN_CACHE.PY - CACHE MASTER PATH TRÊN ĐĨA (GIỮA CÁC LẦN CHƠI)
+# =============================================================================
+# File này chứa PlanCache - lưu master path của ComputeOnceSystem ra đĩa để
+# lần chơi sau với cùng cấu hình không phải tìm lại
+# - Key: SHA-1 của maze (tọa độ node + cạnh + access của Pacman trên
+#   CompiledGraph, tức là maze file + access rules), phiên bản planner
+#   (PLAN_CACHE_VERSION + digest source các module trong PLANNER_MODULES), thuật toán,
+#   heuristic, node bắt đầu và bitset pellet
+# - Value: mảng tọa độ node (int16, N x 2) trong một file .npy nhỏ
+# - Giới hạn số entry theo LRU (mtime của file, được cập nhật khi hit)
+
+import hashlib
+import os
+import numpy as np
+from constants import *
+from objects import compiled_graph
+from objects.compiled_graph import accessBit
+from engine import algorithms_practical, tour_solver, heuristic, distance_oracle
+
+PLAN_CACHE_DIR = os.path.join("cache", "plans")
+PLAN_CACHE_MAX_ENTRIES = 256
+# Tăng khi đổi định dạng entry hoặc khi hành vi planner thay đổi ngoài các
+# module trong PLANNER_MODULES (entry cũ không còn khớp key, tự bị LRU loại)
+PLAN_CACHE_VERSION = 2
+# Các module quyết định path của engine offline: thuật toán, heuristic,
+# bảng khoảng cách và thứ tự node id / CSR của CompiledGraph
+PLANNER_MODULES = (algorithms_practical, tour_solver, heuristic, distance_oracle, compiled_graph)
+
+_planner_digest = None
+
+
+def planner_digest():
+    """
+    SHA-1 source của PLANNER_MODULES (tính một lần) - sửa thuật toán thì
+    key đổi theo, không đọc lại path cũ
+    Returns:
+        Chuỗi hex, hoặc "" nếu không đọc được source (chỉ còn PLAN_CACHE_VERSION)
+    """
+    global _planner_digest
+    if _planner_digest is None:
+        digest = hashlib.sha1()
+        try:
+            for module in PLANNER_MODULES:
+                with open(module.__file__, 'rb') as f:
+                    digest.update(f.read())
+            _planner_digest = digest.hexdigest()
+        except (OSError, TypeError):
+            _planner_digest = ""
+    return _planner_digest
+
+
+class PlanCache(object):
+    """
+    PlanCache - master path theo key trong thư mục cache
+
+    - get(): đọc path (list Node) hoặc None, đánh dấu vừa dùng
+    - put(): ghi path (ghi file tạm rồi os.replace, an toàn khi nhiều process
+      cùng ghi), loại entry cũ nhất khi vượt max_entries
+    """
+    def __init__(self, directory=PLAN_CACHE_DIR, max_entries=PLAN_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, graph, algorithm, heuristic, start_node, pellet_nodes):
+        """
+        Args:
+            graph: CompiledGraph của maze
+            algorithm: Tên thuật toán
+            heuristic: Tên heuristic
+            start_node: Node bắt đầu
+            pellet_nodes: Tập Node có pellet
+        Returns:
+            Key dạng hex, hoặc None nếu node không thuộc graph
+        """
+        if not graph.owns(start_node):
+            return None
+        pellets = 0
+        for node in pellet_nodes:
+            if not graph.owns(node):
+                return None
+            pellets |= 1 << node.index
+
+        digest = hashlib.sha1()
+        digest.update(f"v{PLAN_CACHE_VERSION}|{planner_digest()}|".encode())
+        digest.update(np.asarray(graph.positions, dtype=np.float32).tobytes())
+        digest.update(graph.indptr.tobytes())
+        digest.update(graph.indices.tobytes())
+        digest.update(graph.directions.tobytes())
+        digest.update(((graph.access & accessBit(PACMAN)) != 0).tobytes())
+        digest.update(f"|{algorithm}|{heuristic}|{start_node.index}|".encode())
+        digest.update(pellets.to_bytes((graph.size + 7) // 8, 'little'))
+        return digest.hexdigest()
+
+    def get(self, key, graph):
+        """
+        Returns:
+            List Node của path đã lưu, hoặc None (miss / file hỏng / không khớp graph)
+        """
+        path = self._path(key)
+        try:
+            coords = np.load(path, allow_pickle=False)
+            os.utime(path)  # LRU: đánh dấu vừa dùng
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        lookup = {(int(x), int(y)): node for node, x, y in zip(graph.nodes, graph.xs, graph.ys)}
+        nodes = [lookup.get((int(x), int(y))) for x, y in coords]
+        if not nodes or None in nodes:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return nodes
+
+    def put(self, key, path):
+        """
+        Args:
+            key: Key từ key()
+            path: List Node
+        """
+        coords = np.array([(node.position.x, node.position.y) for node in path], dtype=np.int16)
+        target = self._path(key)
+        temp = f"{target}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp, 'wb') as f:
+                np.save(f, coords, allow_pickle=False)
+            os.replace(temp, target)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: Failed to write plan cache: {e}")
+
+    def clear(self):
+        for name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _entries(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(".npy")]
+        except OSError:
+            return []
+
+    def _evict(self):
+        """
+        Xóa entry ít được dùng gần đây nhất cho tới khi còn max_entries
+        """
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        stamped = []
+        for name in entries:
+            full = os.path.join(self.directory, name)
+            try:
+                stamped.append((os.path.getmtime(full), full))
+            except OSError:
+                pass
+        stamped.sort()
+        for _, full in stamped[:len(stamped) - self.max_entries]:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
@@ -0,0 +1,120 @@
+# =============================================================================
+# PROFILER.PY - ĐO THỜI GIAN FRAME VÀ ĐỘ TRỄ QUYẾT ĐỊNH AI
+# =============================================================================
+# File này chứa Profiler - ghi thời gian của từng phase trong một frame
+# (update, ai, render, flip, frame) vào ring buffer, cùng độ trễ quyết định AI
+# theo (thuật toán, heuristic), và tính p50/p95/p99 cho overlay / stats log.
+# Bật tắt bằng config profiler_enabled; khi tắt mỗi lần đo chỉ là một phép so sánh.
+#
+# Cách dùng:
+#   start = profiler.begin()
+#   ...
+#   profiler.end('render', start)
+
+import time
+from collections import deque
+
+PROFILER_BUFFER_SIZE = 600  # Số mẫu giữ lại cho mỗi phase (~10 giây ở 60 FPS)
+PROFILER_PHASES = ('frame', 'update', 'ai', 'render', 'flip')
+PROFILER_PERCENTILES = (50, 95, 99)
+
+
+class Profiler(object):
+    """
+    Profiler - ring buffer thời gian (giây) theo phase và theo thuật toán AI
+
+    - begin()/end(): đo một phase, không làm gì khi enabled = False
+    - record_ai(): độ trễ một quyết định AI, gắn tag thuật toán + heuristic
+    - percentiles(): p50/p95/p99 (ms) của một buffer
+    - summary(): các dòng tổng hợp để ghi stats log khi hết level
+    """
+    def __init__(self, enabled=False, size=PROFILER_BUFFER_SIZE):
+        self.enabled = enabled
+        self.size = size
+        self.phases = {phase: deque(maxlen=size) for phase in PROFILER_PHASES}
+        self.ai = {}  # (thuật toán, heuristic) -> deque độ trễ quyết định
+
+    def begin(self):
+        """
+        Returns:
+            Thời điểm bắt đầu (perf_counter) hoặc None khi profiler tắt
+        """
+        if not self.enabled:
+            return None
+        return time.perf_counter()
+
+    def end(self, phase, start):
+        """
+        Ghi thời gian từ start (giá trị của begin()) tới hiện tại vào phase
+        """
+        if start is None:
+            return
+        self.record(phase, time.perf_counter() - start)
+
+    def record(self, phase, seconds):
+        if not self.enabled:
+            return
+        samples = self.phases.get(phase)
+        if samples is None:
+            samples = self.phases[phase] = deque(maxlen=self.size)
+        samples.append(seconds)
+
+    def record_ai(self, algorithm, heuristic, seconds):
+        """
+        Ghi độ trễ một quyết định AI vào phase 'ai' và buffer của (algorithm, heuristic)
+        """
+        if not self.enabled:
+            return
+        self.record('ai', seconds)
+        key = (algorithm, heuristic)
+        samples = self.ai.get(key)
+        if samples is None:
+            samples = self.ai[key] = deque(maxlen=self.size)
+        samples.append(seconds)
+
+    @staticmethod
+    def percentiles(samples):
+        """
+        Returns:
+            Tuple (p50, p95, p99) tính bằng ms, (0, 0, 0) khi chưa có mẫu
+        """
+        if not samples:
+            return (0.0,) * len(PROFILER_PERCENTILES)
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(round(percent / 100.0 * last)))] * 1000
+                     for percent in PROFILER_PERCENTILES)
+
+    def summary(self):
+        """
+        Returns:
+            List dict (phase, algorithm, heuristic, samples, p50_ms, p95_ms, p99_ms, max_ms)
+            cho mọi phase có mẫu và mọi cặp thuật toán / heuristic
+        """
+        rows = []
+        tagged = [((phase, "", ""), samples) for phase, samples in self.phases.items()]
+        tagged += [(("ai", algorithm, heuristic), samples)
+                   for (algorithm, heuristic), samples in self.ai.items()]
+        for (phase, algorithm, heuristic), samples in tagged:
+            if not samples:
+                continue
+            p50, p95, p99 = self.percentiles(samples)
+            rows.append({
+                "phase": phase,
+                "algorithm": algorithm,
+                "heuristic": heuristic,
+                "samples": len(samples),
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+                "p99_ms": round(p99, 3),
+                "max_ms": round(max(samples) * 1000, 3),
+            })
+        return rows
+
+    def reset(self):
+        for samples in self.phases.values():
+            samples.clear()
+        self.ai.clear()
+
+
+profiler = Profiler()
@@ -0,0 +1,355 @@
+# =============================================================================
+# SEARCH_STATE.PY - TRẠNG THÁI TÌM KIẾM GỌN NHẸ CHO HYBRIDAISYSTEM
+# =============================================================================
+# File này chứa:
+# - SearchState: trạng thái bất biến dùng __slots__ (Pacman node id, hướng,
+#   ghost node ids + modes, bitset pellet, score, Zobrist key)
+# - SearchModel: dữ liệu tĩnh của một lần quyết định (graph, bảng successor,
+#   thông tin ghost, điểm pellet) + sinh trạng thái kế tiếp
+# - DistanceRows: hàng khoảng cách theo heuristic, tính lười và giữ qua
+#   nhiều quyết định trong cùng maze
+# - PelletField: thứ tự pellet theo khoảng cách cho từng node (distance field
+#   tới pellet gần nhất), giữ suốt một level
+# Minimax, Alpha-Beta, Hill Climbing và Genetic Algorithm mô phỏng trên
+# SearchState thay vì copy.copy các object Pacman/Ghost/PelletGroup.
+
+from constants import *
+from engine.heuristic import Heuristic
+
+INF = float('inf')
+FREIGHT_KEY_BUCKETS = 8  # Số mức lượng tử hóa tỉ lệ FREIGHT còn lại trong Zobrist key
+
+
+class SearchState(object):
+    """
+    SearchState - một trạng thái mô phỏng (không bao giờ bị sửa sau khi tạo)
+
+    - pacman: Node id của Pacman
+    - direction: Hướng Pacman vừa đi
+    - ghosts: Tuple node id của từng ghost (theo thứ tự SearchModel.ghost_names)
+    - modes: Tuple mode của từng ghost (không đổi trong mô phỏng)
+    - pellets: Bitset pellet còn lại (bit i = pellet tại node id i)
+    - score: Score của Pacman (cộng điểm pellet ăn được khi mô phỏng)
+    - key: Zobrist key (không gồm agent đang đi), cập nhật bằng XOR
+    - remaining, capsules: Số pellet / power pellet còn lại
+    - nearest: Khoảng cách từ Pacman tới pellet gần nhất còn lại
+    Các feature remaining/capsules/nearest được cập nhật khi sinh state kế tiếp
+    nên evaluate không phải duyệt lại toàn bộ pellet.
+    """
+    __slots__ = ('pacman', 'direction', 'ghosts', 'modes', 'pellets', 'score', 'key',
+                 'remaining', 'capsules', 'nearest')
+
+    def __init__(self, pacman, direction, ghosts, modes, pellets, score, key,
+                 remaining, capsules, nearest):
+        self.pacman = pacman
+        self.direction = direction
+        self.ghosts = ghosts
+        self.modes = modes
+        self.pellets = pellets
+        self.score = score
+        self.key = key
+        self.remaining = remaining
+        self.capsules = capsules
+        self.nearest = nearest
+
+
+class DistanceRows(object):
+    """
+    DistanceRows - khoảng cách từ một node id tới mọi node id theo heuristic
+
+    - Maze distance có DistanceOracle: lấy thẳng một hàng của ma trận
+    - Heuristic khác: gọi heuristic_func trên Node, tính một lần cho mỗi hàng
+    """
+    def __init__(self, graph, heuristic_func):
+        self.graph = graph
+        self.heuristic_func = heuristic_func
+        self.oracle = None
+        self.rows = {}
+        if heuristic_func == Heuristic.mazedistance and graph.size:
+            oracle = getattr(graph.nodes[0], 'oracle', None)
+            if oracle is not None and oracle.graph is graph:
+                if oracle.is_stale():
+                    oracle.build()
+                self.oracle = oracle
+
+    def matches(self, graph, heuristic_func):
+        """
+        True nếu bảng còn dùng được cho graph và heuristic này
+        """
+        if graph is not self.graph or heuristic_func != self.heuristic_func:
+            return False
+        return self.oracle is None or not self.oracle.is_stale()
+
+    def row(self, index):
+        """
+        Returns:
+            List khoảng cách (theo node id) từ node index; float('inf') nếu không tới được
+        """
+        row = self.rows.get(index)
+        if row is None:
+            if self.oracle is not None:
+                row = [INF if dist < 0 else dist for dist in self.oracle.matrix[index].tolist()]
+            else:
+                nodes = self.graph.nodes
+                source = nodes[index]
+                row = [self.heuristic_func(source, node) for node in nodes]
+            self.rows[index] = row
+        return row
+
+
+class PelletField(object):
+    """
+    PelletField - distance field tới pellet gần nhất, giữ suốt một level
+
+    - orders[node]: pellet id sắp theo khoảng cách từ node (tính lười, một lần)
+    - nearest(): duyệt order tới pellet đầu tiên còn trong bitset; pellet đã bị
+      ăn thật ở đầu order được bỏ hẳn (con trỏ starts), nên mỗi lần tra chỉ
+      tốn ~ số pellet gần đó vừa bị ăn trong mô phỏng
+    """
+    def __init__(self, distances, pellet_ids):
+        """
+        Args:
+            distances: DistanceRows dùng để sắp thứ tự
+            pellet_ids: Node id của mọi pellet trong level
+        """
+        self.distances = distances
+        self.pellet_ids = sorted(pellet_ids)
+        self.universe = 0
+        for index in self.pellet_ids:
+            self.universe |= 1 << index
+        self.alive = self.universe   # Pellet còn trong game thật (gốc của lần quyết định mới nhất)
+        self.orders = {}
+        self.starts = {}
+
+    def covers(self, distances, pellets):
+        """
+        True nếu field dùng được cho DistanceRows và tập pellet này
+        """
+        return distances is self.distances and not (pellets & ~self.universe)
+
+    def update(self, pellets):
+        """
+        Gọi ở gốc mỗi lần quyết định với bitset pellet thật còn lại
+        """
+        self.alive = pellets
+
+    def nearest(self, node, pellets):
+        """
+        Returns:
+            Khoảng cách từ node tới pellet gần nhất trong bitset pellets (0 nếu rỗng)
+        """
+        if not pellets:
+            return 0
+        row = self.distances.row(node)
+        order = self.orders.get(node)
+        if order is None:
+            order = sorted(self.pellet_ids, key=row.__getitem__)
+            self.orders[node] = order
+            self.starts[node] = 0
+        start = self.starts[node]
+        alive = self.alive
+        while start < len(order) and not (alive >> order[start] & 1):
+            start += 1
+        self.starts[node] = start
+        for position in range(start, len(order)):
+            index = order[position]
+            if pellets >> index & 1:
+                return row[index]
+        return 0
+
+
+class SearchModel(object):
+    """
+    SearchModel - phần không đổi của bài toán trong một lần quyết định
+
+    - legal_actions(): giống HybridAISystem.get_legal_actions_for_agent cũ
+      (thứ tự UP, DOWN, LEFT, RIGHT, PORTAL; kiểm tra access theo entity name)
+    - apply(): đi theo neighbor (không kiểm tra access, như mô phỏng cũ),
+      Pacman ăn pellet tại node mới
+    - closest_ghosts(): các ghost gần Pacman nhất là agent 1..n
+    """
+    def __init__(self, graph, distances, field, zobrist, max_ghosts):
+        """
+        Args:
+            graph: CompiledGraph của maze
+            distances: DistanceRows cho heuristic hiện tại
+            field: PelletField trên cùng DistanceRows
+            zobrist: ZobristHasher của graph
+            max_ghosts: Số ghost tối đa được mô phỏng
+        """
+        self.graph = graph
+        self.distances = distances
+        self.field = field
+        self.zobrist = zobrist
+        self.max_ghosts = max_ghosts
+        self.neighbor_rows = graph.neighborRows
+        self.direction_slot = graph.directionSlot
+        self.pacman_moves = graph.successorDirections(PACMAN, portals=True)
+
+        self.ghost_names = ()
+        self.ghost_moves = ()
+        self.ghost_visible = ()
+        self.ghost_freight = ()      # Tỉ lệ thời gian FREIGHT còn lại, None nếu không FREIGHT
+        self.ghost_keys = ()         # Zobrist key theo node id của từng ghost (đã gồm mode)
+        self.pellet_points = {}      # node id -> điểm pellet
+        self.power_bits = 0          # Bitset các power pellet
+        self.root = None
+
+    @classmethod
+    def from_game(cls, graph, distances, field, zobrist, pacman, ghostgroup, pellet_group, max_ghosts):
+        """
+        Dựng SearchModel và trạng thái gốc từ object của game
+        Args:
+            field: PelletField hiện có (None hoặc không khớp thì dựng mới)
+        Returns:
+            SearchModel (model.root là SearchState gốc) hoặc None nếu Pacman không thuộc graph
+        """
+        pacman_node = getattr(pacman, 'node', None)
+        if pacman_node is None or not graph.owns(pacman_node):
+            return None
+        model = cls(graph, distances, field, zobrist, max_ghosts)
+
+        names, moves, visible, freight, keys, ghost_ids, modes = [], [], [], [], [], [], []
+        for ghost in (getattr(ghostgroup, 'ghosts', None) or ()):
+            ghost_node = getattr(ghost, 'node', None)
+            if ghost_node is None or not graph.owns(ghost_node):
+                continue
+            name = getattr(ghost, 'name', GHOST)
+            mode_controller = getattr(ghost, 'mode', None)
+            mode = getattr(mode_controller, 'current', None)
+            is_visible = getattr(ghost, 'visible', True)
+            ratio = None
+            if mode == FREIGHT:
+                time_total = float(getattr(mode_controller, 'time', 0) or 0)
+                time_timer = float(getattr(mode_controller, 'timer', 0) or 0)
+                ratio = max(0, time_total - time_timer) / (time_total + 0.0001)
+            names.append(name)
+            moves.append(graph.successorDirections(name, portals=True))
+            visible.append(is_visible)
+            freight.append(ratio)
+            # Value trong transposition table phụ thuộc tỉ lệ FREIGHT (PowerPlayValue)
+            # nên key gồm tỉ lệ đã lượng tử hóa
+            bucket = None if ratio is None else min(FREIGHT_KEY_BUCKETS - 1, int(ratio * FREIGHT_KEY_BUCKETS))
+            keys.append(zobrist.ghost_keys(name, (mode, is_visible, bucket)))
+            ghost_ids.append(ghost_node.index)
+            modes.append(mode)
+        model.ghost_names = tuple(names)
+        model.ghost_moves = tuple(moves)
+        model.ghost_visible = tuple(visible)
+        model.ghost_freight = tuple(freight)
+        model.ghost_keys = tuple(keys)
+
+        if hasattr(pellet_group, 'nodeBits'):
+            # View của PelletGroup, cập nhật tăng dần khi ăn - không quét pellet
+            pellets, model.power_bits, model.pellet_points = pellet_group.nodeBits(graph)
+        else:
+            pellets = 0
+            for pellet in (getattr(pellet_group, 'pelletList', None) or ()):
+                node = getattr(pellet, 'node', None)
+                if node is None or not getattr(pellet, 'visible', True) or not graph.owns(node):
+                    continue
+                bit = 1 << node.index
+                pellets |= bit
+                model.pellet_points[node.index] = getattr(pellet, 'points', 0)
+                if getattr(pellet, 'name', None) == POWERPELLET:
+                    model.power_bits |= bit
+
+        if field is None or not field.covers(distances, pellets):
+            field = PelletField(distances, model.pellet_points)
+        field.update(pellets)
+        model.field = field
+
+        ghost_ids = tuple(ghost_ids)
+        key = zobrist.pellets_hash(model.pellet_points) ^ zobrist.pacman_keys[pacman_node.index]
+        for ghost_keys, ghost_id in zip(model.ghost_keys, ghost_ids):
+            key ^= ghost_keys[ghost_id]
+        model.root = SearchState(
+            pacman_node.index,
+            getattr(pacman, 'direction', STOP),
+            ghost_ids,
+            tuple(modes),
+            pellets,
+            getattr(pacman, 'score', 0),
+            key,
+            len(model.pellet_points),
+            bin(model.power_bits).count('1'),
+            field.nearest(pacman_node.index, pellets),
+        )
+        return model
+
+    def closest_ghosts(self, state):
+        """
+        Index (trong state.ghosts) của các ghost gần Pacman nhất, tối đa max_ghosts
+        """
+        row = self.distances.row(state.pacman)
+        ghosts = state.ghosts
+        order = sorted(range(len(ghosts)), key=lambda slot: row[ghosts[slot]])
+        return order[:self.max_ghosts]
+
+    def legal_actions(self, state, agent_index):
+        if agent_index == 0:
+            return [direction for _, direction in self.pacman_moves[state.pacman]]
+        closest = self.closest_ghosts(state)
+        if agent_index - 1 >= len(closest):
+            return []
+        slot = closest[agent_index - 1]
+        return [direction for _, direction in self.ghost_moves[slot][state.ghosts[slot]]]
+
+    def apply(self, state, action, agent_index):
+        """
+        Returns:
+            SearchState kế tiếp (chính state nếu action không đi được)
+        """
+        slot = self.direction_slot.get(action)
+        if slot is None:
+            return state
+        if agent_index == 0:
+            target = self.neighbor_rows[state.pacman][slot]
+            if target < 0:
+                return state
+            return self.move_pacman(state, target, action)
+
+        closest = self.closest_ghosts(state)
+        if agent_index - 1 >= len(closest):
+            return state
+        ghost_slot = closest[agent_index - 1]
+        target = self.neighbor_rows[state.ghosts[ghost_slot]][slot]
+        if target < 0:
+            return state
+        return self.move_ghost(state, ghost_slot, target)
+
+    def move_pacman(self, state, target, direction):
+        """
+        Pacman đi tới node id target (ăn pellet nếu có)
+        """
+        zobrist = self.zobrist
+        key = state.key ^ zobrist.pacman_keys[state.pacman] ^ zobrist.pacman_keys[target]
+        pellets = state.pellets
+        score = state.score
+        remaining = state.remaining
+        capsules = state.capsules
+        bit = 1 << target
+        if pellets & bit:
+            pellets ^= bit
+            score += self.pellet_points[target]
+            key ^= zobrist.pellet_keys[target]
+            remaining -= 1
+            if self.power_bits & bit:
+                capsules -= 1
+        nearest = self.field.nearest(target, pellets)
+        return SearchState(target, direction, state.ghosts, state.modes, pellets, score, key,
+                           remaining, capsules, nearest)
+
+    def move_ghost(self, state, ghost_slot, target):
+        """
+        Ghost thứ ghost_slot (trong state.ghosts) đi tới node id target
+        """
+        current = state.ghosts[ghost_slot]
+        ghost_keys = self.ghost_keys[ghost_slot]
+        ghosts = state.ghosts[:ghost_slot] + (target,) + state.ghosts[ghost_slot + 1:]
+        key = state.key ^ ghost_keys[current] ^ ghost_keys[target]
+        return SearchState(state.pacman, state.direction, ghosts, state.modes, state.pellets, state.score, key,
+                           state.remaining, state.capsules, state.nearest)
+
+    def is_terminal(self, state):
+        return state.pacman in state.ghosts or not state.remaining
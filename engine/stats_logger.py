@@ -21,6 +21,8 @@ class StatsLogger:
     """
     
     CSV_PATH = os.path.join("stats", "game_stats.csv")
+    TOURNAMENT_CSV_PATH = os.path.join("stats", "tournament_stats.csv")
+    PROFILE_CSV_PATH = os.path.join("stats", "profile_stats.csv")
     
     HEADERS = [
         "timestamp",           # Thời điểm chơi (ISO format)
@@ -51,6 +53,43 @@ class StatsLogger:
         "result",              # Kết quả (GAME_OVER, WIN, QUIT)
     ]
     
+    # Cột của một ván tournament (engine/tournament.py, mô phỏng headless)
+    TOURNAMENT_HEADERS = [
+        "timestamp",           # Thời điểm ván kết thúc (ISO format)
+        "algorithm",           # Thuật toán sử dụng
+        "heuristic",           # Heuristic sử dụng
+        "maze",                # Maze (level bắt đầu)
+        "ghost_mode",          # Chế độ ghost (True/False)
+        "seed",                # Seed của ván
+        "result",              # LEVEL_COMPLETE, GAME_OVER, TIMEOUT, ERROR
+        "score",               # Điểm số
+        "total_steps",         # Tổng số bước
+        "pellets_total",       # Tổng số pellets
+        "pellets_eaten",       # Số pellets đã ăn
+        "lives_lost",          # Số mạng đã chết
+        "sim_time_sec",        # Thời gian mô phỏng (giây)
+        "wall_time_sec",       # Thời gian chạy thật (giây)
+        "decisions",           # Số quyết định AI
+        "decision_ms_mean",    # Thời gian trung bình một quyết định (ms)
+        "decision_ms_p95",     # Percentile 95 thời gian quyết định (ms)
+        "decision_ms_max",     # Thời gian quyết định lâu nhất (ms)
+    ]
+    
+    # Percentile thời gian frame / quyết định AI của một level (engine/profiler.py)
+    PROFILE_HEADERS = [
+        "timestamp",           # Thời điểm hết level (ISO format)
+        "level",               # Level vừa kết thúc
+        "result",              # LEVEL_COMPLETE, WIN, GAME_OVER
+        "phase",               # frame, update, ai, render, flip
+        "algorithm",           # Thuật toán (chỉ với dòng ai theo thuật toán)
+        "heuristic",           # Heuristic (chỉ với dòng ai theo thuật toán)
+        "samples",             # Số mẫu trong ring buffer
+        "p50_ms",              # Percentile 50 (ms)
+        "p95_ms",              # Percentile 95 (ms)
+        "p99_ms",              # Percentile 99 (ms)
+        "max_ms",              # Lâu nhất (ms)
+    ]
+    
     @classmethod
     def log(cls, stats: dict):
         """
@@ -59,23 +98,52 @@ class StatsLogger:
         Args:
             stats: Dictionary chứa thống kê game
         """
+        cls._append_row(cls.CSV_PATH, cls.HEADERS, stats)
+    
+    @classmethod
+    def log_tournament(cls, stats: dict, path=None):
+        """
+        Ghi kết quả một ván tournament vào CSV riêng (không lẫn với game_stats.csv)
+        
+        Args:
+            stats: Dictionary kết quả ván (theo TOURNAMENT_HEADERS)
+            path: File CSV, mặc định TOURNAMENT_CSV_PATH
+        """
+        cls._append_row(path or cls.TOURNAMENT_CSV_PATH, cls.TOURNAMENT_HEADERS, stats)
+    
+    @classmethod
+    def log_profile(cls, rows, path=None):
+        """
+        Ghi các dòng percentile của Profiler.summary() vào CSV riêng
+        
+        Args:
+            rows: List dictionary (theo PROFILE_HEADERS)
+            path: File CSV, mặc định PROFILE_CSV_PATH
+        """
+        for row in rows:
+            cls._append_row(path or cls.PROFILE_CSV_PATH, cls.PROFILE_HEADERS, row)
+    
+    @classmethod
+    def _append_row(cls, path, headers, stats):
         try:
             # Tạo thư mục stats nếu chưa tồn tại
-            os.makedirs(os.path.dirname(cls.CSV_PATH), exist_ok=True)
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             
             # Kiểm tra xem file có tồn tại và có dữ liệu không
-            is_new_file = not os.path.exists(cls.CSV_PATH) or os.path.getsize(cls.CSV_PATH) == 0
+            is_new_file = not os.path.exists(path) or os.path.getsize(path) == 0
             
             # Mở file ở chế độ append
-            with open(cls.CSV_PATH, "a", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=cls.HEADERS)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=headers)
                 
                 # Ghi header nếu file mới
                 if is_new_file:
                     writer.writeheader()
                 
                 # Chuẩn bị row data
-                row = {key: stats.get(key, "") for key in cls.HEADERS}
+                row = {key: stats.get(key, "") for key in headers}
                 
                 # Ghi row
                 writer.writerow(row)
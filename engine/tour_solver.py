@@ -0,0 +1,279 @@
+# =============================================================================
+# TOUR_SOLVER.PY - GIẢI TOUR ĂN PELLET (HELD-KARP / LOCAL SEARCH)
+# =============================================================================
+# Offline engine: tính ma trận khoảng cách maze giữa Pacman và các pellet,
+# rồi tìm thứ tự ăn pellet ngắn nhất
+# - <= HELD_KARP_LIMIT pellet: Held-Karp (DP trên bitmask), lời giải chính xác
+# - Nhiều hơn: nearest neighbour + cải thiện bằng 2-opt / Or-opt
+# Tour được nối lại thành path node đầy đủ để ComputeOnceSystem đi theo.
+
+from collections import deque
+import numpy as np
+from constants import *
+from engine.algorithms_practical import (get_visible_pellet_nodes, get_compiled_graph,
+                                         cancel_event, check_cancelled)
+
+HELD_KARP_LIMIT = 16    # Số pellet tối đa giải chính xác bằng Held-Karp
+OR_OPT_SEGMENTS = 3     # Độ dài đoạn tối đa khi dời chỗ bằng Or-opt
+TOUR_INF = 1 << 28      # "Vô cực" trong ma trận khoảng cách (int32, cộng không tràn)
+
+
+def held_karp(startNode, pellet_group, heuristic_func=None):
+    """
+    Engine tour cho offline mode (ComputeOnceSystem)
+    Args:
+        startNode: Node hiện tại của Pacman
+        pellet_group: PelletGroup
+        heuristic_func: Không dùng (khoảng cách là maze distance chính xác)
+    Returns:
+        List Node từ startNode đi qua mọi pellet tới được, hoặc None
+    """
+    print("Held-Karp")
+
+    if not pellet_group or not pellet_group.pelletList:
+        return None
+
+    pellet_nodes = get_visible_pellet_nodes(pellet_group)
+    if not pellet_nodes:
+        return None
+
+    graph = get_compiled_graph(startNode)
+    start = startNode.index
+    targets = sorted(index for index in graph.ids(pellet_nodes) if index != start)
+    if not targets:
+        return [startNode]
+
+    stops, dist, parents = build_tour_matrix(graph, start, targets)
+    if len(stops) == 1:
+        return [startNode]
+
+    if len(stops) - 1 <= HELD_KARP_LIMIT:
+        order = held_karp_tour(dist)
+    else:
+        order = improve_tour(dist, nearest_neighbour_tour(dist))
+
+    path = [start]
+    for a, b in zip(order, order[1:]):
+        path.extend(trace_path(parents[a], stops[b])[1:])
+    return graph.toNodes(path)
+
+
+def build_tour_matrix(graph, start, targets):
+    """
+    BFS từ Pacman và từng pellet (không qua portal, giống các engine offline)
+    Args:
+        graph: CompiledGraph
+        start: Node id của Pacman
+        targets: List node id của pellet
+    Returns:
+        (stops, dist, parents)
+        - stops: [start] + các pellet tới được từ start
+        - dist: ma trận int32 (len(stops) x len(stops)), stop 0 là Pacman
+        - parents: mảng parent BFS của từng stop để dựng lại path
+    """
+    cancel = cancel_event()
+    successors = graph.successorLists(PACMAN)
+    start_dist, start_parents = bfs_tree(successors, graph.size, start)
+    stops = [start] + [t for t in targets if start_dist[t] >= 0]
+
+    size = len(stops)
+    dist = np.full((size, size), TOUR_INF, dtype=np.int32)
+    parents = [start_parents]
+    rows = [start_dist]
+    for stop in stops[1:]:
+        check_cancelled(cancel)
+        stop_dist, stop_parents = bfs_tree(successors, graph.size, stop)
+        rows.append(stop_dist)
+        parents.append(stop_parents)
+
+    for i, row in enumerate(rows):
+        for j, stop in enumerate(stops):
+            if row[stop] >= 0:
+                dist[i, j] = row[stop]
+    return stops, dist, parents
+
+
+def bfs_tree(successors, size, source):
+    """
+    BFS trên node id
+    Returns:
+        (dist, parents): list khoảng cách (-1 nếu không tới được) và parent
+    """
+    dist = [-1] * size
+    parents = [-1] * size
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        current = queue.popleft()
+        next_dist = dist[current] + 1
+        for neighbor in successors[current]:
+            if dist[neighbor] < 0:
+                dist[neighbor] = next_dist
+                parents[neighbor] = current
+                queue.append(neighbor)
+    return dist, parents
+
+
+def trace_path(parents, index):
+    """
+    Dựng lại list node id từ gốc BFS tới index
+    """
+    path = []
+    while index != -1:
+        path.append(index)
+        index = parents[index]
+    path.reverse()
+    return path
+
+
+def tour_length(dist, order):
+    """
+    Tổng số bước của tour mở (không quay về điểm xuất phát)
+    """
+    return int(sum(dist[a, b] for a, b in zip(order, order[1:])))
+
+
+def nearest_neighbour_tour(dist):
+    """
+    Baseline greedy: luôn đi tới pellet gần nhất chưa ăn
+    Returns:
+        Thứ tự stop, bắt đầu bằng 0 (Pacman)
+    """
+    size = len(dist)
+    visited = np.zeros(size, dtype=bool)
+    visited[0] = True
+    order = [0]
+    current = 0
+    for _ in range(size - 1):
+        row = np.where(visited, TOUR_INF + 1, dist[current])
+        current = int(row.argmin())
+        visited[current] = True
+        order.append(current)
+    return order
+
+
+def held_karp_tour(dist):
+    """
+    Held-Karp cho tour mở từ stop 0, tính theo từng lớp popcount bằng NumPy
+    - cost[mask, j]: số bước ngắn nhất đi từ Pacman qua tập pellet mask, kết thúc tại j
+    - Mỗi lớp (số pellet đã ăn) được cập nhật vector hóa cho mọi mask cùng lúc
+    Returns:
+        Thứ tự stop tối ưu, bắt đầu bằng 0
+    """
+    cancel = cancel_event()
+    count = len(dist) - 1
+    pellet_dist = dist[1:, 1:].astype(np.int64)
+    full = (1 << count) - 1
+
+    popcount = np.zeros(1 << count, dtype=np.int8)
+    for bit in range(count):
+        popcount[1 << bit:1 << (bit + 1)] = popcount[:1 << bit] + 1
+
+    cost = np.full((1 << count, count), TOUR_INF, dtype=np.int64)
+    parent = np.full((1 << count, count), -1, dtype=np.int8)
+    for j in range(count):
+        cost[1 << j, j] = dist[0, j + 1]
+
+    for layer in range(1, count):
+        check_cancelled(cancel)
+        masks = np.nonzero(popcount == layer)[0]
+        layer_cost = cost[masks]
+        for j in range(count):
+            bit = 1 << j
+            free = (masks & bit) == 0
+            if not free.any():
+                continue
+            candidates = layer_cost[free] + pellet_dist[:, j]
+            best = candidates.argmin(axis=1)
+            targets = masks[free] | bit
+            cost[targets, j] = candidates[np.arange(len(best)), best]
+            parent[targets, j] = best
+
+    last = int(cost[full].argmin())
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    order.append(0)
+    order.reverse()
+    return order
+
+
+def improve_tour(dist, order):
+    """
+    Cải thiện tour mở bằng 2-opt và Or-opt cho tới khi không còn bước nào tốt hơn
+    Stop 0 (Pacman) luôn đứng đầu
+    """
+    order = list(order)
+    improved = True
+    while improved:
+        improved = two_opt_pass(dist, order)
+        improved = or_opt_pass(dist, order) or improved
+    return order
+
+
+def two_opt_pass(dist, order):
+    """
+    Một lượt 2-opt: đảo ngược đoạn order[i..j] nếu tour ngắn lại
+    Returns:
+        True nếu có cải thiện
+    """
+    cancel = cancel_event()
+    improved = False
+    size = len(order)
+    for i in range(1, size - 1):
+        check_cancelled(cancel)
+        tour = np.array(order)
+        a, b = tour[i - 1], tour[i]
+        cs = tour[i + 1:]
+        ds = np.append(tour[i + 2:], -1)
+        # Đảo đoạn [i..j]: cạnh (a, b) + (c, d) thành (a, c) + (b, d); cuối tour không có d
+        before = dist[a, b] + np.where(ds >= 0, dist[cs, ds], 0)
+        after = dist[a, cs] + np.where(ds >= 0, dist[b, ds], 0)
+        gains = before - after
+        best = int(gains.argmax())
+        if gains[best] > 0:
+            # Kiểm tra lại trên cả tour vì access có thể làm khoảng cách không đối xứng
+            j = i + 1 + best
+            candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+            if tour_length(dist, candidate) < tour_length(dist, order):
+                order[:] = candidate
+                improved = True
+    return improved
+
+
+def or_opt_pass(dist, order):
+    """
+    Một lượt Or-opt: dời một đoạn 1..OR_OPT_SEGMENTS stop sang vị trí khác
+    Returns:
+        True nếu có cải thiện
+    """
+    cancel = cancel_event()
+    improved = False
+    for length in range(1, OR_OPT_SEGMENTS + 1):
+        i = 1
+        while i + length <= len(order):
+            check_cancelled(cancel)
+            segment = order[i:i + length]
+            rest = order[:i] + order[i + length:]
+            current = tour_length(dist, order)
+            tour = np.array(rest)
+            first, last = segment[0], segment[-1]
+            # Chèn đoạn vào sau rest[k]: cạnh (rest[k], rest[k+1]) thành
+            # (rest[k], first) + (last, rest[k+1]); cuối tour không có rest[k+1]
+            left = tour
+            right = np.append(tour[1:], -1)
+            added = dist[left, first] + np.where(right >= 0, dist[last, right], 0)
+            removed = np.where(right >= 0, dist[left, right], 0)
+            base = tour_length(dist, rest) + tour_length(dist, segment)
+            totals = base + added - removed
+            k = int(totals.argmin())
+            if totals[k] < current:
+                order[:] = rest[:k + 1] + segment + rest[k + 1:]
+                improved = True
+            else:
+                i += 1
+    return improved
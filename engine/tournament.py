@@ -0,0 +1,264 @@
+# =============================================================================
+# TOURNAMENT.PY - CHẠY TOURNAMENT GIỮA CÁC THUẬT TOÁN (HEADLESS, NHIỀU PROCESS)
+# =============================================================================
+# Chạy ma trận algorithm x heuristic x maze x ghost mode x seed bằng Game
+# headless (dt cố định), mỗi ván trong một worker của process pool.
+# Kết quả từng ván được ghi ngay vào stats/tournament_stats.csv (StatsLogger)
+# khi worker trả về, cuối cùng in bảng tổng hợp.
+#
+# Cách dùng (chạy từ thư mục gốc của repo để load được assets/):
+#   python -m engine.tournament
+#   python -m engine.tournament --algorithms A* Alpha-Beta --heuristics MAZEDISTANCE \
+#       --mazes 0 --ghosts on --seeds 5 --workers 4
+
+import argparse
+import contextlib
+import datetime
+import itertools
+import multiprocessing
+import os
+import time
+
+ALGORITHMS = [
+    'BFS', 'DFS', 'IDS', 'UCS', 'A*', 'Greedy', 'Held-Karp',
+    'Hill Climbing', 'Genetic Algorithm', 'Minimax', 'Alpha-Beta',
+    'MCTS', 'GBFS', 'A* Online',
+]
+HEURISTICS = ['NONE', 'MANHATTAN', 'EUCLIDEAN', 'MAZEDISTANCE']
+MAZES = [0, 1]                # Level bắt đầu: 0 = maze1, 1 = maze2
+GHOST_MODES = [True, False]
+
+DEFAULT_SEEDS = 3
+DEFAULT_MAX_SECONDS = 300.0   # Thời gian mô phỏng tối đa của một ván (giây)
+CHECK_FRAMES = 30             # Số frame giữa hai lần kiểm tra kết thúc ván
+SUMMARY_KEYS = ['algorithm', 'heuristic', 'maze', 'ghost_mode', 'seed']
+
+
+def build_matches(algorithms, heuristics, mazes, ghost_modes, seeds, max_seconds):
+    """
+    Tạo danh sách ván đấu cho toàn bộ ma trận
+    Returns:
+        List dict, mỗi dict mô tả một ván
+    """
+    return [
+        {
+            'algorithm': algorithm,
+            'heuristic': heuristic,
+            'maze': maze,
+            'ghost_mode': ghost_mode,
+            'seed': seed,
+            'max_seconds': max_seconds,
+        }
+        for algorithm, heuristic, maze, ghost_mode, seed
+        in itertools.product(algorithms, heuristics, mazes, ghost_modes, seeds)
+    ]
+
+
+def play_match(match):
+    """
+    Chạy một ván headless cho tới khi ăn hết pellet của maze, hết mạng
+    hoặc hết thời gian mô phỏng (chạy trong worker process)
+    Args:
+        match: Dict từ build_matches()
+    Returns:
+        Dict kết quả theo StatsLogger.TOURNAMENT_HEADERS, kèm 'latencies'
+        (list thời gian quyết định, giây) cho bảng tổng hợp
+    """
+    row = dict(match)
+    row.pop('max_seconds', None)
+    row.pop('plan_cache', None)
+    wall_start = time.perf_counter()
+    try:
+        # Các thuật toán in log mỗi quyết định - bỏ đi để không làm chậm worker
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            game = _run_game(match)
+    except Exception as e:
+        row.update(result='ERROR', wall_time_sec=round(time.perf_counter() - wall_start, 3),
+                   error=str(e), latencies=[])
+        return row
+
+    stats = game.get_stats()
+    latencies = list(game.pacman.decision_times)
+    if game.pellets.isEmpty() or game.level != match['maze']:
+        result = 'LEVEL_COMPLETE'
+    elif game.result == 'GAME_OVER':
+        result = 'GAME_OVER'
+    else:
+        result = 'TIMEOUT'
+
+    row.update(
+        result=result,
+        score=game.score,
+        total_steps=game.total_steps,
+        pellets_total=stats['pellets_total'],
+        pellets_eaten=stats['pellets_eaten'],
+        lives_lost=game.lives_lost,
+        sim_time_sec=round(game.sim_time, 2),
+        wall_time_sec=round(time.perf_counter() - wall_start, 3),
+        decisions=len(latencies),
+        decision_ms_mean=round(_mean(latencies) * 1000, 3),
+        decision_ms_p95=round(_percentile(latencies, 95) * 1000, 3),
+        decision_ms_max=round(max(latencies, default=0.0) * 1000, 3),
+        latencies=latencies,
+    )
+    return row
+
+
+def _run_game(match):
+    from engine.game import Game
+    from engine.compute_once_system import compute_once
+
+    compute_once.reset()
+    compute_once.curent_level = match['maze']
+
+    heuristic = match['heuristic']
+    # Plan cache tắt mặc định để thời gian quyết định đo đúng thuật toán
+    config = {'algorithm_heuristic': heuristic, 'ai_plan_cache': match.get('plan_cache', False)}
+    game = Game(match['algorithm'], config, headless=True, seed=match['seed'])
+    game.algorithm_heuristic = heuristic
+    game.level = match['maze']
+    game.startGame()
+    game.set_algorithm(match['algorithm'])
+    game.set_ghost_mode(match['ghost_mode'])
+
+    max_frames = int(match['max_seconds'] / game.fixed_dt)
+    frames = 0
+    while frames < max_frames and game.running:
+        game.step(CHECK_FRAMES)
+        frames += CHECK_FRAMES
+        if game.pellets.isEmpty() or game.level != match['maze']:
+            break
+    return game
+
+
+def run_tournament(matches, workers=None, output=None):
+    """
+    Chạy các ván trong process pool, ghi từng kết quả vào CSV ngay khi xong
+    Args:
+        matches: List ván từ build_matches()
+        workers: Số process (mặc định: số core)
+        output: File CSV kết quả (mặc định StatsLogger.TOURNAMENT_CSV_PATH)
+    Returns:
+        List kết quả của các ván
+    """
+    from engine.stats_logger import StatsLogger
+
+    workers = workers or os.cpu_count() or 1
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes=workers) as pool:
+        for index, row in enumerate(pool.imap_unordered(play_match, matches), 1):
+            row['timestamp'] = datetime.datetime.now().isoformat(timespec="seconds")
+            StatsLogger.log_tournament(row, output)
+            results.append(row)
+            status = row['result'] if 'error' not in row else f"ERROR ({row['error']})"
+            print(f"[{index}/{len(matches)}] {row['algorithm']} / {row['heuristic']} / "
+                  f"maze {row['maze']} / ghosts {'on' if row['ghost_mode'] else 'off'} / "
+                  f"seed {row['seed']}: {status}, score {row.get('score', 0)}")
+    print(f"Tournament: {len(matches)} games on {workers} workers "
+          f"in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def summarize(results, keys=('algorithm', 'heuristic')):
+    """
+    Gom kết quả theo keys
+    Returns:
+        List dict: games, avg_score, avg_steps, win_rate, decision_ms_mean, decision_ms_p95
+    """
+    groups = {}
+    for row in results:
+        groups.setdefault(tuple(row[key] for key in keys), []).append(row)
+
+    summary = []
+    for group_key, rows in groups.items():
+        played = [row for row in rows if row['result'] != 'ERROR']
+        latencies = [value for row in played for value in row['latencies']]
+        entry = dict(zip(keys, group_key))
+        entry.update(
+            games=len(rows),
+            errors=len(rows) - len(played),
+            avg_score=_mean([row['score'] for row in played]),
+            avg_steps=_mean([row['total_steps'] for row in played]),
+            win_rate=100.0 * sum(row['result'] == 'LEVEL_COMPLETE' for row in played) / max(1, len(played)),
+            decision_ms_mean=_mean(latencies) * 1000,
+            decision_ms_p95=_percentile(latencies, 95) * 1000,
+        )
+        summary.append(entry)
+    summary.sort(key=lambda entry: (-entry['win_rate'], -entry['avg_score']))
+    return summary
+
+
+def print_summary(summary, keys=('algorithm', 'heuristic')):
+    """
+    In bảng tổng hợp score, steps, win rate và thời gian quyết định
+    """
+    columns = list(keys) + ['games', 'score', 'steps', 'win %', 'ms/dec', 'p95 ms']
+    rows = [
+        [str(entry[key]) for key in keys] + [
+            f"{entry['games']}" + (f" ({entry['errors']} err)" if entry['errors'] else ""),
+            f"{entry['avg_score']:.0f}",
+            f"{entry['avg_steps']:.0f}",
+            f"{entry['win_rate']:.0f}",
+            f"{entry['decision_ms_mean']:.2f}",
+            f"{entry['decision_ms_p95']:.2f}",
+        ]
+        for entry in summary
+    ]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) if rows else len(column)
+              for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _ghost_mode(value):
+    if value.lower() in ('on', 'true', '1'):
+        return True
+    if value.lower() in ('off', 'false', '0'):
+        return False
+    raise argparse.ArgumentTypeError(f"ghost mode must be on/off, got {value!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless Pac-Man tournament: algorithm x heuristic x maze x ghost mode x seed")
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS, metavar='ALG')
+    parser.add_argument('--heuristics', nargs='+', default=HEURISTICS, choices=HEURISTICS)
+    parser.add_argument('--mazes', nargs='+', type=int, default=MAZES, choices=MAZES)
+    parser.add_argument('--ghosts', nargs='+', type=_ghost_mode, default=GHOST_MODES, metavar='on|off')
+    parser.add_argument('--seeds', type=int, default=DEFAULT_SEEDS, help="Seeds 0..N-1 per configuration")
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                        help="Simulated time limit per game")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--output', default=None, help="Result CSV (default: stats/tournament_stats.csv)")
+    parser.add_argument('--plan-cache', action='store_true',
+                        help="Reuse offline master paths from the on-disk plan cache")
+    parser.add_argument('--by', nargs='+', default=['algorithm', 'heuristic'], choices=SUMMARY_KEYS,
+                        help="Columns to group the summary table by")
+    args = parser.parse_args(argv)
+
+    matches = build_matches(args.algorithms, args.heuristics, args.mazes, args.ghosts,
+                            range(args.seeds), args.max_seconds)
+    for match in matches:
+        match['plan_cache'] = args.plan_cache
+    results = run_tournament(matches, args.workers, args.output)
+    print()
+    print_summary(summarize(results, args.by), args.by)
+
+
+if __name__ == "__main__":
+    main()
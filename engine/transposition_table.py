@@ -0,0 +1,147 @@
+# =============================================================================
+# TRANSPOSITION_TABLE.PY - ZOBRIST HASHING + BẢNG TRANSPOSITION CHO MINIMAX
+# =============================================================================
+# File này chứa:
+# - ZobristHasher: key 64-bit cho trạng thái tìm kiếm (Pacman node, ghost node
+#   và mode, tập pellet còn lại, agent đang đi), cập nhật được bằng XOR
+# - TranspositionTable: bảng giới hạn kích thước lưu (depth, value, bound,
+#   best move) theo key, loại bỏ entry theo LRU, ưu tiên giữ entry sâu hơn
+
+import random
+from collections import OrderedDict
+
+# Loại bound của value lưu trong bảng (Alpha-Beta)
+EXACT = 0   # Giá trị chính xác
+LOWER = 1   # Fail-high: giá trị thật >= value
+UPPER = 2   # Fail-low: giá trị thật <= value
+
+DEFAULT_TABLE_SIZE = 50000  # Số entry tối đa
+ZOBRIST_SEED = 0x5EED       # Seed cố định để key ổn định giữa các lần chạy
+
+
+class ZobristHasher(object):
+    """
+    ZobristHasher - sinh key ngẫu nhiên 64-bit cho từng thành phần của trạng thái
+
+    - Key của một trạng thái là XOR các key thành phần
+    - Node được đánh index theo node id của CompiledGraph
+    - Pellet hash được cập nhật tăng dần: ăn pellet tại node n -> XOR pellet_keys[n]
+    """
+    def __init__(self, graph, seed=ZOBRIST_SEED):
+        """
+        Args:
+            graph: CompiledGraph của maze hiện tại
+            seed: Seed cho bộ sinh số ngẫu nhiên
+        """
+        self.graph = graph
+        self._random = random.Random(seed)
+        size = graph.size
+        self.pacman_keys = self._keys(size)
+        self.pellet_keys = self._keys(size)
+        self.ghost_node_keys = {}  # ghost name -> list key theo node id
+        self.mode_keys = {}        # (ghost name, mode) -> key
+        self.ghost_tables = {}     # (ghost name, mode) -> list key đã gồm mode
+        self.agent_keys = {}       # agent index -> key
+
+    def _keys(self, count):
+        return [self._random.getrandbits(64) for _ in range(count)]
+
+    def _lazy_key(self, table, key):
+        value = table.get(key)
+        if value is None:
+            value = self._random.getrandbits(64)
+            table[key] = value
+        return value
+
+    def ghost_keys(self, name, mode):
+        """
+        List key theo node id của một ghost ở một mode (đã XOR key của mode)
+        """
+        keys = self.ghost_tables.get((name, mode))
+        if keys is None:
+            base = self.ghost_node_keys.get(name)
+            if base is None:
+                base = self._keys(self.graph.size)
+                self.ghost_node_keys[name] = base
+            mode_key = self._lazy_key(self.mode_keys, (name, mode))
+            keys = [key ^ mode_key for key in base]
+            self.ghost_tables[(name, mode)] = keys
+        return keys
+
+    def agent_key(self, agent_index):
+        return self._lazy_key(self.agent_keys, agent_index)
+
+    def pellets_hash(self, indices):
+        """
+        Hash đầy đủ của tập pellet (node id), dùng một lần ở gốc cây tìm kiếm
+        """
+        value = 0
+        pellet_keys = self.pellet_keys
+        for index in indices:
+            value ^= pellet_keys[index]
+        return value
+
+
+class TTEntry(object):
+    """
+    Một entry trong TranspositionTable
+    """
+    __slots__ = ('depth', 'value', 'bound', 'best_move')
+
+    def __init__(self, depth, value, bound, best_move):
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+        self.best_move = best_move
+
+
+class TranspositionTable(object):
+    """
+    TranspositionTable - bảng key -> TTEntry có giới hạn kích thước
+
+    - probe(): lấy entry và đánh dấu vừa dùng (LRU)
+    - store(): không ghi đè entry sâu hơn bằng entry nông hơn
+    - Khi đầy: loại entry ít được dùng gần đây nhất
+    """
+    def __init__(self, max_entries=DEFAULT_TABLE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        """
+        Returns:
+            TTEntry hoặc None
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, depth, value, bound, best_move):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.depth > depth:
+                self.entries.move_to_end(key)
+                return
+            entry.depth = depth
+            entry.value = value
+            entry.bound = bound
+            entry.best_move = best_move
+            self.entries.move_to_end(key)
+            return
+        self.entries[key] = TTEntry(depth, value, bound, best_move)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -12,6 +12,8 @@ from states.game_init_state import GameInitState
 from ui.setting_modal import SettingModal
 from sound_system import SoundSystem,SilentSoundSystem
 from config_manager import ConfigManager, ConfigCategory
+from engine.profiler import profiler
+from engine.effects import effects_cache
 import sys
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,11 @@ class App:
         # Backward compatibility for sfx_volume
         self.sfx_volume = self.config.get('sfx_volume', 0.8)
 
+        # Profiler thời gian frame / quyết định AI (bật bằng config profiler_enabled)
+        profiler.enabled = self.config.get('profiler_enabled', False)
+        # Chất lượng hiệu ứng nền của game view (full / cached / off)
+        effects_cache.quality = self.config.get('effects_quality', 'cached')
+
         # Tạo state machine với GameInitState làm state đầu tiên
         # self.state_machine = StateMachine(MenuState, self)
         self.state_machine = StateMachine(GameInitState, self)
@@ -119,6 +126,12 @@ class App:
         self.config.add_listener('fullscreen', self._on_video_config_changed)
         self.config.add_listener('vsync', self._on_video_config_changed)
         
+        # Profiler - bật/tắt ngay lập tức
+        self.config.add_listener('profiler_enabled', self._on_profiler_config_changed)
+        
+        # Hiệu ứng nền - đổi chất lượng ngay lập tức
+        self.config.add_listener('effects_quality', self._on_effects_config_changed)
+        
     
     def _on_audio_config_changed(self, key: str, new_value, old_value):
         """
@@ -142,11 +155,28 @@ class App:
         # Cập nhật settings cho hiệu ứng tức thì nếu có thể
         self.settings[key] = new_value
     
+    def _on_profiler_config_changed(self, key: str, new_value, old_value):
+        """
+        Bật/tắt profiler, xóa mẫu cũ để overlay chỉ hiển thị lần đo mới
+        """
+        self.settings[key] = new_value
+        profiler.enabled = bool(new_value)
+        profiler.reset()
+    
+    def _on_effects_config_changed(self, key: str, new_value, old_value):
+        """
+        Đổi chất lượng hiệu ứng nền, bỏ các frame đã cache của chế độ cũ
+        """
+        self.settings[key] = new_value
+        effects_cache.quality = new_value
+        effects_cache.clear()
+    
     def run(self): 
         fps_limit = self.config.get('fps_limit', 30)
         
         while self.running:
             dt = self.clock.tick(fps_limit) / 1000
+            frame_start = profiler.begin()
             
             # Xử lý events từ pygame
             for event in pygame.event.get():
@@ -159,21 +189,28 @@ class App:
                     self.state_machine.current_state.handle_events(event)
 
             # Cập nhật các hệ thống
+            start = profiler.begin()
             self.state_machine.update()  # Cập nhật state machine
             
             # Cập nhật logic game
             if self.state_machine.current_state:
                 self.state_machine.current_state.logic()
+            profiler.end('update', start)
             
             # Render
+            start = profiler.begin()
             if self.state_machine.current_state:
                 self.state_machine.current_state.draw(self.screen)
             else:
                 # Nếu không có state nào, vẽ màn hình đen
                 self.screen.fill((0, 0, 0))
+            profiler.end('render', start)
 
             # Cập nhật màn hình
+            start = profiler.begin()
             pygame.display.flip()
+            profiler.end('flip', start)
+            profiler.end('frame', frame_start)
 
         # Tự động lưu config và dọn dẹp trước khi thoát
         if hasattr(self, 'sound_system'):
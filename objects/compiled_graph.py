@@ -0,0 +1,199 @@
+# =============================================================================
+# COMPILED_GRAPH.PY - VIEW DẠNG MẢNG (CSR) CỦA NODEGROUP
+# =============================================================================
+# File này chứa CompiledGraph - bản "biên dịch" của NodeGroup thành mảng NumPy
+# - Mỗi node có id số nguyên (node.index)
+# - Adjacency lưu dạng CSR: indptr / indices / directions
+# - Access của từng cạnh là bitmask theo entity name (bit 1 << name)
+# Các thuật toán tìm đường chạy trên id số nguyên thay vì dict của Node;
+# Node objects vẫn được giữ cho render và di chuyển entity.
+
+import numpy as np
+from constants import *
+
+GRAPH_DIRECTIONS = (UP, DOWN, LEFT, RIGHT, PORTAL)  # Thứ tự cạnh trong CSR
+MOVE_DIRECTIONS = (UP, DOWN, LEFT, RIGHT)           # Hướng có kiểm tra access
+ACCESS_ALL = 0xFFFF                                  # Cạnh portal: ai cũng đi được
+
+
+def accessBit(name):
+    """
+    Bit access của một entity name trong bitmask của cạnh
+    """
+    return 1 << name
+
+
+class CompiledGraph(object):
+    """
+    CompiledGraph - view dạng mảng của một tập Node
+
+    - Node id được gán theo thứ tự (y, x) giống Node.__lt__, nên so sánh id
+      cho kết quả giống hệt so sánh Node (tie-breaking trong heap không đổi)
+    - indptr/indices/directions/access: adjacency CSR (NumPy)
+    - successorLists(): list Python các neighbor id theo entity, dùng trong
+      vòng lặp tìm kiếm thuần số nguyên
+    - updateAccess(): vá bitmask khi Node.denyAccess/allowAccess thay đổi
+    - accessRevision(): số lần access của một entity trong graph này đã đổi
+    """
+    def __init__(self, nodes):
+        """
+        Args:
+            nodes: Iterable các Node cần biên dịch (thường là nodesLUT.values())
+        """
+        self.nodes = sorted(set(nodes))
+        self.size = len(self.nodes)
+        for index, node in enumerate(self.nodes):
+            node.index = index
+            node.graph = self
+
+        # Tọa độ pixel theo id (dùng cho heuristic bằng số học thuần)
+        self.xs = [node.position.x for node in self.nodes]
+        self.ys = [node.position.y for node in self.nodes]
+        self.positions = np.array(list(zip(self.xs, self.ys)), dtype=np.float32).reshape(self.size, 2)
+
+        # Bảng neighbor theo hướng: neighborTable[id, slot] = neighbor id hoặc -1
+        self.directionSlot = {direction: slot for slot, direction in enumerate(GRAPH_DIRECTIONS)}
+        self.neighborTable = np.full((self.size, len(GRAPH_DIRECTIONS)), -1, dtype=np.int32)
+
+        indptr = [0]
+        indices = []
+        directions = []
+        access = []
+        for node in self.nodes:
+            for slot, direction in enumerate(GRAPH_DIRECTIONS):
+                neighbor = node.neighbors.get(direction)
+                if neighbor is None or neighbor.graph is not self:
+                    continue
+                self.neighborTable[node.index, slot] = neighbor.index
+                indices.append(neighbor.index)
+                directions.append(direction)
+                access.append(self._edgeAccess(node, direction))
+            indptr.append(len(indices))
+
+        # Cùng bảng dạng list Python (truy cập nhanh trong vòng lặp mô phỏng)
+        self.neighborRows = self.neighborTable.tolist()
+
+        self.indptr = np.array(indptr, dtype=np.int32)
+        self.indices = np.array(indices, dtype=np.int32)
+        self.directions = np.array(directions, dtype=np.int8)
+        self.access = np.array(access, dtype=np.uint16)
+
+        # Cache list Python cho vòng lặp tìm kiếm: (name, portals) -> list
+        self._successorCache = {}
+        # Entity name -> số lần access thay đổi (DistanceOracle / DistanceFields
+        # dùng để biết khi nào bảng của graph này hết hạn)
+        self.accessRevisions = {}
+
+    @classmethod
+    def fromNode(cls, start):
+        """
+        Biên dịch thành phần liên thông chứa start (khi node chưa thuộc graph nào)
+        """
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for neighbor in node.neighbors.values():
+                if neighbor is not None and neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return cls(seen)
+
+    def _edgeAccess(self, node, direction):
+        """
+        Tính bitmask access của cạnh (node, direction)
+        """
+        if direction == PORTAL:
+            return ACCESS_ALL
+        mask = 0
+        for name in node.access.get(direction, ()):
+            mask |= accessBit(name)
+        return mask
+
+    def updateAccess(self, node, direction, name):
+        """
+        Vá bitmask của cạnh sau khi access của node thay đổi - O(degree)
+        Args:
+            name: Entity name vừa đổi access
+        """
+        self.accessRevisions[name] = self.accessRevisions.get(name, 0) + 1
+        if direction == PORTAL:
+            return
+        index = node.index
+        for edge in range(self.indptr[index], self.indptr[index + 1]):
+            if self.directions[edge] == direction:
+                self.access[edge] = self._edgeAccess(node, direction)
+        self._successorCache.clear()
+
+    def accessRevision(self, name):
+        return self.accessRevisions.get(name, 0)
+
+    def owns(self, node):
+        """
+        Kiểm tra node có thuộc graph này không
+        """
+        return getattr(node, 'graph', None) is self
+
+    def successorLists(self, name=PACMAN, portals=False):
+        """
+        List neighbor id của từng node mà entity name được phép đi tới
+        Args:
+            name: Entity name (PACMAN, BLINKY, ...)
+            portals: Có tính cạnh portal không
+        Returns:
+            List (theo node id) các tuple neighbor id, thứ tự UP, DOWN, LEFT, RIGHT, PORTAL
+        """
+        key = (name, portals)
+        lists = self._successorCache.get(key)
+        if lists is None:
+            lists = self._buildSuccessors(name, portals, withDirections=False)
+            self._successorCache[key] = lists
+        return lists
+
+    def successorDirections(self, name=PACMAN, portals=False):
+        """
+        Giống successorLists nhưng mỗi phần tử là (neighbor id, direction)
+        """
+        key = (name, portals, 'directions')
+        lists = self._successorCache.get(key)
+        if lists is None:
+            lists = self._buildSuccessors(name, portals, withDirections=True)
+            self._successorCache[key] = lists
+        return lists
+
+    def _buildSuccessors(self, name, portals, withDirections):
+        bit = accessBit(name)
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        directions = self.directions.tolist()
+        access = self.access.tolist()
+        lists = []
+        for index in range(self.size):
+            successors = []
+            for edge in range(indptr[index], indptr[index + 1]):
+                direction = directions[edge]
+                if direction == PORTAL and not portals:
+                    continue
+                if access[edge] & bit:
+                    successors.append((indices[edge], direction) if withDirections else indices[edge])
+            lists.append(tuple(successors))
+        return lists
+
+    def ids(self, nodes):
+        """
+        Đổi tập Node sang tập id (bỏ qua node không thuộc graph)
+        """
+        return {node.index for node in nodes if self.owns(node)}
+
+    def toNodes(self, ids):
+        """
+        Đổi list id sang list Node
+        """
+        nodes = self.nodes
+        return [nodes[index] for index in ids]
+
+    def manhattan(self, a, b):
+        """
+        Manhattan distance (đơn vị tile) giữa hai node id - giống Heuristic.manhattan
+        """
+        return (abs(self.xs[a] - self.xs[b]) + abs(self.ys[a] - self.ys[b])) / 16
@@ -6,7 +6,7 @@
 
 import pygame 
 from pygame.locals import * 
-from random import randint
+import random
 from objects.vector import Vector2
 from constants import *
 
@@ -43,6 +43,7 @@ class Entity(object):
         self.disablePortal = False  # Có sử dụng portal không
         self.goal = None            # Mục tiêu di chuyển (cho AI)
         self.directionMethod = self.randomDirection  # Phương thức chọn hướng
+        self.rng = random           # Bộ sinh số ngẫu nhiên (Game gán random.Random riêng)
         self.setStartNode(node)     # Đặt node khởi đầu
         self.image = None           # Hình ảnh entity (nếu có)
              
@@ -156,7 +157,7 @@ class Entity(object):
         Returns:
             Hướng được chọn ngẫu nhiên
         """
-        return directions[randint(0, len(directions) - 1)]
+        return directions[self.rng.randint(0, len(directions) - 1)]
     
     def goalDirection(self, directions): 
         """
@@ -139,6 +139,10 @@ class GhostGroup(object):
         for ghost in self : 
             ghost.setSpawnNode(node) 
     
+    def setRng(self, rng):
+        for ghost in self :
+            ghost.rng = rng
+    
     def updatePoints(self):
         for ghost in self :
             ghost.points *= 2 
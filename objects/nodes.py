@@ -9,6 +9,7 @@ import pygame
 import numpy as np
 from constants import *
 from objects.vector import Vector2
+from objects.compiled_graph import CompiledGraph
 
 class Node(object) : 
     """
@@ -43,6 +44,11 @@ class Node(object) :
             LEFT:[PACMAN,BLINKY,PINKY,INKY,CLYDE,FRUIT],
             RIGHT:[PACMAN,BLINKY,PINKY,INKY,CLYDE,FRUIT]
         }
+        
+        # Được gán khi NodeGroup được biên dịch (CompiledGraph / DistanceOracle)
+        self.index = None   # Id số nguyên của node trong graph
+        self.graph = None   # CompiledGraph chứa node này
+        self.oracle = None  # DistanceOracle chứa node này
     def __eq__(self, other):
         return isinstance(other, Node) and self.position == other.position
 
@@ -67,6 +73,7 @@ class Node(object) :
         """
         if entity.name in self.access[direction] :
             self.access[direction].remove(entity.name)
+            self._accessChanged(direction, entity.name)
     
     def allowAccess(self, direction,entity) : 
         """
@@ -77,6 +84,14 @@ class Node(object) :
         """
         if entity.name not in self.access[direction]:
             self.access[direction].append(entity.name)
+            self._accessChanged(direction, entity.name)
+    
+    def _accessChanged(self, direction, name):
+        """
+        Gọi khi access thực sự thay đổi: vá CompiledGraph (và tăng revision của graph)
+        """
+        if self.graph is not None:
+            self.graph.updateAccess(self, direction, name)
     
     def positions(self):
         """
@@ -120,6 +135,7 @@ class NodeGroup(object):
         self.connectHorizontally(data)  # Kết nối theo chiều ngang
         self.connectVertically(data)    # Kết nối theo chiều dọc
         self.homekey=None               # Key của home node
+        self.graph = None               # CompiledGraph (tạo bởi compile())
             
     def readMazeFile(self,textfile) : 
         """
@@ -185,6 +201,17 @@ class NodeGroup(object):
                 elif dataT[col][row] not in self.pathSymbols:
                     key = None
                         
+    def compile(self):
+        """
+        Biên dịch NodeGroup thành CompiledGraph (id số nguyên + CSR adjacency)
+        - Cache lại, chỉ biên dịch lại khi có node mới được thêm vào
+        Returns:
+            CompiledGraph của NodeGroup
+        """
+        if self.graph is None or self.graph.size != len(self.nodesLUT):
+            self.graph = CompiledGraph(self.nodesLUT.values())
+        return self.graph
+    
     def getStartTempNode(self):
         nodes = list(self.nodesLUT.values())
         return nodes[0]
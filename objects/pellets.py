@@ -1,26 +1,39 @@
 import pygame
+import math
+import random
+import types
 import numpy as np 
 from constants import *
 from objects.vector import Vector2
 from objects.nodes import NodeGroup
 
+LAYER_COLORKEY = (255, 0, 255)  # Màu trong suốt của layer pellet
+
 class Pellet(object):
     def __init__(self,row,column,node=None):
         self.name = PELLET
         self.position = Vector2(column*TILEWIDTH,row*TILEHEIGHT)
+        self.tile = (column, row)   # Ô chứa pellet (key của PelletGroup.grid)
+        self.order = 0              # Thứ tự ban đầu trong pelletList (ưu tiên khi ăn)
+        self.listIndex = 0          # Vị trí hiện tại trong pelletList (xóa O(1))
         self.node = node 
+        self.center = (self.position + Vector2(TILEWIDTH,TILEHEIGHT)/2).asInt()  # Tâm khi vẽ (pellet đứng yên)
         self.color = WHITE
         self.radius = int(2*TILEWIDTH/16)
         self.collideRadius = 10
         self.points = 10 
         self.visible = True 
         
+    @property
+    def rect(self):
+        """
+        Ô chứa pellet (pixel) - vùng cần xóa / vẽ lại
+        """
+        return pygame.Rect(self.tile[0]*TILEWIDTH, self.tile[1]*TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
     
     def render (self,screen) : 
         if self.visible:
-            adjust = Vector2(TILEWIDTH,TILEHEIGHT)/2
-            p = self.position + adjust
-            pygame.draw.circle(screen,self.color,p.asInt(),self.radius)
+            pygame.draw.circle(screen,self.color,self.center,self.radius)
 
 class PowerPellet(Pellet):
     def __init__(self,row,column,node=None):
@@ -30,30 +43,63 @@ class PowerPellet(Pellet):
         self.points = 50
         self.flashTime = 0.2
         self.timer = 0
+        self.flashing = False   # Có nhấp nháy không (PelletGroup.setFlashing)
+        self.flashOn = True     # Pha nhấp nháy - không đổi visible vì AI đọc visible
         
     def update(self, dt):
-        pass
-        # self.timer += dt
-        # if self.timer >= self.flashTime:
-        #     self.visible = not self.visible
-        #     self.timer = 0
+        if not self.flashing:
+            return
+        self.timer += dt
+        if self.timer >= self.flashTime:
+            self.flashOn = not self.flashOn
+            self.timer = 0
+    
+    def render(self, screen):
+        if self.flashOn:
+            super().render(screen)
             
 class PelletGroup(object):
-    def __init__(self, pelletfile, nodes: NodeGroup, few_pellets_mode=False, few_pellets_count=20):
+    def __init__(self, pelletfile, nodes: NodeGroup, few_pellets_mode=False, few_pellets_count=20, rng=None):
         self.pelletList = []
         self.powerpellets = []
         self.numEaten = 0
         self.few_pellets_mode = few_pellets_mode
         self.few_pellets_count = few_pellets_count
         self.total_pellets = 0
+        # Spatial index theo ô: phát hiện ăn chỉ xét các ô quanh Pac-Man
+        self.grid = {}          # (column, row) -> pellet còn sống
+        self.columns = 0        # Số cột của maze (bit của ô = row * columns + column)
+        self.liveBits = 0       # Bitset các ô còn pellet
+        self.maxCollideRadius = 0
+        # View cho AI theo node, cập nhật tăng dần khi ăn (đọc qua property)
+        self._nodePellets = {}  # Node -> pellet còn sống
+        self._nodeGraph = None  # CompiledGraph mà bitset node id đang theo
+        self._nodeBits = 0      # Bitset node id còn pellet
+        self._powerNodeBits = 0 # Bitset node id còn power pellet
+        self._nodePoints = {}   # Node id -> điểm pellet
+        # Layer pellet thường vẽ sẵn (power pellet vẽ riêng để nhấp nháy)
+        self.layer = None       # Surface SCREENSIZE, dựng khi render lần đầu
+        self.flashPowerPellets = False
+        self.rng = rng if rng is not None else random  # Dùng khi chọn pellet ở chế độ few pellets
         self.createPelletList(pelletfile, nodes)
     
     def update(self, dt):
         for powerpellet in self.powerpellets:
             powerpellet.update(dt)
+    
+    def setFlashing(self, enabled):
+        """
+        Bật / tắt nhấp nháy của power pellet
+        """
+        self.flashPowerPellets = enabled
+        for powerpellet in self.powerpellets:
+            powerpellet.flashing = enabled
+            powerpellet.flashOn = True
+            powerpellet.timer = 0
             
     def createPelletList(self, pelletfile, nodes: NodeGroup):
         data = self.readPelletfile(pelletfile)
+        self.columns = data.shape[1]
         all_pellets = []  # Tạm thời lưu tất cả pellets
         
         for row in range(data.shape[0]):
@@ -71,7 +117,6 @@ class PelletGroup(object):
         
         # Nếu chế độ few pellets được bật, chỉ chọn một số pellets ngẫu nhiên
         if self.few_pellets_mode:
-            import random
             # Đảm bảo giữ lại tất cả power pellets
             regular_pellets = [p for p in all_pellets if p.name == PELLET]
             
@@ -79,7 +124,7 @@ class PelletGroup(object):
             if len(regular_pellets) > self.few_pellets_count:
                 # fixed_indices = [0, 10, 20, 30, 100, 150, 200]  # Vị trí cố định
                 # selected_regular = [regular_pellets[i] for i in fixed_indices if i < len(regular_pellets)]
-                selected_regular = random.sample(regular_pellets, self.few_pellets_count)
+                selected_regular = self.rng.sample(regular_pellets, self.few_pellets_count)
             else:
                 selected_regular = regular_pellets
             
@@ -88,6 +133,117 @@ class PelletGroup(object):
             self.pelletList = all_pellets
         
         self.total_pellets = len(self.pelletList)
+        self.buildIndex()
+    
+    def buildIndex(self):
+        """
+        Dựng grid, bitset và vị trí trong list từ pelletList hiện tại
+        """
+        self.grid = {}
+        self.liveBits = 0
+        self.maxCollideRadius = 0
+        for index, pellet in enumerate(self.pelletList):
+            pellet.order = index
+            pellet.listIndex = index
+            self.grid[pellet.tile] = pellet
+            self.liveBits |= 1 << self.tileBit(pellet.tile)
+            self.maxCollideRadius = max(self.maxCollideRadius, pellet.collideRadius)
+        self.powerpellets = [pellet for pellet in self.pelletList if pellet.name == POWERPELLET]
+        self.layer = None
+        self._nodePellets = {pellet.node: pellet for pellet in self.pelletList if pellet.node is not None}
+        self._nodeGraph = None
+    
+    @property
+    def liveCount(self):
+        """
+        Số pellet còn lại - O(1)
+        """
+        return len(self.pelletList)
+    
+    @property
+    def powerCount(self):
+        """
+        Số power pellet còn lại - O(1)
+        """
+        return len(self.powerpellets)
+    
+    @property
+    def liveNodes(self):
+        """
+        Tập Node còn pellet - view chỉ đọc, không copy (thay đổi theo game,
+        copy bằng set()/frozenset() nếu cần giữ lại)
+        """
+        return self._nodePellets.keys()
+    
+    def nodeBits(self, graph):
+        """
+        Bitset theo node id của graph
+        - Dựng lại khi đổi graph, sau đó cập nhật tăng dần trong removePellet
+        Args:
+            graph: CompiledGraph của maze
+        Returns:
+            (bitset pellet, bitset power pellet, view chỉ đọc node id -> điểm)
+        """
+        if graph is not self._nodeGraph:
+            self._nodeGraph = graph
+            self._nodeBits = 0
+            self._powerNodeBits = 0
+            self._nodePoints = {}
+            for node, pellet in self._nodePellets.items():
+                if not graph.owns(node):
+                    continue
+                bit = 1 << node.index
+                self._nodeBits |= bit
+                self._nodePoints[node.index] = pellet.points
+                if pellet.name == POWERPELLET:
+                    self._powerNodeBits |= bit
+        return self._nodeBits, self._powerNodeBits, types.MappingProxyType(self._nodePoints)
+    
+    def tileBit(self, tile):
+        column, row = tile
+        return row * self.columns + column
+    
+    def pelletsNear(self, position, radius):
+        """
+        Các pellet có thể va chạm với hình tròn (position, radius)
+        - Chỉ xét các ô trong tầm radius + collideRadius của pellet
+        Returns:
+            List pellet theo thứ tự ban đầu trong pelletList
+        """
+        reach = radius + self.maxCollideRadius
+        grid = self.grid
+        found = []
+        for row in range(math.ceil((position.y - reach) / TILEHEIGHT), math.floor((position.y + reach) / TILEHEIGHT) + 1):
+            for column in range(math.ceil((position.x - reach) / TILEWIDTH), math.floor((position.x + reach) / TILEWIDTH) + 1):
+                pellet = grid.get((column, row))
+                if pellet is not None:
+                    found.append(pellet)
+        if len(found) > 1:
+            found.sort(key=lambda pellet: pellet.order)
+        return found
+
+    def removePellet(self, pellet):
+        """
+        Xóa pellet đã ăn - O(1): đổi chỗ với phần tử cuối của pelletList rồi pop
+        """
+        last = self.pelletList.pop()
+        if last is not pellet:
+            self.pelletList[pellet.listIndex] = last
+            last.listIndex = pellet.listIndex
+        del self.grid[pellet.tile]
+        self.liveBits &= ~(1 << self.tileBit(pellet.tile))
+        if pellet.name == POWERPELLET:
+            self.powerpellets.remove(pellet)
+        elif self.layer is not None:
+            self.layer.fill(LAYER_COLORKEY, pellet.rect)
+        node = pellet.node
+        if node is not None and self._nodePellets.get(node) is pellet:
+            del self._nodePellets[node]
+            if self._nodeGraph is not None and self._nodeGraph.owns(node):
+                bit = ~(1 << node.index)
+                self._nodeBits &= bit
+                self._powerNodeBits &= bit
+                self._nodePoints.pop(node.index, None)
         
     def readPelletfile(self, textfile):
         return np.loadtxt(textfile, dtype='<U1')
@@ -95,6 +251,36 @@ class PelletGroup(object):
     def isEmpty(self):
         return len(self.pelletList) == 0
 
-    def render(self, screen):
+    def buildLayer(self):
+        """
+        Vẽ tất cả pellet thường lên layer (một lần cho mỗi level), sau đó
+        removePellet chỉ xóa ô của pellet bị ăn
+        """
+        self.layer = pygame.Surface(SCREENSIZE)
+        self.layer.fill(LAYER_COLORKEY)
         for pellet in self.pelletList:
-            pellet.render(screen)
\ No newline at end of file
+            if pellet.name != POWERPELLET:
+                pellet.render(self.layer)
+        # RLE: blit gần như miễn phí, chỉ mã hóa lại sau khi xóa một ô
+        self.layer.set_colorkey(LAYER_COLORKEY, pygame.RLEACCEL)
+    
+    def render(self, screen):
+        """
+        Một lần blit layer pellet thường, rồi vẽ power pellet (overlay nhỏ, nhấp nháy)
+        """
+        if self.layer is None:
+            self.buildLayer()
+        screen.blit(self.layer, (0, 0))
+        for powerpellet in self.powerpellets:
+            powerpellet.render(screen)
+    
+    def renderArea(self, screen, rect):
+        """
+        Vẽ lại pellet trong vùng rect (dùng cho dirty rect)
+        """
+        if self.layer is None:
+            self.buildLayer()
+        screen.blit(self.layer, rect, rect)
+        for powerpellet in self.powerpellets:
+            if powerpellet.rect.colliderect(rect):
+                powerpellet.render(screen)
\ No newline at end of file
@@ -12,11 +12,13 @@ from objects.pellets import PelletGroup
 from objects.nodes import Node
 from collections import deque
 import sys
+import time
 from engine.algorithms_practical import (
     bfs, dfs, astar, ucs, ids, greedy
 )
 from engine.compute_once_system import compute_once
 from engine.hybrid_ai_system import HybridAISystem
+from engine.profiler import profiler
 
 class Pacman(Entity):
     def __init__(self, node, config=None):
@@ -58,6 +60,11 @@ class Pacman(Entity):
         # Hybrid AI System
         self.hybrid_ai = HybridAISystem(self, config)
         self.use_hybrid_ai = False  # Flag để bật/tắt hybrid AI
+        self.async_planning = True  # Master path offline tính ở thread nền (Game tắt khi headless)
+        # Thời gian (giây) của từng quyết định AI cho thống kê tournament - chỉ ghi
+        # khi record_decisions (Game bật khi headless); UI đã có ring buffer của profiler
+        self.decision_times = []
+        self.record_decisions = False
 
         # Stuck detection
         self.stuck_counter = 0
@@ -151,12 +158,18 @@ class Pacman(Entity):
             # Chỉ gọi AI khi cần thiết và có dữ liệu hợp lệ
             if auto and pelletGroup is not None and pelletGroup.pelletList:
                 try:
+                    decision_start = time.perf_counter()
                     if self.use_hybrid_ai:
                         direction = self.hybrid_ai.get_direction(pelletGroup, ghostGroup, fruit)
                     else:
                         direction = compute_once.get_direction(
-                            self, pelletGroup, self.pathfinder, self.pathfinder_name, fruit
+                            self, pelletGroup, self.pathfinder, self.pathfinder_name, fruit,
+                            async_planning=self.async_planning
                         )
+                    decision_time = time.perf_counter() - decision_start
+                    if self.record_decisions:
+                        self.decision_times.append(decision_time)
+                    profiler.record_ai(self.pathfinder_name, self._heuristic_name(), decision_time)
                     
                     # Kiểm tra tính hợp lệ của direction từ AI
                     if not self._is_valid_direction(direction):
@@ -181,6 +194,14 @@ class Pacman(Entity):
             if not auto and self.oppositeDirection(direction):
                 self.reverseDirection()
     
+    def _heuristic_name(self):
+        """
+        Tên heuristic đang chọn trong config (tag cho profiler)
+        """
+        if hasattr(self.config, 'get'):
+            return self.config.get('algorithm_heuristic', 'NONE')
+        return 'NONE'
+    
     def _is_valid_direction(self, direction):
         """
         Kiểm tra xem direction có hợp lệ không
@@ -50,7 +50,7 @@ class ComparisonLayout(UIComponent):
         self.is_playing = False # Trạng thái play/pause
         
         # Tùy chọn thuật toán cho selectbox - thêm các thuật toán comparison
-        self.algorithm_options = ["BFS", "DFS", "A*", "UCS", "IDS", "Greedy", "Minimax", "Alpha-Beta", "Hill Climbing", "Genetic Algorithm", "GBFS"]
+        self.algorithm_options = ["BFS", "DFS", "A*", "UCS", "IDS", "Greedy", "Held-Karp", "Minimax", "Alpha-Beta", "MCTS", "Hill Climbing", "Genetic Algorithm", "GBFS"]
         
         # Tùy chọn heuristic cho selectbox
         self.heuristic_options = ["None", "Manhattan", "Euclidean", "Maze Distance"]
@@ -579,10 +579,10 @@ class ComparisonState(State):
             algorithm: Tên thuật toán được chọn
         """
         # Các thuật toán offline sử dụng compute_once_system
-        offline_algorithms = ['BFS', 'DFS', 'A*', 'UCS', 'IDS', 'Greedy']
+        offline_algorithms = ['BFS', 'DFS', 'A*', 'UCS', 'IDS', 'Greedy', 'Held-Karp']
         
         # Các thuật toán online sử dụng hybrid_ai_system
-        online_algorithms = ['Minimax', 'Alpha-Beta', 'Hill Climbing', 'Genetic Algorithm', 'GBFS', 'A* Online']
+        online_algorithms = ['Minimax', 'Alpha-Beta', 'MCTS', 'Hill Climbing', 'Genetic Algorithm', 'GBFS', 'A* Online']
         
         if algorithm in offline_algorithms:
             # Set offline mode cho các thuật toán offline
@@ -8,6 +8,7 @@ from statemachine import State
 from ui.constants import *
 from states.gamelayout import GameLayout
 from engine.game import Game
+from engine.dirty_renderer import scale_dirty_rects
 from engine.compute_once_system import compute_once
 from states.menu_state import MenuState
 
@@ -22,6 +23,10 @@ class GameState(State):
         self.game_running = True  
         
         self.layout = GameLayout(app)
+        
+        # Surface giữ lại giữa các frame cho chế độ dirty_rect_rendering
+        self._game_frame = None     # Game ở kích thước gốc
+        self._scaled_frame = None   # Game đã scale vào game area
         # Cập nhật algorithm cho layout ngay từ đầu
         self.layout.algorithm = algorithm
         
@@ -90,6 +95,10 @@ class GameState(State):
         scaled_width = int(original_width * scale)
         scaled_height = int(original_height * scale)
         
+        if hasattr(self.app, 'config') and self.app.config.get('dirty_rect_rendering', True):
+            self._render_scaled_dirty(game_surface, game_rect, (scaled_width, scaled_height))
+            return
+        
         # Tạo surface tạm để render game ở kích thước gốc
         temp_surface = pygame.Surface((original_width, original_height))
         
@@ -113,6 +122,26 @@ class GameState(State):
         
         game_surface.blit(scaled_surface, (x_offset, y_offset))
         
+    def _render_scaled_dirty(self, game_surface, game_rect, scaled_size):
+        """
+        Render game theo dirty rect: frame gốc và frame đã scale được giữ lại,
+        mỗi frame chỉ vẽ lại và scale lại các vùng thay đổi
+        """
+        from constants import SCREENSIZE
+        if self._game_frame is None:
+            self._game_frame = pygame.Surface(SCREENSIZE)
+        rects = self.game.render_dirty(self._game_frame)
+        
+        if self._scaled_frame is None or self._scaled_frame.get_size() != scaled_size:
+            self._scaled_frame = pygame.Surface(scaled_size)
+            rects = [self._game_frame.get_rect()]
+        scale_dirty_rects(self._game_frame, self._scaled_frame, rects)
+        
+        x_offset = (game_rect.width - scaled_size[0]) // 2
+        y_offset = (game_rect.height - scaled_size[1]) // 2
+        game_surface.fill((0, 0, 0, 0))
+        game_surface.blit(self._scaled_frame, (x_offset, y_offset))
+        
     def draw(self, _screen=None):
         """
         Vẽ GameState lên màn hình
@@ -130,6 +159,9 @@ class GameState(State):
         # Scale game content để fit vào game area đúng cách
         self._render_scaled_game(game_surface, game_rect)
         
+        # Overlay profiler (chỉ vẽ khi bật profiler_enabled)
+        self.layout.draw_profiler_overlay()
+        
     def logic(self):
         """
         Cập nhật logic của GameState mỗi frame
@@ -10,6 +10,9 @@ from ui.uicomponent import UIComponent
 from ui.constants import *
 from ui.selectbox import SelectBox
 from ui.ai_mode_selector import AIModeSelector
+from engine.profiler import profiler, PROFILER_PHASES
+
+PROFILER_OVERLAY_REFRESH = 30  # Số frame giữa hai lần tính lại percentile cho overlay
 
 class GameLayout(UIComponent):
     """
@@ -48,15 +51,15 @@ class GameLayout(UIComponent):
             "BFS", "DFS", "A*", 
             "UCS", "IDS", "GBFS",
             "Hill Climbing", "Genetic Algorithm", "Minimax",
-            "Alpha-Beta", "A* Online"
+            "Alpha-Beta", "MCTS", "A* Online"
         ] 
 
         self.online_algorithms = [
             "Hill Climbing", "Minimax",
-            "Genetic Algorithm", "Alpha-Beta", "A* Online" ,"GBFS"
+            "Genetic Algorithm", "Alpha-Beta", "MCTS", "A* Online" ,"GBFS"
         ]
 
-        self.offline_algorithms = ["BFS", "DFS", "A*", "UCS", "IDS"]  
+        self.offline_algorithms = ["BFS", "DFS", "A*", "UCS", "IDS", "Held-Karp"]  
         # Track last selected algorithm per AI mode
         self._last_offline_algorithm = self.algorithm if self.algorithm in self.offline_algorithms else (self.offline_algorithms[0] if self.offline_algorithms else None)
         self._last_online_algorithm = self.online_algorithms[0] if self.online_algorithms else None
@@ -93,6 +96,11 @@ class GameLayout(UIComponent):
         # Animation
         self.animation_time = 0
         
+        # Profiler overlay: bảng được tính lại mỗi PROFILER_OVERLAY_REFRESH frame
+        self._profiler_panel = None
+        self._profiler_font = None
+        self._profiler_frames = 0
+        
     def update_algorithm_options_for_ai_mode(self, ai_mode):
         """Update algorithm list and restore last choice for the given AI mode"""
         desired_algorithm = None
@@ -910,6 +918,43 @@ class GameLayout(UIComponent):
             y = 50 + 30 * math.sin(self.animation_time * 2 + i)
             pygame.draw.circle(self.surface, GHOST_PINK, (int(x), int(y)), 3)
     
+    def draw_profiler_overlay(self):
+        """
+        Vẽ p50/p95/p99 (ms) của từng phase và của thuật toán AI đang chạy ở góc
+        trên bên trái game area (gọi sau khi game đã render, chỉ khi profiler bật)
+        - Bảng được vẽ lại mỗi PROFILER_OVERLAY_REFRESH frame, các frame khác chỉ blit
+        """
+        if not profiler.enabled:
+            return
+        if self._profiler_panel is None or self._profiler_frames % PROFILER_OVERLAY_REFRESH == 0:
+            self._profiler_panel = self._render_profiler_panel()
+        self._profiler_frames += 1
+        self.surface.blit(self._profiler_panel, (self.game_area_rect.x + 8, self.game_area_rect.y + 8))
+    
+    def _render_profiler_panel(self):
+        lines = ["PROFILE    p50    p95    p99 ms"]
+        for phase in PROFILER_PHASES:
+            p50, p95, p99 = profiler.percentiles(profiler.phases[phase])
+            lines.append(f"{phase:<8}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        for (algorithm, heuristic), samples in profiler.ai.items():
+            if algorithm != self.algorithm:
+                continue
+            p50, p95, p99 = profiler.percentiles(samples)
+            lines.append(f"{algorithm} / {heuristic}")
+            lines.append(f"{'':<8}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        
+        if self._profiler_font is None:
+            self._profiler_font = pygame.font.SysFont("monospace", 12)
+        font = self._profiler_font
+        line_height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 12
+        panel = pygame.Surface((width, line_height * len(lines) + 8), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            color = PAC_YELLOW if i == 0 else DOT_WHITE
+            panel.blit(font.render(line, True, color), (6, 4 + i * line_height))
+        return panel
+    
     def get_game_area_rect(self):
         return self.game_area_rect
     
@@ -6,11 +6,35 @@ BASETILEWIDTH = 16
 BASETILEHEIGHT = 16
 DEATH = 5
 
-class Spritesheet(object):
-    def __init__(self):
+SPRITESHEET_PATH = "assets/images/spritesheet_mspacman.png"
+
+class SpriteAtlas(object):
+    """
+    SpriteAtlas - spritesheet đã load + scale, dùng chung cho cả process
+
+    - Mỗi (file, tile size) chỉ load và scale một lần (SpriteAtlas.get)
+    - image(): subsurface theo (x, y, w, h) pixel, được memoize
+    - rotated(): ảnh đã xoay (bội số 90 độ), được memoize
+    Ảnh trả về được dùng chung giữa các sprite - không vẽ trực tiếp lên chúng.
+    """
+    _atlases = {}  # (path, tile width, tile height) -> SpriteAtlas
+
+    @classmethod
+    def get(cls, path=SPRITESHEET_PATH):
+        key = (path, TILEWIDTH, TILEHEIGHT)
+        atlas = cls._atlases.get(key)
+        if atlas is None:
+            atlas = cls._atlases[key] = cls(path)
+        return atlas
+
+    @classmethod
+    def clear(cls):
+        cls._atlases.clear()
+
+    def __init__(self, path=SPRITESHEET_PATH):
         try:
             # Load without .convert() to work in headless mode
-            self.sheet = pygame.image.load("assets/images/spritesheet_mspacman.png")
+            self.sheet = pygame.image.load(path)
             transcolor = self.sheet.get_at((0,0))
             self.sheet.set_colorkey(transcolor)
             width = int(self.sheet.get_width()/BASETILEWIDTH * TILEWIDTH) 
@@ -23,12 +47,30 @@ class Spritesheet(object):
             self.sheet = pygame.Surface((width, height))
             self.sheet.fill((0, 0, 0))
             self.sheet.set_colorkey((0, 0, 0)) 
+        self.images = {}   # (x, y, w, h) -> subsurface
+        self.rotations = {}  # (x, y, w, h, số lần xoay 90 độ) -> Surface
+
+    def image(self, x, y, width, height):
+        key = (x, y, width, height)
+        image = self.images.get(key)
+        if image is None:
+            image = self.images[key] = self.sheet.subsurface(pygame.Rect(x, y, width, height))
+        return image
+
+    def rotated(self, x, y, width, height, value):
+        key = (x, y, width, height, value % 4)
+        image = self.rotations.get(key)
+        if image is None:
+            image = self.rotations[key] = pygame.transform.rotate(self.image(x, y, width, height), value*90)
+        return image
+
+class Spritesheet(object):
+    def __init__(self):
+        self.atlas = SpriteAtlas.get()
+        self.sheet = self.atlas.sheet
                               
     def getImage(self,x,y,width,height):
-        x *= TILEWIDTH
-        y *= TILEHEIGHT
-        self.sheet.set_clip(pygame.Rect(x,y,width,height))
-        return self.sheet.subsurface(self.sheet.get_clip())
+        return self.atlas.image(x*TILEWIDTH, y*TILEHEIGHT, width, height)
                 
 class PacmanScriptes(Spritesheet) :
     def __init__(self,entity):
@@ -158,15 +200,17 @@ class MazeSprites(Spritesheet):
             for col in list(range(self.data.shape[1])) : 
                 if self.data[row][col].isdigit():
                     x = int(self.data[row][col]) + 12 
-                    sprite = self.getImage(x,y)
                     rotval = int(self.rotdata[row][col])
-                    sprite = self.rotate(sprite,rotval)
+                    sprite = self.getRotatedImage(x,y,rotval)
                     background.blit(sprite,(col*TILEWIDTH,row*TILEHEIGHT))
                 elif self.data[row][col] == '=':
                     sprite = self.getImage(10,8)
                     background.blit(sprite,(col*TILEWIDTH,row*TILEHEIGHT))
         return background
     
+    def getRotatedImage(self,x,y,value):
+        return self.atlas.rotated(x*TILEWIDTH,y*TILEHEIGHT,TILEWIDTH,TILEHEIGHT,value)
+    
     def rotate(self,sprite,value):
         return pygame.transform.rotate(sprite,value*90) 
     